@@ -4,6 +4,7 @@ GomorraSQL - Interfaccia CLI
 Esegue query GomorraSQL da linea di comando
 """
 
+import os
 import sys
 from pathlib import Path
 
@@ -15,21 +16,37 @@ import json
 
 
 def print_results(results):
-    """Stampa i risultati in formato tabellare"""
-    if not results:
-        print("Nessun risultato")
-        return
-    
-    # Intestazioni
-    headers = list(results[0].keys())
-    print("\n" + " | ".join(headers))
-    print("-" * (len(" | ".join(headers))))
+    """
+    Stampa i risultati in formato tabellare
     
-    # Righe
+    Accetta anche un generatore: ogni riga viene stampata appena arriva,
+    l'intestazione con la prima riga.
+    """
+    headers = None
+    count = 0
     for row in results:
+        if headers is None:
+            # Intestazioni
+            headers = list(row.keys())
+            print("\n" + " | ".join(headers))
+            print("-" * (len(" | ".join(headers))))
+        
         print(" | ".join(str(row[h]) for h in headers))
+        count += 1
+    
+    if headers is None:
+        print("Nessun risultato")
+        return
     
-    print(f"\n({len(results)} righe)")
+    print(f"\n({count} righe)")
+
+
+def default_cache_dir() -> str:
+    """Directory di default della cache: $GOMORRASQL_CACHE_DIR o ~/.cache/gomorrasql"""
+    if os.environ.get("GOMORRASQL_CACHE_DIR"):
+        return os.environ["GOMORRASQL_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return str(Path(base) / "gomorrasql")
 
 
 def main():
@@ -37,17 +54,52 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="GomorraSQL - Compilatore SQL Napoletano")
-    parser.add_argument("input", help="Query o file .gsql da eseguire")
+    parser.add_argument("input", nargs="?", help="Query o file .gsql da eseguire")
     parser.add_argument("--data-dir", default="data", help="Directory contenente i file CSV")
     parser.add_argument("--show-ir", action="store_true", help="Mostra LLVM IR generato")
-    parser.add_argument("--no-optimize", action="store_true", help="Disabilita ottimizzazioni LLVM IR")
+    parser.add_argument("--no-optimize", action="store_true", help="Disabilita ottimizzazioni LLVM IR (equivale a -O 0)")
+    parser.add_argument("-O", "--opt-level", type=int, choices=[0, 1, 2, 3], default=2,
+                        help="Livello di ottimizzazione LLVM (default: 2)")
+    parser.add_argument("--cache-dir", default=default_cache_dir(),
+                        help="Directory della cache su disco dei kernel JIT compilati")
+    parser.add_argument("--no-cache", action="store_true", help="Disabilita la cache su disco dei kernel JIT")
+    parser.add_argument("--column-cache", action="store_true",
+                        help="Salva e riusa le tabelle convertite in <tabella>.csv.gcol accanto ai CSV")
+    parser.add_argument("--zone-map-cache", action="store_true",
+                        help="Salva e riusa le zone map (min/max per blocco) in <tabella>.csv.gzone accanto ai CSV")
+    parser.add_argument("--load-workers", type=int, default=None,
+                        help="Processi per il parsing dei CSV grandi (default: numero di CPU)")
+    parser.add_argument("--create-index", action="append", default=[], metavar="TABELLA:COLONNA",
+                        help="Costruisce un indice secondario su una colonna (ripetibile)")
+    parser.add_argument("--index-kind", choices=["hash", "sorted"], default="hash",
+                        help="Tipo degli indici creati: hash (uguaglianze) o sorted (anche intervalli)")
+    parser.add_argument("--profile", action="store_true", help="Stampa su stderr i tempi per fase della query")
+    parser.add_argument("--profile-format", choices=["text", "json"], default="text",
+                        help="Formato del profilo: tabella leggibile (default) o JSON")
     
     args = parser.parse_args()
+    if args.input is None and not args.create_index:
+        parser.error("serve una query, un file .gsql o --create-index")
     
-    # Ottimizzazioni abilitate di default, disabilitate solo con --no-optimize
-    compiler = GomorraCompiler(data_dir=args.data_dir, optimize=not args.no_optimize)
+    # Ottimizzazioni abilitate di default (O2), disabilitate con --no-optimize
+    compiler = GomorraCompiler(
+        data_dir=args.data_dir,
+        optimize=0 if args.no_optimize else args.opt_level,
+        object_cache_dir=None if args.no_cache else args.cache_dir,
+        column_cache=args.column_cache,
+        zone_map_cache=args.zone_map_cache,
+        load_workers=args.load_workers,
+    )
     
     try:
+        # Indici secondari richiesti (prima della query, che li può già usare)
+        for spec in args.create_index:
+            table, _, column = spec.partition(':')
+            path = compiler.create_index(table, column, args.index_kind)
+            print(f"🗂️  Indice {args.index_kind} creato: {path}")
+        if args.input is None:
+            return
+        
         # Parse query per generare AST
         if Path(args.input).exists():
             print(f"📄 Esecuzione file: {args.input}")
@@ -58,8 +110,11 @@ def main():
             code = args.input
         
         # Parse e analisi semantica
-        ast = compiler.parser.parse(code)
-        compiler.semantic_analyzer.analyze(ast)
+        profile = compiler.start_profile()
+        with profile.phase('parse'):
+            ast = compiler.parser.parse(code)
+        with profile.phase('analyze'):
+            compiler.semantic_analyzer.analyze(ast)
         
         # Mostra LLVM IR se richiesto
         if args.show_ir:
@@ -67,13 +122,26 @@ def main():
             compilation = compiler.codegen.get_ir(ast)
             print(compilation.llvm_ir)
             
+            stats = compilation.metadata['optimization']
+            if stats:
+                print(f"--- Ottimizzazione O{stats['opt_level']}: {stats['time_ms']:.2f} ms, "
+                      f"istruzioni {stats['instructions_before']} → {stats['instructions_after']}, "
+                      f"SIMD {compilation.metadata['vector_width']} righe ---")
+            
         
-        # Esegui query
-        results = compiler.codegen.generate_and_execute(ast)
+        # Esegui query: le righe vengono stampate man mano che arrivano
+        results = compiler.codegen.generate_and_stream(ast)
         
         # Stampa risultati
         print_results(results)
         
+        # Profilo su stderr: non si mescola con i risultati
+        if args.profile and args.profile_format == "json":
+            print(profile.to_json(), file=sys.stderr)
+        elif args.profile:
+            print("\n--- PROFILO QUERY ---", file=sys.stderr)
+            print(profile.format(), file=sys.stderr)
+    
     except SyntaxError as e:
         print(f"\n❌ ERRORE SINTATTICO: {e}")
         sys.exit(1)
@@ -0,0 +1,196 @@
+"""
+Catalog: schemi delle tabelle condivisi tra analisi semantica e code generator
+Header, ordine delle colonne, tipi inferiti e stima delle righe di ogni CSV
+vengono letti una volta e riusati tra le query finché il file non cambia
+"""
+
+import csv
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .column_store import source_fingerprint
+from .compression import compression_of, open_text
+from .zone_map import ZoneMap
+
+
+NULL_TYPE = type(None)
+
+# Righe campionate per la type inference
+DEFAULT_SAMPLE_SIZE = 100
+
+# Rapporto tipico testo/compresso di un CSV, per stimare le righe di un
+# file compresso dalla sua dimensione su disco
+COMPRESSED_SIZE_FACTOR = 4
+
+
+def infer_value_type(value: Optional[str]) -> type:
+    """Inferisce il tipo di un valore CSV (sempre string) analizzandolo"""
+    if not value:
+        return NULL_TYPE  # NULL (anche cella mancante in una riga corta)
+    
+    # Prova conversione a numero
+    try:
+        if '.' in value:
+            float(value)
+            return float
+        else:
+            int(value)
+            return int
+    except ValueError:
+        return str  # È una stringa
+
+
+def infer_column_types(header: List[str], rows: List[List[str]]) -> Dict[str, type]:
+    """
+    Tipo predominante di ogni colonna nelle righe campionate
+    
+    float prevale su int, int su str; NoneType se la colonna è tutta NULL.
+    Il tipo è solo un punto di partenza: il caricamento promuove la colonna
+    se una riga successiva non è rappresentabile.
+    """
+    types_found = {}
+    for idx, col in enumerate(header):
+        non_null_types = {infer_value_type(row[idx] if idx < len(row) else '') for row in rows}
+        non_null_types.discard(NULL_TYPE)
+        if not non_null_types:
+            types_found[col] = NULL_TYPE  # Colonna tutta NULL
+        elif float in non_null_types:
+            types_found[col] = float
+        elif int in non_null_types:
+            types_found[col] = int
+        else:
+            types_found[col] = str
+    return types_found
+
+
+def join_column_names(headers: Sequence[Sequence[str]]) -> List[Dict[str, str]]:
+    """
+    Nomi delle colonne di ogni tabella nel risultato di una JOIN
+    
+    Una colonna già presente in una tabella precedente prende il suffisso
+    con la posizione (da 1) della sua tabella: nome_2 per la seconda,
+    nome_3 per la terza, ... Il nome senza suffisso resta alla prima.
+    
+    Returns:
+        Per ogni tabella, {nome nel CSV: nome nel risultato}
+    """
+    seen = set()
+    names = []
+    for position, header in enumerate(headers, start=1):
+        names.append({col: f"{col}_{position}" if col in seen else col for col in header})
+        seen.update(header)
+    return names
+
+
+@dataclass
+class TableInfo:
+    """
+    Voce del catalogo per un file CSV
+    
+    type_hints e row_estimate vengono calcolati alla prima richiesta dei
+    tipi (l'analisi semantica legge solo l'header); row_count è esatto
+    dopo un caricamento completo della tabella; zone_map raccoglie i
+    riassunti min/max per zona man mano che le colonne vengono lette.
+    """
+    path: Path
+    fingerprint: Dict[str, int]
+    header: List[str]
+    type_hints: Optional[Dict[str, type]] = None
+    sample_rows: int = 0
+    row_estimate: Optional[int] = None
+    row_count: Optional[int] = None
+    zone_map: Optional[ZoneMap] = None
+    
+    @property
+    def rows(self) -> Optional[int]:
+        """Righe della tabella: esatte se note, altrimenti la stima"""
+        return self.row_count if self.row_count is not None else self.row_estimate
+
+
+class TableCatalog:
+    """
+    Catalogo delle tabelle CSV
+    
+    Ogni voce è indicizzata dal path del file e validata con dimensione e
+    mtime (source_fingerprint): se il CSV cambia, header e tipi vengono
+    riletti alla richiesta successiva. Posseduto da GomorraCompiler e
+    condiviso da SemanticAnalyzer e LLVMCodeGenerator.
+    """
+    
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._tables: Dict[Path, TableInfo] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def table(self, csv_path: Path) -> TableInfo:
+        """
+        Voce aggiornata della tabella (header letto se assente o non valido)
+        
+        Raises:
+            FileNotFoundError: se il CSV non esiste
+        """
+        path = Path(csv_path)
+        fingerprint = source_fingerprint(path)
+        info = self._tables.get(path)
+        if info is not None and info.fingerprint == fingerprint:
+            self.hits += 1
+            return info
+        
+        self.misses += 1
+        with open_text(path) as f:
+            header = next(csv.reader(f), [])
+        info = self._tables[path] = TableInfo(path, fingerprint, header)
+        return info
+    
+    def header(self, csv_path: Path) -> List[str]:
+        return self.table(csv_path).header
+    
+    def has_types(self, csv_path: Path) -> bool:
+        """True se i tipi della tabella sono già in catalogo (nessuna lettura del CSV)"""
+        return self.table(csv_path).type_hints is not None
+    
+    def type_hints(self, csv_path: Path) -> Dict[str, type]:
+        """Tipi inferiti dal campione (letti dal CSV solo alla prima richiesta)"""
+        info = self.table(csv_path)
+        if info.type_hints is None:
+            with open_text(info.path) as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                rows = list(islice(reader, self.sample_size))
+            info.type_hints = infer_column_types(header, rows)
+            info.sample_rows = len(rows)
+            info.row_estimate = self._estimate_rows(info, header, rows)
+        return dict(info.type_hints)
+    
+    @staticmethod
+    def _estimate_rows(info: TableInfo, header: List[str], rows: List[List[str]]) -> int:
+        """Stima delle righe: dimensione del file / byte medi delle righe campionate"""
+        if not rows:
+            return 0
+        header_bytes = len(','.join(header).encode()) + 1
+        sample_bytes = sum(len(','.join(row).encode()) + 1 for row in rows)
+        size = info.fingerprint['size']
+        if compression_of(info.path) is not None:
+            size *= COMPRESSED_SIZE_FACTOR
+        data_bytes = max(size - header_bytes, 0)
+        return max(len(rows), round(data_bytes * len(rows) / max(sample_bytes, 1)))
+    
+    def record_row_count(self, csv_path: Path, row_count: int):
+        """Salva il numero esatto di righe dopo un caricamento completo"""
+        self.table(csv_path).row_count = row_count
+    
+    def invalidate(self, csv_path: Optional[Path] = None):
+        """Rimuove una voce (o tutte): verrà riletta alla prossima richiesta"""
+        if csv_path is None:
+            self._tables.clear()
+        else:
+            self._tables.pop(Path(csv_path), None)
+    
+    def __contains__(self, csv_path: Path) -> bool:
+        return Path(csv_path) in self._tables
+    
+    def __len__(self) -> int:
+        return len(self._tables)
@@ -0,0 +1,193 @@
+"""
+Column Store: cache binaria colonnare accanto ai CSV
+Il file <tabella>.csv.gcol contiene i buffer delle colonne tipizzate e lo
+schema inferito; viene ricostruito solo quando cambiano dimensione o mtime
+del CSV, così le query successive non riparsano il file
+"""
+
+import json
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .columnar import Column, ColumnarTable, NULL_TYPE
+from .sidecar import read_manifest, section_offsets, write_sidecar
+
+
+SUFFIX = ".gcol"
+MAGIC = b"GCOL"
+VERSION = 2
+
+_TYPE_NAMES = {int: 'int', float: 'float', str: 'str', NULL_TYPE: 'null'}
+_TYPES = {name: typ for typ, name in _TYPE_NAMES.items()}
+
+
+def sidecar_path(csv_path) -> Path:
+    """Path della cache colonnare di un CSV (es. guaglioni.csv.gcol)"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.name + SUFFIX)
+
+
+def source_fingerprint(csv_path) -> Dict[str, int]:
+    """Dimensione e mtime (ns) del CSV: se cambiano la cache non è più valida"""
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class ColumnStore:
+    """
+    Cache colonnare su disco di un singolo CSV
+    
+    Formato: sidecar (vedi sidecar.py) con i buffer di valori e bitmap di
+    validità di ogni colonna come sezioni, più una sezione JSON con
+    dizionario e override delle colonne che li hanno. Il manifest riporta
+    impronta del CSV, header, tipi del campione della type inference, e per
+    ogni colonna tipo, typecode e offset delle sezioni.
+    
+    - open() valida la cache (formato, byte order, impronta del CSV) e legge
+      solo il manifest; read() legge solo le sezioni delle colonne richieste
+    - write() è atomica (temporaneo + os.replace) e best-effort: una directory
+      in sola lettura non deve bloccare la query
+    
+    Uso:
+        store = ColumnStore(csv_path)
+        if store.open():
+            table = store.read({'eta': 'eta'})
+        else:
+            store.write(header, type_hints, table)
+    """
+    
+    def __init__(self, csv_path):
+        self.csv_path = Path(csv_path)
+        self.path = sidecar_path(csv_path)
+        self.header: List[str] = []
+        self.type_hints: Dict[str, type] = {}
+        self._manifest: Optional[dict] = None
+        self._data_start = 0
+    
+    @property
+    def is_fresh(self) -> bool:
+        return self._manifest is not None
+    
+    def open(self) -> bool:
+        """Carica il manifest; False se la cache manca, è corrotta o non aggiornata"""
+        self._manifest = None
+        try:
+            fingerprint = source_fingerprint(self.csv_path)
+            with open(self.path, 'rb') as f:
+                header = read_manifest(f, MAGIC)
+        except OSError:
+            return False
+        if header is None:
+            return False
+        
+        manifest, data_start = header
+        if (manifest.get('version') != VERSION
+                or manifest.get('byteorder') != sys.byteorder
+                or manifest.get('source') != fingerprint):
+            return False
+        
+        self.header = manifest['header']
+        self.type_hints = {col: _TYPES[name] for col, name in manifest['type_hints'].items()}
+        self._data_start = data_start
+        self._manifest = manifest
+        return True
+    
+    def read(self, names: Optional[Dict[str, str]] = None) -> ColumnarTable:
+        """
+        Legge le colonne richieste dalla cache (già validata con open())
+        
+        Args:
+            names: Colonne da caricare {nome nel CSV: nome nella tabella}
+                   (default: tutte, con il nome del CSV)
+        """
+        if self._manifest is None:
+            raise RuntimeError(f"Cache colonnare non aperta: {self.path}")
+        columns = []
+        with open(self.path, 'rb') as f:
+            for meta in self._manifest['columns']:
+                name = meta['name']
+                if names is not None and name not in names:
+                    continue
+                values = self._read_buffer(f, meta['typecode'], meta['values'])
+                validity = self._read_buffer(f, 'B', meta['validity'])
+                dictionary, overrides = None, {}
+                if meta['text'] is not None:
+                    text = json.loads(self._read_section(f, meta['text']).decode('utf-8'))
+                    dictionary = text['dictionary']
+                    overrides = {int(i): value for i, value in text['overrides'].items()}
+                columns.append(Column(
+                    names[name] if names is not None else name,
+                    _TYPES[meta['type']], values, validity, meta['null_count'],
+                    dictionary, overrides,
+                ))
+        return ColumnarTable(columns)
+    
+    def _read_section(self, f, span: List[int]) -> bytes:
+        offset, length = span
+        f.seek(self._data_start + offset)
+        data = f.read(length)
+        if len(data) != length:
+            raise OSError(f"Cache colonnare troncata: {self.path}")
+        return data
+    
+    def _read_buffer(self, f, typecode: str, span: List[int]) -> array:
+        buffer = array(typecode)
+        buffer.frombytes(self._read_section(f, span))
+        return buffer
+    
+    def write(self, header: List[str], type_hints: Dict[str, type], table: ColumnarTable,
+              fingerprint: Optional[Dict[str, int]] = None):
+        """
+        Salva la tabella (tutte le colonne del CSV) nella cache
+        
+        Args:
+            fingerprint: Impronta del CSV letto (default: quella attuale); va
+                         presa prima della lettura, così una modifica durante
+                         il caricamento invalida la cache alla query successiva
+        """
+        try:
+            fingerprint = fingerprint or source_fingerprint(self.csv_path)
+        except OSError:
+            return
+        
+        # Sezioni di ogni colonna; dizionario e override (testo) solo se presenti
+        sections = []
+        for column in table.columns:
+            text = None
+            if column.dictionary is not None or column.overrides:
+                text = json.dumps({
+                    'dictionary': column.dictionary,
+                    'overrides': {str(i): value for i, value in column.overrides.items()},
+                }).encode('utf-8')
+            sections.append({'values': column.values.tobytes(),
+                             'validity': column.validity.tobytes(), 'text': text})
+        buffers = [data for parts in sections for data in parts.values() if data is not None]
+        offsets = iter(section_offsets([len(data) for data in buffers]))
+        columns = []
+        for column, parts in zip(table.columns, sections):
+            columns.append({
+                'name': column.name,
+                'type': _TYPE_NAMES[column.type],
+                'typecode': column.values.typecode,
+                'null_count': column.null_count,
+                **{key: None if data is None else [next(offsets), len(data)]
+                   for key, data in parts.items()},
+            })
+        manifest = {
+            'version': VERSION,
+            'byteorder': sys.byteorder,
+            'source': fingerprint,
+            'header': header,
+            'type_hints': {col: _TYPE_NAMES.get(typ, 'str') for col, typ in type_hints.items()},
+            'rows': len(table),
+            'columns': columns,
+        }
+        
+        try:
+            write_sidecar(self.path, MAGIC, manifest, buffers, mode_from=self.csv_path)
+        except OSError:
+            # La cache è best-effort: un errore di I/O non deve bloccare la query
+            return
@@ -0,0 +1,427 @@
+"""
+Tabelle colonnari tipizzate
+Ogni colonna è un array contiguo (i32, double o codici di dizionario i32)
+con una bitmap di validità: sono gli stessi buffer passati al kernel JIT
+"""
+
+import re
+from array import array
+from itertools import compress, islice
+from operator import ne, not_
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+
+NULL_TYPE = type(None)
+
+# Promozione quando un valore non è rappresentabile nel tipo corrente
+_PROMOTION = {NULL_TYPE: int, int: float, float: str}
+_RANK = {NULL_TYPE: 0, int: 1, float: 2, str: 3}
+
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+
+# Righe convertite per blocco durante il caricamento
+CHUNK_ROWS = 65536
+
+# Testi numerici sicuramente canonici (str(valore) == testo): interi senza
+# zeri iniziali; decimali a punto fisso con al più 15 cifre e senza zeri
+# finali, fuori dal range in cui repr() passa alla notazione esponenziale
+_CANONICAL = {
+    int: r'0|-?[1-9][0-9]*',
+    float: r'(?=.{3,16}$)(?!-?0\.0000)-?(?:0|[1-9][0-9]*)\.(?:[0-9]*[1-9]|0)',
+}
+# Prima riga non vuota che non è canonica (una cella per riga)
+_NON_CANONICAL = {}
+for _type, _pattern in _CANONICAL.items():
+    _line = f'^(?!(?:{_pattern})$).+$'
+    _NON_CANONICAL[(_type, str)] = re.compile(_line, re.MULTILINE)
+    _NON_CANONICAL[(_type, bytes)] = re.compile(_line.encode(), re.MULTILINE)
+del _type, _pattern, _line
+
+# Cella in ingresso: testo, bytes non decodificati (scanner mmap) o None (NULL)
+Cell = Union[str, bytes, None]
+
+
+class Column:
+    """
+    Colonna tipizzata in memoria
+    
+    - int: array('i'), float: array('d'), 0 per i NULL
+    - str: array('i') di codici del dizionario ordinato (valore in posizione
+      k → codice 2k+1, NULL → 0), come atteso dal kernel JIT
+    - NoneType: colonna tutta NULL (codici 0)
+    - validity: bitmap LSB, bit i%8 del byte i/8 a 1 se il valore non è NULL
+    - overrides: testo originale delle celle numeriche non canoniche
+      (es. "007", "1.50"), così l'output riproduce esattamente il CSV
+    """
+    
+    def __init__(self, name: str, type_: type, values: array, validity: array,
+                 null_count: int, dictionary: Optional[List[str]] = None,
+                 overrides: Optional[Dict[int, str]] = None):
+        self.name = name
+        self.type = type_
+        self.values = values
+        self.validity = validity
+        self.null_count = null_count
+        self.dictionary = dictionary
+        self.overrides = overrides or {}
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def is_valid(self, i: int) -> bool:
+        return bool(self.validity[i >> 3] >> (i & 7) & 1)
+    
+    def valid_values(self) -> Sequence:
+        """Valori grezzi delle sole righe non NULL (codici per le stringhe)"""
+        if self.null_count == 0:
+            return self.values
+        return [v for i, v in enumerate(self.values) if self.validity[i >> 3] >> (i & 7) & 1]
+    
+    def value(self, i: int):
+        """Valore tipizzato della riga i (None se NULL)"""
+        if not self.is_valid(i):
+            return None
+        if self.dictionary is not None:
+            return self.dictionary[self.values[i] >> 1]
+        return self.values[i]
+    
+    def text(self, i: int) -> str:
+        """Testo della cella come nel CSV ('' se NULL)"""
+        if not self.is_valid(i):
+            return ''
+        if self.dictionary is not None:
+            return self.dictionary[self.values[i] >> 1]
+        text = self.overrides.get(i)
+        return text if text is not None else str(self.values[i])
+    
+    def renamed(self, name: str) -> "Column":
+        """Stessa colonna (buffer condivisi) con un altro nome"""
+        return Column(name, self.type, self.values, self.validity, self.null_count,
+                      self.dictionary, self.overrides)
+    
+    def take(self, indices: Sequence[int]) -> "Column":
+        """Nuova colonna con le righe indicate, nell'ordine dato"""
+        values = array(self.values.typecode, (self.values[i] for i in indices))
+        validity = array('B', bytes((len(indices) + 7) // 8))
+        overrides = {}
+        null_count = 0
+        for j, i in enumerate(indices):
+            if self.is_valid(i):
+                validity[j >> 3] |= 1 << (j & 7)
+            else:
+                null_count += 1
+            if i in self.overrides:
+                overrides[j] = self.overrides[i]
+        return Column(self.name, self.type, values, validity, null_count,
+                      self.dictionary, overrides)
+    
+    def promoted(self, type_: type) -> "Column":
+        """Stessa colonna convertita in un tipo più ampio (NULL → int → float → str)"""
+        if type_ == self.type:
+            return self
+        if type_ == str:
+            builder = ColumnBuilder(self.name, str)
+            builder.extend([self.text(i) for i in range(len(self))])
+            return builder.finish()
+        # int/NULL → float: il testo originale degli interi diventa un override
+        overrides = {i: self.text(i) for i in range(len(self)) if self.is_valid(i)}
+        values = array('d' if type_ == float else 'i', self.values)
+        return Column(self.name, type_, values, self.validity, self.null_count, None, overrides)
+    
+    @staticmethod
+    def concat(parts: Sequence["Column"]) -> "Column":
+        """
+        Concatena colonne parziali nell'ordine dato (es. intervalli del CSV
+        caricati in parallelo): tipo unificato al più ampio, dizionari uniti
+        e codici rimappati, bitmap di validità e override traslati
+        """
+        type_ = max((part.type for part in parts), key=_RANK.__getitem__)
+        parts = [part.promoted(type_) for part in parts]
+        
+        dictionary = None
+        if type_ == str:
+            dictionary = sorted(set().union(*(part.dictionary for part in parts)))
+            position = {value: k for k, value in enumerate(dictionary)}
+        
+        values = array(parts[0].values.typecode)
+        bits = 0
+        overrides = {}
+        offset = 0
+        for part in parts:
+            if dictionary is not None:
+                remap = [0] * (2 * len(part.dictionary) + 1)
+                for k, value in enumerate(part.dictionary):
+                    remap[2 * k + 1] = 2 * position[value] + 1
+                values.extend(array('i', map(remap.__getitem__, part.values)))
+            else:
+                values.extend(part.values)
+            bits |= int.from_bytes(part.validity, 'little') << offset
+            overrides.update({offset + i: text for i, text in part.overrides.items()})
+            offset += len(part)
+        
+        validity = array('B', bits.to_bytes((offset + 7) // 8, 'little'))
+        return Column(parts[0].name, type_, values, validity,
+                      sum(part.null_count for part in parts), dictionary, overrides)
+
+
+class ColumnBuilder:
+    """
+    Costruisce una Column a blocchi di celle testuali
+    
+    Parte dal tipo suggerito (campione della type inference) e lo promuove
+    NULL → int → float → str quando un valore non è rappresentabile
+    (es. testo non numerico, intero fuori dal range i32). Le conversioni
+    avvengono per blocco (list comprehension + array), non cella per cella.
+    
+    Con encoding le celle sono bytes non decodificati (es. dal CSVScanner):
+    int()/float() accettano direttamente i bytes e le stringhe vengono
+    decodificate una sola volta per valore distinto, in finish().
+    """
+    
+    def __init__(self, name: str, type_hint: type = NULL_TYPE, encoding: Optional[str] = None):
+        self.name = name
+        self.type = type_hint if type_hint in _PROMOTION or type_hint == str else str
+        self.encoding = encoding
+        self.count = 0
+        self.null_count = 0
+        self.validity = array('B')
+        self._reset_storage()
+    
+    def _reset_storage(self):
+        self.values = array('d' if self.type == float else 'i')
+        self.overrides: Dict[int, Cell] = {}
+        # Solo str: valore → id provvisorio (da 1); i NULL ('', b'', None) → 0
+        self._ids: Dict[Cell, int] = {'': 0, b'': 0, None: 0}
+        self._next_id = 1
+    
+    def append(self, text: Cell):
+        """Aggiunge una cella ('' o None = NULL)"""
+        self.extend((text,))
+    
+    def extend(self, texts: Sequence[Cell]):
+        """Aggiunge un blocco di celle ('' o None = NULL)"""
+        start = self.count
+        nulls = list(compress(range(len(texts)), map(not_, texts)))
+        self._extend_validity(start, len(texts), nulls)
+        while not self._extend_values(start, texts):
+            self._promote()
+        self.count += len(texts)
+        self.null_count += len(nulls)
+    
+    def _extend_validity(self, start: int, length: int, nulls: List[int]):
+        """Bit a 1 per le righe [start, start+length), poi azzera quelli dei NULL"""
+        end = start + length
+        self.validity.extend(bytes(((end + 7) >> 3) - len(self.validity)))
+        i = start
+        while i < end and i & 7:
+            self.validity[i >> 3] |= 1 << (i & 7)
+            i += 1
+        full_end = max(i, end & ~7)
+        if full_end > i:
+            self.validity[i >> 3:full_end >> 3] = array('B', b'\xff' * ((full_end - i) >> 3))
+        for i in range(full_end, end):
+            self.validity[i >> 3] |= 1 << (i & 7)
+        for j in nulls:
+            i = start + j
+            self.validity[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+    
+    def _extend_values(self, start: int, texts: Sequence[Cell]) -> bool:
+        """Converte e aggiunge un blocco; False se il tipo corrente non lo rappresenta"""
+        if self.type == str:
+            ids = self._ids
+            for text in dict.fromkeys(texts):
+                if text not in ids:
+                    ids[text] = self._next_id
+                    self._next_id += 1
+            self.values.extend(array('i', map(ids.__getitem__, texts)))
+            return True
+        if self.type == NULL_TYPE:
+            if any(texts):
+                return False  # Primo valore non NULL: serve un tipo
+            self.values.extend(array('i', bytes(4 * len(texts))))
+            return True
+        
+        convert = int if self.type == int else float
+        try:
+            if all(texts):
+                converted = list(map(convert, texts))
+            else:
+                converted = [convert(t) if t else 0 for t in texts]
+            block = array(self.values.typecode, converted)
+        except (ValueError, OverflowError):
+            return False
+        
+        # Testo originale solo per le celle non canoniche (es. "007", "1.50"):
+        # controllo cella per cella solo se il blocco ne contiene
+        if not self._has_non_canonical(texts):
+            self.values.extend(block)
+            return True
+        # Anche i NULL differiscono ('' vs '0') e vengono scartati qui
+        canonical = map(str, converted)
+        if self.encoding:
+            canonical = map(str.encode, canonical)
+        for j in compress(range(len(texts)), map(ne, texts, canonical)):
+            if texts[j]:
+                self.overrides[start + j] = texts[j]
+        self.values.extend(block)
+        return True
+    
+    def _has_non_canonical(self, texts: Sequence[Cell]) -> bool:
+        """True se qualche cella numerica potrebbe non coincidere con str(valore)"""
+        if self.encoding:
+            joined = b'\n'.join(t or b'' for t in texts) if None in texts else b'\n'.join(texts)
+            return _NON_CANONICAL[(self.type, bytes)].search(joined) is not None
+        joined = '\n'.join(t or '' for t in texts) if None in texts else '\n'.join(texts)
+        return _NON_CANONICAL[(self.type, str)].search(joined) is not None
+    
+    def _promote(self):
+        """Passa al tipo successivo, riconvertendo le celle già aggiunte"""
+        texts = [self._text(i) for i in range(len(self.values))]
+        self.type = _PROMOTION[self.type]
+        self._reset_storage()
+        self._extend_values(0, texts)
+    
+    def _text(self, i: int) -> Cell:
+        """Cella originale (stessa rappresentazione dell'input: str o bytes)"""
+        if not self.validity[i >> 3] >> (i & 7) & 1:
+            return b'' if self.encoding else ''
+        text = self.overrides.get(i)
+        if text is None:
+            text = str(self.values[i])
+            if self.encoding:
+                text = text.encode()
+        return text
+    
+    def finish(self) -> Column:
+        """Column finale; per le stringhe ordina il dizionario e assegna i codici 2k+1"""
+        dictionary = None
+        values = self.values
+        overrides = self.overrides
+        if self.encoding:
+            overrides = {i: text.decode(self.encoding) for i, text in overrides.items()}
+        if self.type == str:
+            ids = {(value.decode(self.encoding) if self.encoding else value): ident
+                   for value, ident in self._ids.items() if value}
+            dictionary = sorted(ids)
+            remap = [0] * self._next_id
+            for k, value in enumerate(dictionary):
+                remap[ids[value]] = 2 * k + 1
+            values = array('i', map(remap.__getitem__, values))
+        return Column(self.name, self.type, values, self.validity, self.null_count,
+                      dictionary, overrides)
+
+
+class ColumnarTable:
+    """Tabella in memoria come lista di colonne tipizzate della stessa lunghezza"""
+    
+    def __init__(self, columns: Sequence[Column] = ()):
+        self.columns = list(columns)
+        self.names = [col.name for col in self.columns]
+        self._index = {name: idx for idx, name in enumerate(self.names)}
+        self.num_rows = len(self.columns[0]) if self.columns else 0
+    
+    def __len__(self) -> int:
+        return self.num_rows
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+    
+    def index(self, name: str) -> int:
+        return self._index[name]
+    
+    def column(self, name: str) -> Column:
+        return self.columns[self._index[name]]
+    
+    @property
+    def schema(self) -> Dict[str, type]:
+        return {col.name: col.type for col in self.columns}
+    
+    @classmethod
+    def from_records(cls, names: Sequence[str], records: Iterable[Sequence[str]],
+                     type_hints: Optional[Dict[str, type]] = None) -> "ColumnarTable":
+        """
+        Costruisce la tabella da record di celle testuali (es. csv.reader)
+        
+        I record più corti dell'header hanno NULL nelle colonne mancanti,
+        le celle in eccesso vengono ignorate.
+        """
+        width = len(names)
+        
+        def blocks():
+            # Blocchi di righe trasposti in colonne: conversioni in blocco
+            iterator = iter(records)
+            while True:
+                chunk = list(islice(iterator, CHUNK_ROWS))
+                if not chunk:
+                    return
+                if min(map(len, chunk)) < width:
+                    chunk = [list(r) + [None] * (width - len(r)) for r in chunk]
+                yield list(zip(*chunk))[:width]
+        
+        return cls.from_column_blocks(names, blocks(), type_hints)
+    
+    @classmethod
+    def from_column_blocks(cls, names: Sequence[str], blocks: Iterable[Sequence[Sequence[Cell]]],
+                           type_hints: Optional[Dict[str, type]] = None,
+                           encoding: Optional[str] = None) -> "ColumnarTable":
+        """
+        Costruisce la tabella da blocchi già divisi per colonna
+        
+        Args:
+            names: Nomi delle colonne, nell'ordine delle celle di ogni blocco
+            blocks: Per ogni blocco di righe, una sequenza di celle per colonna
+            type_hints: Tipi di partenza (campione della type inference)
+            encoding: Se indicato le celle sono bytes (es. da CSVScanner)
+        """
+        type_hints = type_hints or {}
+        builders = [ColumnBuilder(name, type_hints.get(name, NULL_TYPE), encoding) for name in names]
+        for block in blocks:
+            for builder, cells in zip(builders, block):
+                builder.extend(cells)
+        return cls([builder.finish() for builder in builders])
+    
+    @staticmethod
+    def concat(tables: Sequence["ColumnarTable"]) -> "ColumnarTable":
+        """Righe di tutte le tabelle in ordine (stesse colonne, tipi unificati)"""
+        if len(tables) == 1:
+            return tables[0]
+        return ColumnarTable([Column.concat(parts)
+                              for parts in zip(*(table.columns for table in tables))])
+    
+    def take(self, indices: Sequence[int]) -> "ColumnarTable":
+        """Nuova tabella con le righe indicate"""
+        return ColumnarTable([col.take(indices) for col in self.columns])
+    
+    @staticmethod
+    def product(left: "ColumnarTable", right: "ColumnarTable",
+                right_names: Optional[Sequence[str]] = None) -> "ColumnarTable":
+        """
+        Prodotto cartesiano: ogni riga di left seguita da tutte le righe di right
+        
+        Args:
+            right_names: Nomi delle colonne di right nel risultato
+                         (es. con suffisso _2 per disambiguare)
+        """
+        n_left, n_right = len(left), len(right)
+        left_indices = [i for i in range(n_left) for _ in range(n_right)]
+        right_indices = list(range(n_right)) * n_left
+        return ColumnarTable.join(left, right, left_indices, right_indices, right_names)
+    
+    @staticmethod
+    def join(left: "ColumnarTable", right: "ColumnarTable", left_indices: Sequence[int],
+             right_indices: Sequence[int], right_names: Optional[Sequence[str]] = None) -> "ColumnarTable":
+        """
+        Righe accoppiate: la k-esima riga è left[left_indices[k]] seguita da
+        right[right_indices[k]] (es. coppie di un hash join)
+        """
+        right_names = right_names or right.names
+        columns = [col.take(left_indices) for col in left.columns]
+        columns += [col.take(right_indices).renamed(name)
+                    for col, name in zip(right.columns, right_names)]
+        return ColumnarTable(columns)
+    
+    def rows(self, indices: Iterable[int], names: Optional[Sequence[str]] = None) -> List[Dict[str, str]]:
+        """Righe come dizionari colonna → testo, per le colonne indicate (proiezione)"""
+        columns = [self.columns[self._index[name]] for name in (names or self.names)]
+        return [{col.name: col.text(i) for col in columns} for i in indices]
@@ -6,29 +6,62 @@ Coordina tutte le fasi: parsing → semantic analysis → execution
 from .parser import GomorraParser
 from .semantic_analyzer import SemanticAnalyzer, SemanticError
 from .llvm_codegen import LLVMCodeGenerator
-from typing import List, Dict, Any
+from .jit_cache import JITCache, ObjectCache
+from .profiling import QueryProfile
+from .catalog import TableCatalog
+from .secondary_index import SecondaryIndex, index_path
+from pathlib import Path
+from typing import Iterator, List, Dict, Any, Union, Optional
 
 
 class GomorraCompiler:
     """Compilatore completo per GomorraSQL"""
     
-    def __init__(self, grammar_file: str = None, data_dir: str = "data", optimize: bool = True):
+    def __init__(self, grammar_file: str = None, data_dir: str = "data", optimize: Union[bool, int] = True,
+                 jit_cache_size: int = 64, object_cache_dir: str = None,
+                 column_cache: bool = False, load_workers: Optional[int] = None,
+                 zone_map_cache: bool = False):
         """
         Inizializza il compilatore
         
         Args:
             grammar_file: Path alla grammatica (opzionale)
             data_dir: Directory con i file CSV
-            optimize: Se True, applica ottimizzazioni LLVM IR (default: True)
+            optimize: Livello di ottimizzazione LLVM 0-3, oppure bool
+                      (True = O2, False = O0; default: True)
+            jit_cache_size: Numero massimo di kernel JIT in cache LRU (0 = disabilitata)
+            object_cache_dir: Directory per la cache su disco del codice oggetto
+                              (opzionale, utile per processi di breve durata come la CLI)
+            column_cache: Salva/riusa le tabelle convertite in <tabella>.csv.gcol
+                          accanto ai CSV (ricostruite quando il CSV cambia)
+            load_workers: Processi per il parsing dei CSV grandi
+                          (default: $GOMORRASQL_LOAD_WORKERS o numero di CPU)
+            zone_map_cache: Salva/riusa le zone map (min/max per blocco) in
+                            <tabella>.csv.gzone accanto ai CSV
         """
         self.parser = GomorraParser(grammar_file)
-        self.semantic_analyzer = SemanticAnalyzer(data_dir)
-        self.codegen = LLVMCodeGenerator(data_dir, optimize=optimize)
+        # Header, tipi e righe delle tabelle: letti una volta, condivisi
+        # tra analisi semantica e code generator
+        self.catalog = TableCatalog()
+        self.semantic_analyzer = SemanticAnalyzer(data_dir, catalog=self.catalog)
+        self.jit_cache = JITCache(maxsize=jit_cache_size)
+        self.object_cache = ObjectCache(object_cache_dir) if object_cache_dir else None
+        self.codegen = LLVMCodeGenerator(data_dir, optimize=optimize,
+                                         jit_cache=self.jit_cache,
+                                         object_cache=self.object_cache,
+                                         column_cache=column_cache,
+                                         load_workers=load_workers,
+                                         catalog=self.catalog,
+                                         zone_map_cache=zone_map_cache)
+        self.last_profile: Optional[QueryProfile] = None
     
     def compile_and_run(self, code: str) -> List[Dict[str, Any]]:
         """
         Esegue la pipeline completa: parsing → analisi → esecuzione
         
+        I tempi di ogni fase (wall/CPU) e le righe elaborate vengono
+        salvati in self.last_profile.
+        
         Args:
             code: Query GomorraSQL
             
@@ -39,17 +72,85 @@ class GomorraCompiler:
             SyntaxError: Errore di sintassi nel parsing
             SemanticError: Errore semantico nell'analisi
         """
+        profile = self.start_profile()
+        
         # 1. Parsing (solleva SyntaxError se fallisce)
-        ast = self.parser.parse(code)
+        with profile.phase('parse'):
+            ast = self.parser.parse(code)
         
         # 2. Analisi Semantica (solleva SemanticError se fallisce)
-        self.semantic_analyzer.analyze(ast)
+        with profile.phase('analyze'):
+            self.semantic_analyzer.analyze(ast)
         
         # 3. Esecuzione con LLVM Code Generator
         results = self.codegen.generate_and_execute(ast)
         
         return results
     
+    def iter_query(self, code: str) -> Iterator[Dict[str, Any]]:
+        """
+        Come compile_and_run, ma restituisce le righe man mano (streaming)
+        
+        Parsing, analisi, caricamento e compilazione avvengono subito (gli
+        errori vengono sollevati qui); filtro e proiezione procedono un batch
+        alla volta mentre il generatore viene consumato. Il generatore va
+        consumato prima di eseguire un'altra query con lo stesso compilatore.
+        
+        Args:
+            code: Query GomorraSQL
+        
+        Returns:
+            Generatore delle righe risultato
+        """
+        profile = self.start_profile()
+        
+        with profile.phase('parse'):
+            ast = self.parser.parse(code)
+        
+        with profile.phase('analyze'):
+            self.semantic_analyzer.analyze(ast)
+        
+        return self.codegen.generate_and_stream(ast)
+    
+    def create_index(self, table: str, column: str, kind: str = 'hash') -> Path:
+        """
+        Costruisce e salva un indice secondario su una colonna di una tabella
+        
+        Le query con un confronto tra la colonna e un letterale nel WHERE
+        (in AND con il resto) leggono solo i record indicati dall'indice;
+        se il CSV cambia l'indice viene ricostruito alla query successiva.
+        
+        Args:
+            table: Nome del CSV in data_dir (es. "guaglioni.csv")
+            column: Colonna da indicizzare
+            kind: 'hash' (solo uguaglianze) o 'sorted' (anche intervalli)
+        
+        Returns:
+            Path del file indice (<tabella>.<colonna>.gidx)
+        
+        Raises:
+            SemanticError: tabella o colonna inesistente
+            ValueError: tipo di indice non valido o tabella compressa
+        """
+        csv_path = self.codegen.data_dir / table
+        if column not in self.semantic_analyzer._load_table_schema(table):
+            raise SemanticError(f"Colonna '{column}' non esiste nella tabella '{table}'")
+        return SecondaryIndex.build(csv_path, column, kind)
+    
+    def drop_index(self, table: str, column: str) -> bool:
+        """Elimina l'indice secondario di una colonna; False se non esisteva"""
+        path = index_path(self.codegen.data_dir / table, column)
+        if not path.exists():
+            return False
+        path.unlink()
+        return True
+    
+    def start_profile(self) -> QueryProfile:
+        """Crea il profilo della nuova query e lo collega al code generator"""
+        self.last_profile = QueryProfile()
+        self.codegen.profile = self.last_profile
+        return self.last_profile
+    
     def run_file(self, filepath: str) -> List[Dict[str, Any]]:
         """
         Esegue una query da file
@@ -0,0 +1,190 @@
+"""
+Compression: lettura in streaming delle tabelle compresse (.gz, .bz2, .xz)
+I dati vengono decompressi a blocchi grandi senza scrivere nulla su disco;
+i file formati da più membri/stream concatenati (gzip multi-member, bzip2
+di pbzip2, xz multi-stream) vengono decompressi in parallelo su più thread
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import re
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+# Suffisso del file → formato di compressione
+COMPRESSED_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+# Byte decompressi per lettura in streaming
+READ_BYTES = 4 * 1024 * 1024
+
+# Buffer del file compresso sottostante
+FILE_BUFFER_BYTES = 1024 * 1024
+
+# Byte compressi minimi per task di decompressione parallela
+MEMBER_TASK_BYTES = 1024 * 1024
+
+# Byte compressi massimi per task: oltre (membri troppo grandi o unico
+# membro) la decompressione resta in streaming, con memoria limitata
+MEMBER_TASK_MAX_BYTES = 64 * 1024 * 1024
+
+# Byte compressi passati al decompressore per chiamata
+_FEED_BYTES = 256 * 1024
+
+_OPENERS: dict = {
+    'gzip': lambda raw: gzip.GzipFile(fileobj=raw),
+    'bz2': bz2.BZ2File,
+    'xz': lzma.LZMAFile,
+}
+
+# Inizio plausibile di un membro: magic e, dove c'è, il primo campo fisso
+_MEMBER_START = {
+    'gzip': re.compile(rb'\x1f\x8b\x08[\x00-\x1f]'),   # CM=deflate, bit riservati di FLG a zero
+    'bz2': re.compile(rb'BZh[1-9]1AY&SY'),             # header dello stream + magic del primo blocco
+    'xz': re.compile(rb'\xfd7zXZ\x00'),
+}
+
+_DECOMPRESSORS: dict = {
+    'gzip': lambda: zlib.decompressobj(wbits=31),
+    'bz2': bz2.BZ2Decompressor,
+    'xz': lambda: lzma.LZMADecompressor(format=lzma.FORMAT_XZ),
+}
+
+
+def compression_of(path) -> Optional[str]:
+    """Formato di compressione dal suffisso ('gzip', 'bz2', 'xz'), None se in chiaro"""
+    return COMPRESSED_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def open_binary(path):
+    """Apre un CSV (compresso o no) in lettura binaria"""
+    compression = compression_of(path)
+    if compression is None:
+        return open(path, 'rb')
+    return _OPENERS[compression](open(path, 'rb', buffering=FILE_BUFFER_BYTES))
+
+
+def open_text(path, encoding: str = 'utf-8'):
+    """Apre un CSV (compresso o no) come testo, con newline='' per il modulo csv"""
+    if compression_of(path) is None:
+        return open(path, 'r', encoding=encoding, newline='')
+    return io.TextIOWrapper(open_binary(path), encoding=encoding, newline='')
+
+
+def iter_decompressed(path, workers: int = 1) -> Iterator[bytes]:
+    """
+    Dati decompressi di un file, a pezzi di circa READ_BYTES
+    
+    Con workers > 1 e più membri nel file, i membri vengono decompressi in
+    parallelo (zlib, bz2 e lzma rilasciano il GIL) e restituiti in ordine.
+    """
+    compression = compression_of(path)
+    if workers > 1 and compression is not None:
+        yield from _iter_members_parallel(Path(path), compression, workers)
+    else:
+        yield from _iter_stream(path)
+
+
+def _iter_stream(path) -> Iterator[bytes]:
+    """Decompressione sequenziale in streaming"""
+    with open_binary(path) as f:
+        while True:
+            data = f.read(READ_BYTES)
+            if not data:
+                return
+            yield data
+
+
+def _inflate_members(view: memoryview, start: int, end: int,
+                     new_decompressor: Callable) -> Tuple[List[bytes], int]:
+    """
+    Decomprime i membri consecutivi che iniziano in [start, end)
+    
+    Returns:
+        (pezzi decompressi, offset dopo l'ultimo membro e il suo padding)
+    """
+    size = len(view)
+    pieces = []
+    pos = start
+    while pos < end:
+        decompressor = new_decompressor()
+        while not decompressor.eof:
+            if pos >= size:
+                raise EOFError("File compresso troncato prima della fine dello stream")
+            feed = view[pos:pos + _FEED_BYTES]
+            pieces.append(decompressor.decompress(feed))
+            pos += len(feed)
+        pos -= len(decompressor.unused_data)
+        while pos < size and view[pos] == 0:
+            pos += 1  # Padding tra gli stream (xz) o zeri finali
+    return pieces, pos
+
+
+def _task_spans(candidates: List[int], pos: int, size: int) -> List[Tuple[int, int]]:
+    """Intervalli [inizio, fine) da pos, tagliati su candidati ad almeno MEMBER_TASK_BYTES"""
+    spans = []
+    start = pos
+    for candidate in candidates:
+        if candidate - start >= MEMBER_TASK_BYTES:
+            spans.append((start, candidate))
+            start = candidate
+    spans.append((start, size))
+    return spans
+
+
+def _iter_members_parallel(path: Path, compression: str, workers: int) -> Iterator[bytes]:
+    """
+    Decompressione parallela dei membri di un file compresso
+    
+    Gli inizi dei membri vengono cercati nei byte compressi (magic del
+    formato); un falso positivo dentro un membro viene scoperto quando il
+    task precedente termina oltre l'inizio del successivo: i task in volo
+    vengono scartati e la pianificazione riparte dalla vera fine del membro.
+    """
+    new_decompressor = _DECOMPRESSORS[compression]
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # File vuoto
+        view = memoryview(buffer)
+        try:
+            size = len(view)
+            candidates = [match.start() for match in _MEMBER_START[compression].finditer(buffer)
+                          if match.start() > 0]
+            spans = _task_spans(candidates, 0, size)
+            if len(spans) < 2 or max(end - start for start, end in spans) > MEMBER_TASK_MAX_BYTES:
+                yield from _iter_stream(path)
+                return
+            pos = 0
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                while pos < size:
+                    spans = iter(_task_spans([c for c in candidates if c > pos], pos, size))
+                    in_flight = deque((span, pool.submit(_inflate_members, view, *span, new_decompressor))
+                                      for span in islice(spans, 2 * workers))
+                    while in_flight:
+                        (_, end), future = in_flight.popleft()
+                        pieces, pos = future.result()
+                        yield from pieces
+                        if pos != end:
+                            # Candidato falso: il membro continuava oltre end
+                            for _, pending in in_flight:
+                                pending.cancel()
+                            for _, pending in in_flight:
+                                if not pending.cancelled():
+                                    pending.exception()  # Attende e ignora
+                            break
+                        span = next(spans, None)
+                        if span is not None:
+                            in_flight.append((span, pool.submit(_inflate_members, view, *span,
+                                                                new_decompressor)))
+        finally:
+            view.release()
+            buffer.close()
@@ -0,0 +1,297 @@
+"""
+CSV Scanner: lettura dei CSV tramite mmap
+Il file viene tokenizzato a blocchi direttamente sui byte mappati in memoria;
+le celle restano bytes e solo le colonne richieste vengono estratte.
+I CSV compressi (.gz, .bz2, .xz) vengono letti in streaming
+"""
+
+import csv
+import io
+import mmap
+from itertools import accumulate, repeat
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .compression import compression_of, iter_decompressed, open_text
+
+
+# Dimensione indicativa di un blocco (allineato al confine di record)
+CHUNK_BYTES = 4 * 1024 * 1024
+
+
+class CSVScanner:
+    """
+    Scanner di un file CSV mappato in memoria
+    
+    - Blocchi allineati ai record: un blocco termina sempre dopo un newline
+      esterno alle virgolette (i campi quotati possono contenere newline)
+    - Percorso veloce per blocchi senza virgolette e con lo stesso numero di
+      campi per riga: split sui byte e slicing per colonna, senza loop Python
+      per cella
+    - Percorso generale (virgolette, righe irregolari): modulo csv sul blocco
+    - File compressi: i blocchi arrivano dalla decompressione in streaming
+      (membri in parallelo su `workers` thread); niente mmap, quindi niente
+      intervalli di byte (split_ranges, scan_offsets, read_records)
+    
+    Uso:
+        with CSVScanner(path) as scanner:
+            for block in scanner.scan_columns([0, 2]):
+                ...  # block[k]: celle (bytes, b'' = NULL) della colonna k richiesta
+    """
+    
+    def __init__(self, path, encoding: str = 'utf-8', workers: int = 1):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.workers = workers
+        self.compression = compression_of(path)
+        self._file = None
+        self._buffer = b''
+        self._data_start = 0
+        self.header: List[str] = []
+    
+    def __enter__(self) -> "CSVScanner":
+        self.open()
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def open(self):
+        """Mappa il file in memoria e legge l'header"""
+        if self.compression is not None:
+            with open_text(self.path, self.encoding) as f:
+                self.header = next(csv.reader(f), [])
+            return
+        self._file = open(self.path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._buffer = b''  # File vuoto: mmap non ammette lunghezza 0
+        header_end = self._record_end(0)
+        record = self._buffer[:header_end].decode(self.encoding)
+        self.header = next(csv.reader(io.StringIO(record, newline='')), [])
+        self._data_start = header_end
+    
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b''
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+    
+    def _record_end(self, pos: int, limit: Optional[int] = None) -> int:
+        """
+        Offset dopo il primo newline da `limit` (default pos) che chiude un record
+        
+        Un newline chiude il record solo se le virgolette in [pos, newline)
+        sono in numero pari (le virgolette escape "" contano due). pos deve
+        essere l'inizio di un record; le virgolette vengono contate una volta sola.
+        """
+        buffer, size = self._buffer, len(self._buffer)
+        end = limit if limit is not None else pos
+        quotes = buffer[pos:end].count(b'"')
+        while True:
+            newline = buffer.find(b'\n', end)
+            next_end = size if newline < 0 else newline + 1
+            quotes += buffer[end:next_end].count(b'"')
+            end = next_end
+            if end >= size or quotes % 2 == 0:
+                return end
+    
+    def split_ranges(self, parts: int, min_bytes: int = 1,
+                     start: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Divide i dati (header escluso, o da start, inizio di un record) in al
+        più `parts` intervalli di byte allineati ai record, ognuno di almeno
+        min_bytes (tranne l'ultimo)
+        
+        La parità delle virgolette viene seguita dall'inizio dei dati, quindi
+        un confine non cade mai dentro un campo quotato con newline.
+        """
+        self._require_mmap('split_ranges')
+        start = self._data_start if start is None else start
+        size = self.size
+        parts = max(1, min(parts, (size - start) // max(min_bytes, 1)))
+        step = (size - start) // parts
+        ranges = []
+        pos = start
+        for k in range(1, parts):
+            target = start + k * step
+            if target <= pos:
+                continue  # Record più lungo di un intervallo
+            end = self._record_end(pos, target)
+            if end >= size:
+                break
+            ranges.append((pos, end))
+            pos = end
+        if pos < size:
+            ranges.append((pos, size))
+        return ranges
+    
+    def _chunk_spans(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Intervalli [inizio, fine) dei blocchi di record (vedi chunks)"""
+        pos = self._data_start if start is None else start
+        size = self.size if end is None else end
+        while pos < size:
+            limit = pos + CHUNK_BYTES
+            stop = size if limit >= size else min(self._record_end(pos, limit), size)
+            yield pos, stop
+            pos = stop
+    
+    def chunks(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Blocchi di record completi (una copia per blocco, non per campo)
+        
+        Args:
+            start, end: Intervallo di byte allineato ai record (es. da
+                        split_ranges); default: tutti i dati
+        """
+        if self.compression is not None:
+            yield from self._stream_chunks()
+            return
+        for pos, stop in self._chunk_spans(start, end):
+            yield self._buffer[pos:stop]
+    
+    def _stream_chunks(self) -> Iterator[bytes]:
+        """Blocchi di record completi di un file compresso, header escluso"""
+        pending = b''
+        in_header = True
+        for data in iter_decompressed(self.path, self.workers):
+            pending += data
+            if in_header:
+                header_end = _first_record_end(pending)
+                if header_end is None:
+                    continue
+                pending = pending[header_end:]
+                in_header = False
+            if len(pending) >= CHUNK_BYTES:
+                cut = _last_record_end(pending)
+                if cut:
+                    yield pending[:cut]
+                    pending = pending[cut:]
+        if pending and not in_header:
+            yield pending
+    
+    def _require_mmap(self, operation: str):
+        if self.compression is not None:
+            raise ValueError(f"{operation} non disponibile su un CSV compresso ({self.path.name})")
+    
+    def scan_columns(self, indices: Sequence[int], start: Optional[int] = None,
+                     end: Optional[int] = None) -> Iterator[List[Sequence[bytes]]]:
+        """
+        Per ogni blocco, le celle delle colonne richieste (stesso ordine di indices)
+        
+        Le righe vuote vengono saltate; i campi mancanti di una riga corta
+        sono b'' (NULL).
+        """
+        width = len(self.header)
+        for chunk in self.chunks(start, end):
+            yield self._split_chunk(chunk, width, indices)
+    
+    def scan_offsets(self, index: int) -> Iterator[Tuple[List[int], Sequence[bytes]]]:
+        """
+        Per ogni blocco, offset di inizio di ogni record e celle della colonna
+        
+        Gli offset sono assoluti nel file e si possono rileggere con
+        read_records; stesse righe (vuote escluse) di scan_columns.
+        """
+        self._require_mmap('scan_offsets')
+        width = len(self.header)
+        for pos, stop in self._chunk_spans():
+            chunk = self._buffer[pos:stop]
+            cells = self._split_chunk(chunk, width, [index])[0]
+            offsets = self._line_offsets(chunk, pos) if b'"' not in chunk else None
+            if offsets is None or len(offsets) != len(cells):
+                # Virgolette: record per record, seguendo la parità
+                offsets, cells = [], []
+                record = pos
+                while record < stop:
+                    record_end = self._record_end(record)
+                    fields = self._split_chunk(self._buffer[record:record_end], width, [index])[0]
+                    if fields:
+                        offsets.append(record)
+                        cells.append(fields[0])
+                    record = record_end
+            yield offsets, cells
+    
+    @staticmethod
+    def _line_offsets(chunk: bytes, pos: int) -> List[int]:
+        """Offset delle righe non vuote di un blocco senza virgolette"""
+        lines = chunk.split(b'\n')
+        starts = accumulate(map((1).__add__, map(len, lines)), initial=pos)
+        return [start for start, line in zip(starts, lines) if line and line != b'\r']
+    
+    def read_records(self, offsets: Sequence[int], indices: Sequence[int],
+                     block_rows: int = 65536) -> Iterator[List[Sequence[bytes]]]:
+        """
+        Celle delle colonne richieste dei soli record che iniziano agli offset
+        indicati (da scan_offsets), a blocchi di block_rows record
+        """
+        self._require_mmap('read_records')
+        width = len(self.header)
+        buffer = self._buffer
+        for first in range(0, len(offsets), block_rows):
+            records = []
+            for offset in offsets[first:first + block_rows]:
+                record = buffer[offset:self._record_end(offset)]
+                records.append(record if record.endswith(b'\n') else record + b'\n')
+            yield self._split_chunk(b''.join(records), width, indices)
+    
+    def _split_chunk(self, chunk: bytes, width: int, indices: Sequence[int]) -> List[Sequence[bytes]]:
+        if b'"' not in chunk:
+            if b'\r' in chunk:
+                chunk = chunk.replace(b'\r\n', b'\n')
+            lines = chunk.split(b'\n')
+            if b'' in lines:
+                lines = [line for line in lines if line]
+            
+            # Percorso veloce: stesso numero di campi su ogni riga
+            commas = list(map(bytes.count, lines, repeat(b',')))
+            if width and commas.count(width - 1) == len(lines):
+                fields = b','.join(lines).split(b',')
+                return [fields[j::width] for j in indices]
+        
+        # Percorso generale: virgolette (anche newline nei campi) o righe irregolari
+        text = chunk.decode(self.encoding)
+        rows = [row for row in csv.reader(io.StringIO(text, newline='')) if row]
+        encoding = self.encoding
+        return [[row[j].encode(encoding) if j < len(row) else b'' for row in rows]
+                for j in indices]
+
+
+def _first_record_end(data: bytes) -> Optional[int]:
+    """Offset dopo il primo record completo di data (None se manca il newline che lo chiude)"""
+    quotes = 0
+    start = 0
+    while True:
+        newline = data.find(b'\n', start)
+        if newline < 0:
+            return None
+        quotes += data.count(b'"', start, newline)
+        if quotes % 2 == 0:
+            return newline + 1
+        start = newline + 1
+
+
+def _last_record_end(data: bytes) -> int:
+    """
+    Offset dopo l'ultimo newline di data che chiude un record (0 se nessuno)
+    
+    data deve iniziare con un record: le virgolette prima del newline sono
+    contate a ritroso, sottraendo quelle dopo dal totale.
+    """
+    quotes = data.count(b'"')
+    end = len(data)
+    while True:
+        newline = data.rfind(b'\n', 0, end)
+        if newline < 0:
+            return 0
+        quotes -= data.count(b'"', newline, end)
+        if quotes % 2 == 0:
+            return newline + 1
+        end = newline
@@ -0,0 +1,190 @@
+"""
+JIT Cache: Cache dei kernel compilati
+Evita di ricompilare con MCJIT query già viste, nello stesso processo
+(JITCache) o tra processi diversi tramite codice oggetto su disco (ObjectCache)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from .sidecar import atomic_write
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+@dataclass
+class CompiledKernel:
+    """Kernel JIT finalizzato: l'engine deve restare vivo quanto il callable"""
+    engine: Any
+    func_ptr: int
+    cfunc: Any
+
+
+def ir_fingerprint(llvm_ir: str) -> str:
+    """
+    Calcola l'impronta di un modulo LLVM IR normalizzato
+    
+    Commenti (es. ModuleID) e righe vuote non influenzano la chiave
+    """
+    lines = [line.rstrip() for line in llvm_ir.splitlines()]
+    normalized = "\n".join(line for line in lines if line and not line.startswith(';'))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class JITCache:
+    """
+    Cache LRU limitata di kernel compilati, indicizzata per impronta dell'IR
+    
+    Gli engine meno usati di recente vengono rilasciati quando la cache è piena.
+    """
+    
+    def __init__(self, maxsize: int = 64):
+        """
+        Inizializza la cache
+        
+        Args:
+            maxsize: Numero massimo di engine mantenuti in memoria
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CompiledKernel]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[CompiledKernel]:
+        """Ritorna il kernel per la chiave (aggiornando l'ordine LRU) o None"""
+        with self._lock:
+            kernel = self._entries.get(key)
+            if kernel is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return kernel
+    
+    def put(self, key: str, kernel: CompiledKernel):
+        """Inserisce un kernel, evictando il meno usato se si supera maxsize"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = kernel
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Svuota la cache e azzera i contatori"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def cache_info(self) -> CacheInfo:
+        """Statistiche della cache (stesso formato di functools.lru_cache)"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+
+class ObjectCache:
+    """
+    Cache persistente su disco del codice oggetto generato da MCJIT
+    
+    Ogni voce è un file <chiave>.o nella directory della cache. La chiave
+    combina impronta dell'IR, target triple, CPU e feature della CPU, così
+    un oggetto non viene mai caricato su una macchina incompatibile.
+    
+    - Scrittori concorrenti: ogni file viene scritto in un temporaneo e
+      pubblicato con os.replace (atomico), i lettori non vedono mai file parziali
+    - Eviction: quando la dimensione totale supera max_bytes vengono rimossi
+      i file usati meno di recente (mtime aggiornato ad ogni lettura)
+    """
+    
+    SUFFIX = ".o"
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Inizializza la cache su disco
+        
+        Args:
+            cache_dir: Directory in cui salvare il codice oggetto
+            max_bytes: Dimensione massima complessiva della cache
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+    
+    def make_key(self, ir_key: str, triple: str, cpu_name: str, cpu_features: str) -> str:
+        """Chiave della voce: IR + target triple + CPU + feature della CPU"""
+        parts = "\n".join([ir_key, triple, cpu_name, cpu_features])
+        return hashlib.sha256(parts.encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+    
+    def load(self, key: str) -> Optional[bytes]:
+        """Legge il codice oggetto per la chiave o None se assente"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        
+        # Aggiorna mtime: l'eviction rimuove prima le voci meno usate
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+    
+    def store(self, key: str, data: bytes):
+        """Salva il codice oggetto in modo atomico e applica il limite di spazio"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write(self._path(key), [data])
+        except OSError:
+            # La cache è best-effort: un errore di I/O non deve bloccare la query
+            return
+        self._evict()
+    
+    def _evict(self):
+        """Rimuove le voci meno recenti finché la cache supera max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Rimossa da un altro processo
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+    
+    def clear(self):
+        """Rimuove tutte le voci dalla cache"""
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,604 @@
+"""
+Join: accoppiamento delle righe di due tabelle colonnari
+Le uguaglianze tra una colonna di ciascun lato (es. nome = nome_2) vengono
+risolte con un hash join (build sul lato più piccolo, probe sull'altro);
+gli altri confronti tra colonne dei due lati (es. eta < eta_2) con un
+block nested-loop join o, su tabelle grandi, con un sort-merge join (lati
+ordinati per chiave, ordinamento esterno su disco se serve). In tutti i
+casi si materializzano solo le coppie che li soddisfano, non il prodotto
+cartesiano
+"""
+
+import heapq
+import operator
+import pickle
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain, compress, islice, repeat
+from typing import Callable, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from .ast_nodes import Comparison
+from .columnar import Column, ColumnarTable, NULL_TYPE
+from .pushdown import split_conjuncts
+
+
+# Righe del lato interno per blocco del nested loop
+INNER_BLOCK_ROWS = 4096
+
+# Righe del lato esterno confrontate con ogni blocco interno
+OUTER_BLOCK_ROWS = 1024
+
+# Righe interne le cui chiavi restano in memoria: oltre, i blocchi vengono
+# scritti in un file temporaneo e riletti per ogni blocco esterno
+INNER_MEMORY_ROWS = 1_000_000
+
+# Righe ordinate in memoria per run nel sort-merge join: il lato interno
+# viene unito un run alla volta; oltre, i run ordinati del lato esterno
+# vanno su un file temporaneo e vengono fusi (ordinamento esterno); è anche
+# il blocco di lettura di un lato già ordinato
+SORT_RUN_ROWS = 1_000_000
+
+# Coppie di chiavi adiacenti campionate per riconoscere un lato già ordinato
+SORT_SAMPLE = 1024
+
+# Coppia di colonne (lato sinistro, lato destro) di un'uguaglianza di join
+JoinKey = Tuple[str, str]
+
+# Confronto tra colonne dei due lati: (colonna sinistra, operatore, colonna destra)
+JoinCondition = Tuple[str, str, str]
+
+_OPERATORS = {
+    '=': operator.eq, '<>': operator.ne, '!=': operator.ne,
+    '<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+}
+
+# Operatore equivalente con gli operandi scambiati (a < b ⇔ b > a)
+_FLIPPED = {'=': '=', '<>': '<>', '!=': '!=', '<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+# Confronti risolvibili con una ricerca binaria sul lato ordinato
+MERGE_OPERATORS = frozenset({'=', '<', '<=', '>', '>='})
+
+
+def join_conditions(condition, left_names: Sequence[str],
+                    right_names: Sequence[str]) -> List[JoinCondition]:
+    """
+    Confronti in AND nel WHERE tra una colonna di ciascun lato
+    
+    Restituisce i confronti orientati (colonna sinistra, operatore, colonna
+    destra), anche se nel WHERE compaiono invertiti (es. eta_2 > eta
+    diventa eta < eta_2).
+    """
+    left, right = set(left_names), set(right_names)
+    conditions = []
+    for conjunct in split_conjuncts(condition):
+        if not isinstance(conjunct, Comparison) or conjunct.operator not in _OPERATORS:
+            continue
+        if conjunct.left in left and conjunct.right in right:
+            conditions.append((conjunct.left, conjunct.operator, conjunct.right))
+        elif conjunct.left in right and conjunct.right in left:
+            conditions.append((conjunct.right, _FLIPPED[conjunct.operator], conjunct.left))
+    return list(dict.fromkeys(conditions))
+
+
+def equi_join_keys(condition, left_names: Sequence[str], right_names: Sequence[str]) -> List[JoinKey]:
+    """
+    Uguaglianze in AND nel WHERE tra una colonna di ciascun lato
+    
+    Restituisce le coppie orientate (colonna sinistra, colonna destra),
+    anche se nel WHERE compaiono invertite (es. nome_2 = nome).
+    """
+    return [(left, right) for left, op, right in join_conditions(condition, left_names, right_names)
+            if op == '=']
+
+
+def join_keys(column: Column, other: Column, start: int = 0,
+              stop: Optional[int] = None) -> List[Optional[Hashable]]:
+    """
+    Chiave delle righe [start, stop) di column per il confronto con other
+    (None = nessun match)
+    
+    Stessa semantica della valutazione del WHERE: numeri confrontati come
+    numeri (1 = 1.0), stringhe come stringhe, tipi diversi sul testo della
+    cella; un confronto con NULL o NaN è falso.
+    """
+    stop = len(column) if stop is None else min(stop, len(column))
+    if NULL_TYPE in (column.type, other.type):
+        return [None] * (stop - start)
+    if column.type in (int, float) and other.type in (int, float):
+        keys = list(column.values[start:stop])
+        if column.type == float:
+            keys = [None if key != key else key for key in keys]
+    elif column.type == other.type:
+        dictionary = column.dictionary
+        keys = [dictionary[code >> 1] if code else None for code in column.values[start:stop]]
+    else:
+        keys = list(map(column.text, range(start, stop)))
+    if column.null_count:
+        validity = column.validity
+        for i in range(start, stop):
+            if not validity[i >> 3] >> (i & 7) & 1:
+                keys[i - start] = None
+    return keys
+
+
+def _row_keys(table: ColumnarTable, other: ColumnarTable, columns: Sequence[str],
+              other_columns: Sequence[str]) -> List[Optional[Hashable]]:
+    """Chiavi (composte se più uguaglianze) delle righe di table"""
+    per_column = [join_keys(table.column(name), other.column(other_name))
+                  for name, other_name in zip(columns, other_columns)]
+    if len(per_column) == 1:
+        return per_column[0]
+    return [None if None in key else key for key in zip(*per_column)]
+
+
+def hash_join(left: ColumnarTable, right: ColumnarTable,
+              keys: Sequence[JoinKey]) -> Tuple[array, array]:
+    """
+    Coppie di righe (sinistra, destra) con chiavi uguali, nell'ordine del
+    prodotto cartesiano (riga sinistra, poi riga destra)
+    
+    La tabella hash si costruisce sul lato con meno righe; se è il sinistro
+    le coppie del probe vengono riordinate per riga sinistra.
+    """
+    left_columns = [pair[0] for pair in keys]
+    right_columns = [pair[1] for pair in keys]
+    left_keys = _row_keys(left, right, left_columns, right_columns)
+    right_keys = _row_keys(right, left, right_columns, left_columns)
+    build_right = len(right) <= len(left)
+    build_keys, probe_keys = (right_keys, left_keys) if build_right else (left_keys, right_keys)
+    
+    table = {}
+    for row, key in enumerate(build_keys):
+        if key is not None:
+            table.setdefault(key, []).append(row)
+    
+    probe_rows, build_rows = array('q'), array('q')
+    for row, key in enumerate(probe_keys):
+        matches = table.get(key)
+        if matches:
+            probe_rows.extend(repeat(row, len(matches)))
+            build_rows.extend(matches)
+    
+    return _pair_order(probe_rows, build_rows, build_right)
+
+
+def _pair_order(outer_rows: array, inner_rows: array, inner_is_right: bool) -> Tuple[array, array]:
+    """Coppie (sinistra, destra) nell'ordine del prodotto cartesiano"""
+    if inner_is_right:
+        return outer_rows, inner_rows
+    order = sorted(range(len(inner_rows)), key=inner_rows.__getitem__)
+    return (array('q', map(inner_rows.__getitem__, order)),
+            array('q', map(outer_rows.__getitem__, order)))
+
+
+def _oriented(conditions: Sequence[JoinCondition], inner_is_right: bool) -> List[JoinCondition]:
+    """Confronti come (colonna esterna, operatore, colonna interna)"""
+    if inner_is_right:
+        return list(conditions)
+    return [(right, _FLIPPED[op], left) for left, op, right in conditions]
+
+
+def _valid_rows(keys: Sequence[List[Optional[Hashable]]], rows: int) -> Iterator[int]:
+    """Righe con tutte le chiavi non NULL (le altre non soddisfano nessun confronto)"""
+    return compress(range(rows), (None not in key for key in zip(*keys)))
+
+
+class _InnerBlocks:
+    """
+    Blocchi del lato interno: righe con tutte le chiavi non NULL e chiavi
+    per condizione, estratte dalle colonne un blocco alla volta; oltre
+    INNER_MEMORY_ROWS righe i blocchi stanno solo in un file temporaneo
+    (pickle per blocco) e vengono riletti a ogni passata, così in memoria
+    resta al più un blocco di chiavi
+    """
+    
+    def __init__(self, keys: Callable[[int, int], List[List[Optional[Hashable]]]], rows: int):
+        self.spilled = rows > INNER_MEMORY_ROWS
+        self._blocks: list = []
+        self._file = tempfile.TemporaryFile(prefix="gomorrasql-join-") if self.spilled else None
+        for start in range(0, rows, INNER_BLOCK_ROWS):
+            stop = min(start + INNER_BLOCK_ROWS, rows)
+            block_keys = keys(start, stop)
+            valid = [None not in key for key in zip(*block_keys)]
+            block = (array('q', compress(range(start, stop), valid)),
+                     [list(compress(column, valid)) for column in block_keys])
+            if self._file is not None:
+                pickle.dump(block, self._file, pickle.HIGHEST_PROTOCOL)
+            else:
+                self._blocks.append(block)
+    
+    def __enter__(self) -> "_InnerBlocks":
+        return self
+    
+    def __exit__(self, *exc):
+        if self._file is not None:
+            self._file.close()
+    
+    def __iter__(self) -> Iterator[Tuple[array, List[list]]]:
+        if self._file is None:
+            yield from self._blocks
+            return
+        self._file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self._file)
+            except EOFError:
+                return
+
+
+def nested_loop_join(left: ColumnarTable, right: ColumnarTable,
+                     conditions: Sequence[JoinCondition]) -> Tuple[array, array, bool]:
+    """
+    Block nested-loop join: coppie (sinistra, destra) che soddisfano tutti
+    i confronti, nell'ordine del prodotto cartesiano
+    
+    Il lato più piccolo è l'interno: le sue chiavi vengono estratte una
+    volta, un blocco alla volta (su disco se troppe righe); ogni blocco di
+    OUTER_BLOCK_ROWS righe esterne, con le sue chiavi, scorre i blocchi
+    interni, e per ogni riga esterna i confronti vengono valutati sul
+    blocco interno con map (loop C).
+    
+    Returns:
+        (righe sinistre, righe destre, True se i blocchi interni sono su disco)
+    """
+    inner_is_right = len(right) <= len(left)
+    outer, inner = (left, right) if inner_is_right else (right, left)
+    oriented = _oriented(conditions, inner_is_right)
+    ops = [_OPERATORS[op] for _, op, _ in oriented]
+    
+    def inner_keys(start: int, stop: int) -> List[List[Optional[Hashable]]]:
+        return [join_keys(inner.column(name), outer.column(other), start, stop)
+                for other, _, name in oriented]
+    
+    outer_rows, inner_rows = array('q'), array('q')
+    with _InnerBlocks(inner_keys, len(inner)) as blocks:
+        for first in range(0, len(outer), OUTER_BLOCK_ROWS):
+            block_keys = list(zip(*(join_keys(outer.column(name), inner.column(other),
+                                              first, first + OUTER_BLOCK_ROWS)
+                                    for name, _, other in oriented)))
+            matches: List[List[int]] = [[] for _ in block_keys]
+            for rows, keys in blocks:
+                positions = range(len(rows))
+                for row_matches, key in zip(matches, block_keys):
+                    if None in key:
+                        continue
+                    selected = compress(positions, map(ops[0], repeat(key[0]), keys[0]))
+                    for op, value, column in zip(ops[1:], key[1:], keys[1:]):
+                        selected = [p for p in selected if op(value, column[p])]
+                    row_matches.extend(map(rows.__getitem__, selected))
+            for offset, row_matches in enumerate(matches):
+                outer_rows.extend(repeat(first + offset, len(row_matches)))
+                inner_rows.extend(row_matches)
+        spilled = blocks.spilled
+    return (*_pair_order(outer_rows, inner_rows, inner_is_right), spilled)
+
+
+def presorted(keys: Sequence) -> bool:
+    """
+    True se le chiavi sono già in ordine non decrescente
+    
+    Un campione di SORT_SAMPLE coppie adiacenti scarta subito i lati non
+    ordinati; se il campione è in ordine la verifica è completa (lineare).
+    """
+    step = max(1, (len(keys) - 1) // SORT_SAMPLE)
+    if any(keys[i] > keys[i + 1] for i in range(0, len(keys) - 1, step)):
+        return False
+    return all(map(operator.le, keys, islice(keys, 1, None)))
+
+
+# Chiavi di un intervallo di righe [start, stop), una lista per confronto
+KeyBlocks = Callable[[int, int], List[List[Optional[Hashable]]]]
+
+
+def _key_records(keys: KeyBlocks, start: int, stop: int) -> List[tuple]:
+    """Record (prima chiave, riga, altre chiavi...) delle righe senza chiavi NULL"""
+    return [(key[0], row, *key[1:])
+            for row, key in enumerate(zip(*keys(start, stop)), start) if None not in key]
+
+
+def _stream_presorted(keys: KeyBlocks, rows: int) -> bool:
+    """
+    True se la prima chiave è già in ordine non decrescente, senza tenere
+    in memoria le chiavi del lato: campione di SORT_SAMPLE coppie
+    adiacenti, poi verifica completa a blocchi di SORT_RUN_ROWS righe
+    """
+    step = max(1, (rows - 1) // SORT_SAMPLE)
+    for i in range(0, rows - 1, step):
+        pair = keys(i, i + 2)[0]
+        if None not in pair and pair[0] > pair[1]:
+            return False
+    last = None
+    for start in range(0, rows, SORT_RUN_ROWS):
+        chunk = [key for key in keys(start, start + SORT_RUN_ROWS)[0] if key is not None]
+        if not chunk:
+            continue
+        if (last is not None and last > chunk[0]) or not presorted(chunk):
+            return False
+        last = chunk[-1]
+    return True
+
+
+class _SortedRecords:
+    """
+    Record di _key_records in ordine di prima chiave, riletti a ogni
+    passata del merge senza tenere in memoria tutto il lato
+    
+    Un lato già ordinato viene riletto dalle colonne a blocchi; uno non
+    ordinato di al più SORT_RUN_ROWS righe viene ordinato in memoria,
+    altrimenti con un ordinamento esterno il cui risultato resta in un file
+    temporaneo (pickle a blocchi di INNER_BLOCK_ROWS record).
+    """
+    
+    def __init__(self, keys: KeyBlocks, rows: int):
+        self._keys = keys
+        self._rows = rows
+        self._records: Optional[List[tuple]] = None
+        self._file = None
+        self.presorted = _stream_presorted(keys, rows)
+        self.spilled = not self.presorted and rows > SORT_RUN_ROWS
+        if self.spilled:
+            self._file = tempfile.TemporaryFile(prefix="gomorrasql-sort-")
+            records = _external_sort(keys, rows)
+            for block in iter(lambda: list(islice(records, INNER_BLOCK_ROWS)), []):
+                pickle.dump(block, self._file, pickle.HIGHEST_PROTOCOL)
+        elif not self.presorted:
+            self._records = sorted(_key_records(keys, 0, rows))
+    
+    def __enter__(self) -> "_SortedRecords":
+        return self
+    
+    def __exit__(self, *exc):
+        if self._file is not None:
+            self._file.close()
+    
+    def __iter__(self) -> Iterator[tuple]:
+        if self._records is not None:
+            yield from self._records
+        elif self._file is None:
+            for start in range(0, self._rows, SORT_RUN_ROWS):
+                yield from _key_records(self._keys, start, start + SORT_RUN_ROWS)
+        else:
+            self._file.seek(0)
+            while True:
+                try:
+                    yield from pickle.load(self._file)
+                except EOFError:
+                    return
+
+
+def _external_sort(keys: KeyBlocks, rows: int) -> Iterator[tuple]:
+    """
+    Ordinamento esterno: i record di SORT_RUN_ROWS righe alla volta,
+    estratti dalle colonne, vengono ordinati e scritti su un file
+    temporaneo (a blocchi di INNER_BLOCK_ROWS), poi i run vengono fusi con
+    heapq.merge rileggendo un blocco per run alla volta
+    """
+    with tempfile.TemporaryFile(prefix="gomorrasql-sort-") as spill:
+        runs = []
+        for start in range(0, rows, SORT_RUN_ROWS):
+            run = sorted(_key_records(keys, start, start + SORT_RUN_ROWS))
+            offsets = []
+            for first in range(0, len(run), INNER_BLOCK_ROWS):
+                offsets.append(spill.tell())
+                pickle.dump(run[first:first + INNER_BLOCK_ROWS], spill, pickle.HIGHEST_PROTOCOL)
+            runs.append(offsets)
+            del run
+        yield from heapq.merge(*(_read_run(spill, offsets) for offsets in runs))
+
+
+def _read_run(spill, offsets: Sequence[int]) -> Iterator[tuple]:
+    """Record di un run ordinato (i run condividono il file: seek prima di ogni blocco)"""
+    for offset in offsets:
+        spill.seek(offset)
+        yield from pickle.load(spill)
+
+
+def _merge_range(keys: Sequence, op: str, value, bound: int) -> Tuple[int, int, int]:
+    """
+    Intervallo [lo, hi) delle chiavi interne ordinate con `value op chiave`,
+    per valori esterni crescenti: il limite mobile (bound) avanza soltanto
+    
+    Returns:
+        (lo, hi, nuovo bound)
+    """
+    if op in ('=', '<=', '<'):
+        bound = (bisect_right if op == '<' else bisect_left)(keys, value, bound)
+        return bound, bisect_right(keys, value, bound) if op == '=' else len(keys), bound
+    bound = (bisect_left if op == '>' else bisect_right)(keys, value, bound)
+    return 0, bound, bound
+
+
+def _inner_range(keys: Sequence, op: str, value, lo: int, hi: int) -> Tuple[int, int]:
+    """Restringe [lo, hi) delle chiavi interne ordinate a quelle con `value op chiave`"""
+    if op == '=':
+        lo = bisect_left(keys, value, lo, hi)
+        return lo, bisect_right(keys, value, lo, hi)
+    if op == '<':
+        return bisect_right(keys, value, lo, hi), hi
+    if op == '<=':
+        return bisect_left(keys, value, lo, hi), hi
+    if op == '>':
+        return lo, bisect_left(keys, value, lo, hi)
+    return lo, bisect_right(keys, value, lo, hi)
+
+
+class _InnerRun:
+    """
+    Run del lato interno: righe [start, stop) senza chiavi NULL ordinate
+    per prima chiave (ordinamento stabile: a parità di chiave in ordine di
+    riga), con chiavi di merge e chiavi residue nello stesso ordine
+    """
+    
+    def __init__(self, keys: KeyBlocks, start: int, stop: int, merge: int):
+        block = keys(start, stop)
+        positions = list(_valid_rows(block, stop - start))
+        self.merge_keys = list(map(block[0].__getitem__, positions))
+        self.presorted = presorted(self.merge_keys)
+        if not self.presorted:
+            positions.sort(key=block[0].__getitem__)
+            self.merge_keys = list(map(block[0].__getitem__, positions))
+        self.residual_keys = [list(map(column.__getitem__, positions)) for column in block[merge:]]
+        self.rows = array('q', (start + position for position in positions))
+
+
+def _key_domain(column: Column, other: Column) -> Optional[str]:
+    """Come join_keys confronta column con other: 'number', 'string' o 'text' (None: sempre NULL)"""
+    if NULL_TYPE in (column.type, other.type):
+        return None
+    if column.type in (int, float) and other.type in (int, float):
+        return 'number'
+    return 'string' if column.type == other.type else 'text'
+
+
+def _merge_conditions(conditions: Sequence[JoinCondition], outer: ColumnarTable,
+                      inner: ColumnarTable) -> List[int]:
+    """
+    Confronti (indici) risolti con ricerche binarie sul lato interno: quelli
+    in MERGE_OPERATORS sulla colonna interna che ne ha di più, con le stesse
+    chiavi interne (stesso tipo di confronto)
+    """
+    mergeable = [i for i, (_, op, _) in enumerate(conditions) if op in MERGE_OPERATORS]
+    if not mergeable:
+        return []
+    columns = [conditions[i][2] for i in mergeable]
+    column = max(dict.fromkeys(columns), key=columns.count)
+    domains = {i: _key_domain(inner.column(conditions[i][2]), outer.column(conditions[i][0]))
+               for i in mergeable}
+    first = mergeable[columns.index(column)]
+    return [i for i in mergeable if conditions[i][2] == column and domains[i] == domains[first]]
+
+
+def sort_merge_join(left: ColumnarTable, right: ColumnarTable,
+                    conditions: Sequence[JoinCondition]) -> Tuple[array, array, Tuple[bool, bool], bool]:
+    """
+    Sort-merge join: coppie (sinistra, destra) che soddisfano tutti i
+    confronti, nell'ordine del prodotto cartesiano
+    
+    Il lato interno è quello con più confronti in MERGE_OPERATORS su una
+    sua colonna (es. inizio <= t e t < fine: entrambi su t), a parità il
+    più piccolo; viene diviso in run di SORT_RUN_ROWS righe, e solo le
+    chiavi di un run alla volta restano in memoria, ordinate per le
+    ricerche binarie. Il lato esterno scorre in ordine di chiave senza
+    essere caricato: le chiavi vengono estratte dalle colonne a blocchi, e
+    se il lato non è già ordinato oltre SORT_RUN_ROWS righe passa da un
+    ordinamento esterno su disco. Per ogni riga esterna l'intervallo di
+    righe del run che soddisfa il primo confronto ha un limite che avanza
+    soltanto (merge), gli altri confronti sulla colonna interna lo
+    restringono con ricerche binarie e i restanti vengono valutati
+    sull'intervallo.
+    
+    Se il lato esterno è il sinistro, già ordinato, e il run interno è uno
+    solo, le coppie escono già nell'ordine del prodotto; altrimenti
+    _place_pairs le scrive direttamente nella posizione finale.
+    
+    Returns:
+        (righe sinistre, righe destre, (sinistra già ordinata, destra già
+        ordinata), True se l'ordinamento esterno è passato dal disco)
+    """
+    sides = []
+    for inner_is_right in (True, False):
+        outer, inner = (left, right) if inner_is_right else (right, left)
+        oriented = _oriented(conditions, inner_is_right)
+        merge = _merge_conditions(oriented, outer, inner)
+        sides.append(((len(merge), -len(inner)), inner_is_right, oriented, merge))
+    _, inner_is_right, oriented, merge = max(sides, key=lambda side: side[0])
+    outer, inner = (left, right) if inner_is_right else (right, left)
+    
+    # Confronti sulla colonna di merge in testa, gli altri restano residui
+    oriented = [oriented[i] for i in merge] + [c for i, c in enumerate(oriented) if i not in merge]
+    merge_ops = [op for _, op, _ in oriented[:len(merge)]]
+    residual_ops = [_OPERATORS[op] for _, op, _ in oriented[len(merge):]]
+    
+    def inner_keys(start: int, stop: int) -> List[List[Optional[Hashable]]]:
+        return [join_keys(inner.column(name), outer.column(other), start, stop)
+                for other, _, name in oriented]
+    
+    def outer_keys(start: int, stop: int) -> List[List[Optional[Hashable]]]:
+        return [join_keys(outer.column(name), inner.column(other), start, stop)
+                for name, _, other in oriented]
+    
+    starts = range(0, len(inner), SORT_RUN_ROWS)
+    # Con un solo run il run resta in memoria tra le passate, altrimenti viene ricostruito
+    single = [_InnerRun(inner_keys, 0, len(inner), len(merge))] if len(starts) == 1 else None
+    inner_presorted = single[0].presorted if single else _stream_presorted(inner_keys, len(inner))
+    
+    def matches() -> Iterator[Tuple[int, List[int]]]:
+        """(riga esterna, righe interne accoppiate), run per run; righe interne crescenti se a destra"""
+        runs = single or (_InnerRun(inner_keys, start, min(start + SORT_RUN_ROWS, len(inner)), len(merge))
+                          for start in starts)
+        for run in runs:
+            bound = 0
+            for record in records:
+                lo, hi, bound = _merge_range(run.merge_keys, merge_ops[0], record[0], bound)
+                for op, value in zip(merge_ops[1:], record[2:]):
+                    if lo >= hi:
+                        break
+                    lo, hi = _inner_range(run.merge_keys, op, value, lo, hi)
+                if lo >= hi:
+                    continue
+                selected = range(lo, hi)
+                for op, value, column in zip(residual_ops, record[len(merge) + 1:], run.residual_keys):
+                    selected = [p for p in selected if op(value, column[p])]
+                if selected:
+                    matched = list(map(run.rows.__getitem__, selected))
+                    if inner_is_right and not run.presorted:
+                        matched.sort()
+                    yield record[1], matched
+    
+    with _SortedRecords(outer_keys, len(outer)) as records:
+        if inner_is_right and records.presorted and len(starts) <= 1:
+            left_rows, right_rows = array('q'), array('q')
+            for row, matched in matches():
+                left_rows.extend(repeat(row, len(matched)))
+                right_rows.extend(matched)
+        else:
+            left_rows, right_rows = _place_pairs(matches, len(left), inner_is_right,
+                                                 inner_is_right or records.presorted)
+        presorted_sides = ((records.presorted, inner_presorted) if inner_is_right
+                           else (inner_presorted, records.presorted))
+        return left_rows, right_rows, presorted_sides, records.spilled
+
+
+def _place_pairs(matches: Callable[[], Iterator[Tuple[int, List[int]]]], rows: int,
+                 inner_is_right: bool, ordered: bool) -> Tuple[array, array]:
+    """
+    Coppie (sinistra, destra) nell'ordine del prodotto cartesiano, senza
+    ordinare il risultato: una prima passata del merge conta le coppie di
+    ogni riga sinistra, la seconda scrive ogni riga destra direttamente
+    nella sua posizione finale
+    
+    Args:
+        matches: Passata del merge: (riga esterna, righe interne accoppiate)
+        rows: Righe del lato sinistro
+        ordered: True se le righe destre di ogni riga sinistra arrivano già
+                 crescenti; altrimenti ogni segmento viene ordinato a parte
+    """
+    counts = array('q', [0]) * rows
+    for row, matched in matches():
+        if inner_is_right:
+            counts[row] += len(matched)
+        else:
+            for inner_row in matched:
+                counts[inner_row] += 1
+    left_rows = array('q')
+    for row, count in enumerate(counts):
+        left_rows.extend(repeat(row, count))
+    cursor = array('q', accumulate(counts, initial=0))
+    del counts
+    
+    right_rows = array('q', [0]) * len(left_rows)
+    for row, matched in matches():
+        if inner_is_right:
+            right_rows[cursor[row]:cursor[row] + len(matched)] = array('q', matched)
+            cursor[row] += len(matched)
+        else:
+            for inner_row in matched:
+                right_rows[cursor[inner_row]] = row
+                cursor[inner_row] += 1
+    if not ordered:
+        # Dopo la scrittura cursor[r] è la fine del segmento della riga r
+        for start, stop in zip(chain((0,), cursor), cursor):
+            if stop - start > 1:
+                right_rows[start:stop] = array('q', sorted(right_rows[start:stop]))
+    return left_rows, right_rows
@@ -0,0 +1,109 @@
+"""
+Join Planner: ordine delle JOIN tra più tabelle
+Le tabelle vengono unite una alla volta (piano left-deep); l'ordine viene
+scelto minimizzando la somma delle cardinalità intermedie stimate da righe
+delle tabelle e selettività dei confronti tra colonne (programmazione
+dinamica sui sottoinsiemi, greedy oltre DP_MAX_TABLES tabelle); per ogni
+JOIN la strategia (hash, sort-merge, nested loop) dipende dai confronti e
+dalle righe dei due lati
+"""
+
+from itertools import combinations
+from typing import Dict, List, Sequence, Tuple
+
+from .join import MERGE_OPERATORS, JoinCondition
+
+
+# Tabelle oltre le quali la programmazione dinamica (2^n sottoinsiemi)
+# lascia il posto alla scelta greedy
+DP_MAX_TABLES = 10
+
+# Righe massime del lato di build di un hash join (tabella hash in memoria):
+# oltre, le uguaglianze vengono unite con il sort-merge join
+HASH_BUILD_MAX_ROWS = 2_000_000
+
+# Coppie di righe (sinistra × destra) oltre le quali i confronti di
+# disuguaglianza usano il sort-merge join invece del nested loop
+NESTED_LOOP_MAX_PAIRS = 1_000_000
+
+# Selettività di un arco del grafo di join: (tabella a, tabella b, selettività)
+JoinEdge = Tuple[int, int, float]
+
+
+def estimate_rows(tables: Sequence[int], row_counts: Sequence[int],
+                  selectivity: Dict[Tuple[int, int], float]) -> float:
+    """
+    Righe stimate della JOIN di un insieme di tabelle
+    
+    Prodotto delle righe per la selettività di ogni arco interno
+    all'insieme (predicati indipendenti).
+    """
+    rows = 1.0
+    for table in tables:
+        rows *= row_counts[table]
+    for a, b in combinations(sorted(tables), 2):
+        rows *= selectivity.get((a, b), 1.0)
+    return rows
+
+
+def choose_join_order(row_counts: Sequence[int], edges: Sequence[JoinEdge]) -> List[int]:
+    """
+    Ordine in cui unire le tabelle (indici in row_counts)
+    
+    Costo di un ordine: somma delle righe stimate di ogni risultato
+    intermedio dopo la prima JOIN; un prodotto cartesiano non ha archi e
+    costa quindi il prodotto delle righe. A parità di costo vince l'ordine
+    della query.
+    """
+    count = len(row_counts)
+    selectivity: Dict[Tuple[int, int], float] = {}
+    for a, b, sel in edges:
+        key = (min(a, b), max(a, b))
+        selectivity[key] = selectivity.get(key, 1.0) * sel
+    if count <= 2:
+        return list(range(count))
+    if count > DP_MAX_TABLES:
+        return _greedy_order(row_counts, selectivity)
+    
+    # best[insieme] = (costo, ordine), insiemi come bitmask
+    best = {1 << table: (0.0, [table]) for table in range(count)}
+    for size in range(2, count + 1):
+        for tables in combinations(range(count), size):
+            mask = sum(1 << table for table in tables)
+            rows = estimate_rows(tables, row_counts, selectivity)
+            candidates = []
+            for last in tables:
+                cost, order = best[mask & ~(1 << last)]
+                candidates.append((cost + rows, order + [last]))
+            best[mask] = min(candidates)
+    return best[(1 << count) - 1][1]
+
+
+def _greedy_order(row_counts: Sequence[int], selectivity: Dict[Tuple[int, int], float]) -> List[int]:
+    """Parte dalla tabella più piccola e aggiunge quella col risultato intermedio minore"""
+    order = [min(range(len(row_counts)), key=lambda table: (row_counts[table], table))]
+    remaining = [table for table in range(len(row_counts)) if table != order[0]]
+    while remaining:
+        following = min(remaining, key=lambda table: (
+            estimate_rows(order + [table], row_counts, selectivity), table))
+        order.append(following)
+        remaining.remove(following)
+    return order
+
+
+def choose_join_strategy(conditions: Sequence[JoinCondition], left_rows: int, right_rows: int) -> str:
+    """
+    Strategia di una JOIN: 'hash', 'sort_merge', 'nested_loop' o 'product'
+    
+    Uguaglianze → hash join, se il lato più piccolo sta in memoria; range
+    (<, <=, >, >=) su lati grandi → sort-merge join, O(n log n) invece del
+    nested loop quadratico; solo <> o lati piccoli → nested loop.
+    """
+    operators = {op for _, op, _ in conditions}
+    if not operators:
+        return 'product'
+    if '=' in operators and min(left_rows, right_rows) <= HASH_BUILD_MAX_ROWS:
+        return 'hash'
+    if operators & MERGE_OPERATORS and ('=' in operators or left_rows * right_rows > NESTED_LOOP_MAX_PAIRS):
+        return 'sort_merge'
+    return 'nested_loop'
@@ -9,11 +9,85 @@ from llvmlite import ir as llvm_ir
 from llvmlite import binding as target
 from .visitor import ASTVisitor
 from .ast_nodes import SelectQuery, Comparison, NullCheck, LogicOp
+from .jit_cache import JITCache, ObjectCache, CompiledKernel, ir_fingerprint
+from .statistics import ColumnStats, estimate_selectivity, order_conditions
+from .profiling import QueryProfile
+from .columnar import ColumnarTable, INT32_MAX, INT32_MIN
+from .compression import open_text
+from .csv_scanner import CSVScanner
+from .join import hash_join, join_conditions, nested_loop_join, sort_merge_join
+from .join_planner import choose_join_order, choose_join_strategy
+from .column_store import ColumnStore, source_fingerprint
+from .parallel_load import normalize_load_workers, load_table
+from .pushdown import predicate_column, rename_columns, split_conjuncts
+from .catalog import TableCatalog, infer_value_type, join_column_names
+from .zone_map import ZONE_BYTES, ZoneMap
+from .secondary_index import SecondaryIndex, index_path
 import csv
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import combinations
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Callable, Dict, Iterator, List, Any, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass, field
 
+# Righe valutate per ogni chiamata al kernel batch JIT
+BATCH_SIZE = 65536
+
+# Frazione massima delle righe restituite da un indice secondario perché
+# convenga rispetto allo scan completo
+INDEX_MAX_FRACTION = 0.2
+
+# Livello di ottimizzazione usato con optimize=True
+DEFAULT_OPT_LEVEL = 2
+
+
+def normalize_opt_level(optimize: Union[bool, int]) -> int:
+    """Converte il parametro optimize (bool o livello 0-3) in un livello O0-O3"""
+    if optimize is True:
+        return DEFAULT_OPT_LEVEL
+    if optimize is False or optimize is None:
+        return 0
+    if optimize not in (0, 1, 2, 3):
+        raise ValueError(f"Livello di ottimizzazione non valido: {optimize} (atteso 0-3)")
+    return int(optimize)
+
+
+def host_vector_width() -> int:
+    """
+    Numero di righe per iterazione del kernel vettoriale sulla CPU host
+    
+    16 con AVX-512, 8 con AVX/AVX2/SSE2/NEON, 1 (solo kernel scalare) se le
+    feature della CPU non sono note. GOMORRASQL_SIMD_WIDTH forza la larghezza
+    (0 o 1 disabilitano il kernel vettoriale).
+    """
+    import os
+    
+    override = os.environ.get('GOMORRASQL_SIMD_WIDTH')
+    if override is not None:
+        return normalize_vector_width(int(override))
+    
+    try:
+        features = llvm.get_host_cpu_features()
+    except RuntimeError:
+        return 1
+    if features.get('avx512f'):
+        return 16
+    if any(features.get(name) for name in ('avx2', 'avx', 'sse2', 'neon')):
+        return 8
+    return 1
+
+
+def normalize_vector_width(width: int) -> int:
+    """Valida la larghezza vettoriale: 1 (scalare) oppure 8, 16, 32, 64 righe"""
+    if width <= 1:
+        return 1
+    if width not in (8, 16, 32, 64):
+        raise ValueError(f"Larghezza vettoriale non valida: {width} (attesa 1, 8, 16, 32 o 64)")
+    return width
+
 
 @dataclass
 class CompilationResult:
@@ -30,57 +104,113 @@ class LLVMCodeGenerator(ASTVisitor):
     Genera codice LLVM IR dall'AST e lo esegue con JIT
     
     Strategia: Genera una funzione LLVM che:
-    1. Carica i dati CSV in memoria
+    1. Carica i dati CSV in una tabella colonnare tipizzata (ColumnarTable)
     2. Itera sulle righe
     3. Applica i filtri WHERE
     4. Restituisce le righe filtrate
+    
+    Il filtro WHERE è compilato in due funzioni:
+    - evaluate_row: valuta la condizione su una singola riga (parametri scalari)
+    - evaluate_batch: kernel che itera nativamente sui buffer colonnari e
+      scrive gli indici delle righe selezionate (selection vector)
+    
+    Con vector_width > 1 viene generata anche evaluate_vector, che valuta
+    vector_width righe alla volta con IR vettoriale (<W x i32>, maschere
+    <W x i1>); il kernel batch la usa per il corpo del loop e ricade su
+    evaluate_row per le righe residue.
     """
     
-    def __init__(self, data_dir: str = "data", optimize: bool = True):
+    def __init__(self, data_dir: str = "data", optimize: Union[bool, int] = True,
+                 jit_cache: Optional[JITCache] = None,
+                 object_cache: Optional[ObjectCache] = None,
+                 vector_width: Optional[int] = None,
+                 column_cache: bool = False,
+                 load_workers: Optional[int] = None,
+                 catalog: Optional[TableCatalog] = None,
+                 zone_map_cache: bool = False):
         """
         Inizializza il code generator
         
         Args:
             data_dir: Directory contenente i file CSV
-            optimize: Se True, applica ottimizzazioni LLVM IR (default: True)
+            optimize: Livello di ottimizzazione LLVM 0-3, oppure bool
+                      (True = O2, False = O0; default: True)
+            jit_cache: Cache dei kernel compilati (opzionale, condivisa tra query)
+            object_cache: Cache su disco del codice oggetto (opzionale, tra processi)
+            vector_width: Righe per iterazione del kernel vettoriale
+                          (default: in base alla CPU host, 1 = solo scalare)
+            column_cache: Usa la cache colonnare <tabella>.csv.gcol accanto
+                          ai CSV (ricostruita quando il CSV cambia)
+            load_workers: Processi per il parsing dei CSV grandi
+                          (default: numero di CPU, 1 = seriale)
+            catalog: Catalogo di header, tipi e righe delle tabelle
+                     (default: uno nuovo)
+            zone_map_cache: Salva/riusa le zone map in <tabella>.csv.gzone
+                            accanto ai CSV (aggiornate quando il CSV cresce)
         """
         self.data_dir = Path(data_dir)
         self.module = ir.Module(name="gomorrasql_query")
         self.builder = None
-        self.optimize = optimize
+        self.opt_level = normalize_opt_level(optimize)
+        self.optimize = self.opt_level > 0
+        self.optimization_stats: Dict[str, Any] = {}
+        self.jit_cache = jit_cache
+        self.object_cache = object_cache
+        self.vector_width = (host_vector_width() if vector_width is None
+                             else normalize_vector_width(vector_width))
+        self.column_cache = column_cache
+        self.zone_map_cache = zone_map_cache
+        self.load_workers = normalize_load_workers(load_workers)
+        self.catalog = catalog if catalog is not None else TableCatalog()
+        self._lanes: Optional[int] = None  # Larghezza durante la generazione vettoriale
+        self.profile = QueryProfile()  # Sostituito dal compilatore ad ogni query
                 
-        self.data: List[Dict[str, Any]] = []
+        self.data = ColumnarTable()
         self.columns: List[str] = []
         self.column_types: Dict[str, type] = {} 
+        self.string_dictionaries: Dict[str, List[str]] = {}
+        self.string_codes: Dict[str, Dict[str, int]] = {}
+        self.column_stats: Dict[str, ColumnStats] = {}
+        self.query_function = None
+        self.jit_func = None
+        self._condition_order: Dict[int, list] = {}
     
     def get_ir(self, ast: SelectQuery) -> CompilationResult:
         """
         Genera LLVM IR puro senza side-effects (no esecuzione, no print)
         
+        Con optimize attivo l'IR restituito è quello prodotto dalla pipeline
+        di ottimizzazione, e metadata['optimization'] riporta tempi e numero
+        di istruzioni prima/dopo.
+        
         Args:
             ast: AST della query
             
         Returns:
             CompilationResult con IR e metadati
         """
-        self.module = ir.Module(name="gomorrasql_query")
-        self.module.triple = target.get_default_triple()
-        
-        # Carica dati CSV (necessario per type inference)
-        self._load_csv_data(ast.tables)
+        self._build_module(ast)
         
-        # Genera funzione LLVM parametrica
-        func = self._generate_query_function(ast)
+        llvm_ir = str(self.module)
+        if self.optimize:
+            llvm_ir = str(self._optimize_llvm_ir())
         
         # Ritorna risultato strutturato
         return CompilationResult(
-            llvm_ir=str(self.module),
+            llvm_ir=llvm_ir,
             optimized=self.optimize,
             metadata={
                 'columns': self.columns,
                 'column_types': {k: v.__name__ for k, v in self.column_types.items()},
                 'tables': ast.tables,
-                'has_where': ast.where is not None
+                'has_where': ast.where is not None,
+                'estimated_selectivity': (
+                    estimate_selectivity(ast.where, self.column_stats, self.columns)
+                    if ast.where is not None else 1.0
+                ),
+                'optimization': dict(self.optimization_stats),
+                'vector_width': self.vector_width,
+                'profile': self.profile.to_dict(),
             }
         )
     
@@ -94,152 +224,507 @@ class LLVMCodeGenerator(ASTVisitor):
         Returns:
             Risultati della query
         """
+        self._prepare_execution(ast)
+        
+        # Esegui query usando JIT LLVM (o fallback Python)
+        results = self._execute_query(ast, engine=None)
+        
+        return results
+    
+    def generate_and_stream(self, ast: SelectQuery) -> Iterator[Dict[str, Any]]:
+        """
+        Come generate_and_execute, ma restituisce le righe man mano
+        
+        Caricamento e compilazione avvengono subito; filtro e proiezione
+        procedono un batch alla volta mentre il generatore viene consumato,
+        quindi in memoria c'è al più un batch di risultati. Il generatore va
+        consumato prima di eseguire un'altra query con lo stesso code generator.
+        
+        Args:
+            ast: AST della query
+        
+        Returns:
+            Generatore delle righe risultato
+        """
+        self._prepare_execution(ast)
+        return self._iter_query(ast)
+    
+    def _prepare_execution(self, ast: SelectQuery):
+        """Carica i dati, genera l'IR e compila il kernel batch (se possibile)"""
         import os
         
-        # Genera IR (senza side-effects)
-        compilation = self.get_ir(ast)
+        # Genera IR (l'ottimizzazione avviene solo se il kernel va compilato)
+        self._build_module(ast, pushdown=True)
         
         enable_jit = os.environ.get('GOMORRASQL_ENABLE_JIT', '0') == '1'
         
-        if enable_jit:
-            func = self._generate_query_function(ast)
-            self.jit_func = self._compile_llvm_to_jit(func)
+        # Il kernel batch esiste solo per query con WHERE compilabile
+        if enable_jit and ast.where is not None and self._can_jit(ast.where):
+            self.jit_func = self._compile_llvm_to_jit(self.query_function)
         else:
             self.jit_func = None
+            self.profile.info['jit'] = 'disabled' if ast.where is not None else 'no_where'
+    
+    def _build_module(self, ast: SelectQuery, pushdown: bool = False):
+        """
+        Crea un nuovo modulo, carica i dati e genera le funzioni del WHERE
         
-        # Esegui query usando JIT LLVM (o fallback Python)
-        results = self._execute_query(ast, engine=None)
+        Con pushdown i predicati su una colonna vengono applicati già durante
+        il caricamento (solo in esecuzione: get_ir descrive la query sull'intera
+        tabella, con dizionari e statistiche indipendenti dal filtro).
+        """
+        self.module = ir.Module(name="gomorrasql_query")
+        self.module.triple = target.get_default_triple()
+        self.optimization_stats = {}
+        self._condition_order = {}
         
-        return results
+        # Carica dati CSV (necessario per type inference)
+        self._load_csv_data(ast.tables, ast, pushdown)
+        
+        # Genera funzione LLVM parametrica
+        with self.profile.phase('ir_gen'):
+            self.query_function = self._generate_query_function(ast)
     
     def _csv_generator(self, csv_path: Path):
         """
         Generatore lazy per CSV - carica righe on-demand senza list()
         Scalabile per file di centinaia di MB
         """
-        with open(csv_path, 'r') as f:
+        with open_text(csv_path) as f:
             reader = csv.DictReader(f)
             for row in reader:
                 yield row
     
     def _get_csv_columns(self, csv_path: Path) -> List[str]:
-        """Legge solo l'header CSV senza caricare i dati"""
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            return list(reader.fieldnames)
+        """Legge solo l'header CSV senza caricare i dati (dal catalogo)"""
+        return list(self.catalog.header(csv_path))
     
     def _infer_column_type(self, value: str) -> type:
         """Inferisce il tipo di un valore CSV (sempre string) analizzandolo"""
-        if value == '':
-            return type(None)  # NULL
+        return infer_value_type(value)
+    
+    def _analyze_csv_types(self, csv_path: Path) -> Dict[str, type]:
+        """
+        Tipi delle colonne inferiti da un campione del CSV
         
-        # Prova conversione a numero
-        try:
-            if '.' in value:
-                float(value)
-                return float
-            else:
-                int(value)
-                return int
-        except ValueError:
-            return str  # È una stringa
-    
-    def _analyze_csv_types(self, csv_path: Path, sample_size: int = 100):
-        """Analizza un campione del CSV per inferire i tipi delle colonne"""
-        type_samples = {}  # {column: [type1, type2, ...]}
-        
-        # Campiona le prime righe
-        for i, row in enumerate(self._csv_generator(csv_path)):
-            if i >= sample_size:
-                break
-            
-            for col, val in row.items():
-                type_samples.setdefault(col, []).append(self._infer_column_type(val))
-        
-        # Determina tipo predominante per ogni colonna
-        for col, types in type_samples.items():
-            # Rimuovi None e conta i tipi
-            non_null_types = [t for t in types if t != type(None)]
-            if not non_null_types:
-                self.column_types[col] = type(None)  # Colonna tutta NULL
-            # Se c'è float, prevale su int
-            elif float in non_null_types:
-                self.column_types[col] = float
-            elif int in non_null_types:
-                self.column_types[col] = int
-            else:
-                self.column_types[col] = str
-    
-    def _cartesian_product_generator(self, csv_path1: Path, csv_path2: Path, 
-                                      cols1: List[str], cols2: List[str]):
-        """
-        Generatore lazy per prodotto cartesiano di JOIN
-        Gestisce disambiguazione colonne duplicate
-        """
-        # Leggi prima tabella (necessaria per riutilizzo in loop)
-        data1 = list(self._csv_generator(csv_path1))
-        
-        for row1 in data1:
-            # Ricrea generatore per seconda tabella ad ogni iterazione
-            # per evitare esaurimento del generatore
-            for row2 in self._csv_generator(csv_path2):
-                merged_row = {}
-                # Aggiungi colonne prima tabella
-                for col in cols1:
-                    merged_row[col] = row1[col]
-                # Aggiungi colonne seconda tabella (con gestione duplicati)
-                for col in cols2:
-                    if col in cols1:
-                        merged_row[f"{col}_2"] = row2[col]
-                    else:
-                        merged_row[col] = row2[col]
-                yield merged_row
-    
-    def _load_csv_data(self, tables: List[str]):
-        """
-        Carica dati CSV usando generatori per scalabilità
-        Implementa prodotto cartesiano lazy per JOIN su file grandi
+        Il campione viene letto solo la prima volta (o quando il file cambia):
+        le query successive prendono i tipi dal catalogo.
+        
+        Returns:
+            Tipi inferiti per le colonne di questo file
+        """
+        if self.catalog.has_types(csv_path):
+            return self.catalog.type_hints(csv_path)
+        with self.profile.phase('type_inference') as timing:
+            types_found = self.catalog.type_hints(csv_path)
+            timing.add_rows(self.catalog.table(csv_path).sample_rows)
+        return types_found
+    
+    def _read_table(self, csv_path: Path, type_hints: Dict[str, type],
+                    names: Optional[Dict[str, str]] = None,
+                    predicates: Sequence[Any] = (), skip: Any = None) -> ColumnarTable:
+        """
+        Legge un CSV in una tabella colonnare tipizzata tramite CSVScanner (mmap)
+        
+        I tipi del campione sono solo un punto di partenza: se una riga
+        successiva non è rappresentabile la colonna viene promossa
+        (int → float → str). I file grandi vengono divisi in intervalli
+        allineati ai record e caricati su self.load_workers processi; i CSV
+        compressi vengono decompressi in streaming (membri su più thread).
+        
+        Args:
+            names: Colonne da caricare {nome nel CSV: nome nella tabella};
+                   le altre non vengono né estratte né decodificate
+                   (default: tutte, con il nome del CSV)
+            predicates: Predicati su una colonna caricata, valutati durante
+                        il parsing: le righe scartate non vengono materializzate
+            skip: Condizione sui nomi del CSV (es. il WHERE): se un indice
+                  secondario serve uno dei suoi congiunti vengono letti solo
+                  i record candidati; altrimenti le zone in cui per la zone
+                  map non può essere vera non vengono lette, e delle sue
+                  colonne numeriche si registrano i min/max per zona
+        """
+        with CSVScanner(csv_path, workers=self.load_workers) as scanner:
+            if names is None:
+                names = {col: col for col in scanner.header}
+            if scanner.compression is not None:
+                # Lettura in streaming: niente offset per indici e zone
+                return load_table(scanner, names, type_hints, predicates=predicates)
+            offsets = self._index_lookup(csv_path, skip) if skip is not None else None
+            if offsets is not None:
+                return load_table(scanner, names, type_hints, predicates=predicates,
+                                  offsets=offsets)
+            zone_map = self._zone_map(csv_path, scanner)
+            zones = zone_map.select(skip)
+            if len(zones) < len(zone_map):
+                self.profile.info.setdefault('zone_map', {})[csv_path.name] = {
+                    'zones': len(zone_map), 'skipped': len(zone_map) - len(zones),
+                }
+            summarize = self._extract_columns_from_condition(skip) if skip is not None else []
+            table = load_table(scanner, names, type_hints, self.load_workers,
+                               predicates=predicates, zone_map=zone_map, zones=zones,
+                               summarize=summarize)
+            zone_map.save()
+            return table
+    
+    def _index_lookup(self, csv_path: Path, condition) -> Optional[List[int]]:
+        """
+        Offset dei record candidati dall'indice secondario più selettivo sui
+        congiunti del WHERE; None se nessun indice conviene (scan completo)
+        
+        Un indice costruito su una versione precedente del CSV viene
+        ricostruito (best-effort). Un indice che restituisce più di
+        INDEX_MAX_FRACTION delle righe viene ignorato: lo scan sequenziale
+        costa meno delle letture sparse.
+        """
+        by_column: Dict[str, list] = {}
+        for conjunct in split_conjuncts(condition):
+            column = predicate_column(conjunct, self.columns)
+            if isinstance(conjunct, Comparison) and column is not None:
+                by_column.setdefault(column, []).append(conjunct)
+        
+        best = None
+        for column, conjuncts in by_column.items():
+            if not index_path(csv_path, column).exists():
+                continue
+            with SecondaryIndex(csv_path, column) as index:
+                if not index.open():
+                    continue
+                status = 'used'
+                if index.stale:
+                    try:
+                        SecondaryIndex.build(csv_path, column, index.kind)
+                    except (OSError, ValueError):
+                        continue
+                    if not index.open() or index.stale:
+                        continue
+                    status = 'rebuilt'
+                offsets = index.lookup(conjuncts)
+                if offsets is None or len(offsets) > INDEX_MAX_FRACTION * index.rows:
+                    continue
+                if best is None or len(offsets) < len(best[0]):
+                    best = (offsets, {'column': column, 'kind': index.kind,
+                                      'rows': len(offsets), 'status': status})
+        if best is None:
+            return None
+        self.profile.info.setdefault('index', {})[csv_path.name] = best[1]
+        return best[0]
+    
+    def _zone_map(self, csv_path: Path, scanner: CSVScanner) -> ZoneMap:
+        """
+        Zone map della tabella dal catalogo, altrimenti calcolata alla prima
+        lettura; con zone_map_cache viene letta dal file .gzone (aggiornato
+        alle righe aggiunte in coda) e salvata dopo la lettura
+        """
+        info = self.catalog.table(csv_path)
+        if info.zone_map is None:
+            def split(start: Optional[int]) -> List[Tuple[int, int]]:
+                return scanner.split_ranges(
+                    (scanner.size - (start or 0)) // ZONE_BYTES + 1, ZONE_BYTES, start)
+            info.zone_map = ZoneMap.open(csv_path, split) if self.zone_map_cache else ZoneMap(split(None))
+        return info.zone_map
+    
+    def _pushdown_predicates(self, ast: Optional[SelectQuery], columns: List[str]) -> list:
+        """
+        Condizioni in AND del WHERE valutabili dallo scanner su una colonna
+        di `columns` (confronto con letterale, NULL check, AND/OR sulla
+        stessa colonna)
+        
+        Il WHERE completo resta comunque al kernel: i predicati spinti nello
+        scanner scartano in anticipo le righe, non cambiano il risultato.
+        """
+        if ast is None:
+            return []
+        return [condition for condition in split_conjuncts(ast.where)
+                if predicate_column(condition, self.columns) in columns]
+    
+    def _needed_columns(self, ast: Optional[SelectQuery]) -> Optional[set]:
+        """Colonne lette dalla query (proiezione + WHERE); None = tutte"""
+        if ast is None or ast.columns == "*":
+            return None
+        needed = set(ast.columns)
+        if ast.where is not None:
+            needed.update(self._extract_columns_from_condition(ast.where))
+        return needed
+    
+    def _inspect_table(self, csv_path: Path) -> Tuple[List[str], Dict[str, type], Optional[ColumnStore]]:
         """
+        Header e tipi del campione di un CSV
+        
+        Con la cache colonnare aggiornata vengono letti dal manifest del
+        .gcol, senza type inference sul CSV.
+        
+        Returns:
+            (header, tipi, cache colonnare o None se disabilitata)
+        """
+        store = ColumnStore(csv_path) if self.column_cache else None
+        if store is not None and store.open():
+            return store.header, store.type_hints, store
+        return self._get_csv_columns(csv_path), self._analyze_csv_types(csv_path), store
+    
+    def _load_table(self, csv_path: Path, header: List[str], type_hints: Dict[str, type],
+                    names: Dict[str, str], store: Optional[ColumnStore],
+                    predicates: Sequence[Any] = (), skip: Any = None) -> ColumnarTable:
+        """
+        Carica le colonne indicate dalla cache colonnare o dal CSV
+        
+        Se la cache è abilitata ma non aggiornata viene letto l'intero CSV
+        (tutte le colonne, tutte le righe) e riscritto il .gcol. Predicati e
+        salto delle zone si applicano solo quando si legge il CSV senza cache.
+        """
+        if store is None:
+            return self._read_table(csv_path, type_hints, names, predicates, skip)
+        status = self.profile.info.setdefault('column_cache', {})
+        if store.is_fresh:
+            status[csv_path.name] = 'hit'
+            return store.read(names)
+        
+        fingerprint = source_fingerprint(csv_path)
+        table = self._read_table(csv_path, type_hints)
+        store.write(header, type_hints, table, fingerprint)
+        status[csv_path.name] = 'rebuilt'
+        return ColumnarTable([table.column(col).renamed(names[col])
+                              for col in header if col in names])
+    
+    def _load_csv_data(self, tables: List[str], ast: Optional[SelectQuery] = None,
+                       pushdown: bool = False):
+        """
+        Carica le tabelle CSV in formato colonnare (array tipizzati)
+        Per le JOIN (due o più tabelle) costruisce il prodotto cartesiano
+        colonna per colonna; con pushdown i confronti tra colonne di tabelle
+        diverse nel WHERE (es. nome = nome_2) diventano hash o nested-loop
+        join, in un ordine scelto dal join planner, e il WHERE completo
+        filtra poi le sole righe accoppiate
+        
+        Con l'AST della query vengono caricate solo le colonne usate da
+        proiezione e WHERE; self.columns e self.column_types descrivono
+        comunque tutte le colonne delle tabelle. Con pushdown le righe che
+        non soddisfano i predicati su una colonna non vengono caricate: nelle
+        JOIN ogni tabella viene filtrata dai propri predicati prima di essere
+        unita alle altre.
+        """
+        self.column_types = {}
         if len(tables) == 1:
-            # SELECT semplice: usa generatore
             csv_path = self.data_dir / tables[0]
             
-            # Analizza tipi colonne
-            self._analyze_csv_types(csv_path)
+            # Header e tipi colonne (dal .gcol se aggiornato)
+            self.columns, type_hints, store = self._inspect_table(csv_path)
+            self.column_types = dict(type_hints)
+            needed = self._needed_columns(ast)
+            
+            predicates = self._pushdown_predicates(ast, self.columns) if pushdown else []
+            skip = ast.where if pushdown else None
             
-            self.columns = self._get_csv_columns(csv_path)
-            self.data = list(self._csv_generator(csv_path))
+            with self.profile.phase('csv_load') as timing:
+                self.data = self._load_table(csv_path, self.columns, type_hints, {
+                    col: col for col in self.columns if needed is None or col in needed
+                }, store, predicates, skip)
+                timing.add_rows(len(self.data))
+            if not predicates and skip is None:
+                self.catalog.record_row_count(csv_path, len(self.data))
         else:
-            csv_path1 = self.data_dir / tables[0]
-            csv_path2 = self.data_dir / tables[1]
-            
-            # Analizza tipi entrambe le tabelle
-            self._analyze_csv_types(csv_path1)
-            self._analyze_csv_types(csv_path2)
-            
-            cols1 = self._get_csv_columns(csv_path1)
-            cols2 = self._get_csv_columns(csv_path2)
-            
-            # Costruisci lista colonne con disambiguazione
-            self.columns = cols1.copy()
-            for col in cols2:
-                if col in self.columns:
-                    new_col = f"{col}_2"
-                    self.columns.append(new_col)
-                    # Copia tipo per colonna disambiguata
-                    if col in self.column_types:
-                        self.column_types[new_col] = self.column_types[col]
-                else:
-                    self.columns.append(col)
+            paths = [self.data_dir / table for table in tables]
+            
+            # Header e tipi di tutte le tabelle; colonne già presenti in una
+            # tabella precedente: suffisso con la posizione (nome_2, nome_3, ...)
+            inspected = [self._inspect_table(csv_path) for csv_path in paths]
+            names = join_column_names([header for header, _, _ in inspected])
+            self.columns = [name for mapping in names for name in mapping.values()]
+            for mapping, (_, hints, _) in zip(names, inspected):
+                self.column_types.update({mapping[col]: typ for col, typ in hints.items()})
+            needed = self._needed_columns(ast)
             
-            self.data = list(self._cartesian_product_generator(csv_path1, csv_path2, cols1, cols2))
+            loaded = []
+            with self.profile.phase('csv_load') as timing:
+                for csv_path, mapping, (header, hints, store) in zip(paths, names, inspected):
+                    load = {col: name for col, name in mapping.items() if needed is None or name in needed}
+                    if not load and header:
+                        # Almeno una colonna: il numero di righe serve alla JOIN
+                        load = {header[0]: mapping[header[0]]}
+                    # Congiunti del WHERE su una sola colonna di questa tabella:
+                    # filtrano la tabella prima della JOIN
+                    predicates = (self._pushdown_predicates(ast, list(mapping.values()))
+                                  if pushdown else [])
+                    skip = self._table_condition(predicates, mapping)
+                    table = self._load_table(csv_path, header, hints, load, store, predicates, skip)
+                    if not predicates:
+                        self.catalog.record_row_count(csv_path, len(table))
+                    loaded.append(table)
+                timing.add_rows(sum(map(len, loaded)))
+            
+            where = ast.where if pushdown and ast is not None else None
+            with self.profile.phase('join') as timing:
+                self.data = self._join_tables(tables, loaded, where)
+                timing.add_rows(len(self.data))
+        
+        # Lo schema della tabella caricata è autoritativo (include le promozioni)
+        self.column_types.update(self.data.schema)
+        
+        with self.profile.phase('column_stats') as timing:
+            self._compute_column_stats()
+            self._encode_string_columns()
+            timing.add_rows(len(self.data))
+    
+    @staticmethod
+    def _table_condition(predicates: Sequence[Any], mapping: Dict[str, str]) -> Any:
+        """AND dei predicati di una tabella della JOIN, con i nomi del CSV (per indici e zone map)"""
+        if not predicates:
+            return None
+        csv_names = {name: col for col, name in mapping.items()}
+        renamed = [rename_columns(condition, csv_names) for condition in predicates]
+        return renamed[0] if len(renamed) == 1 else LogicOp('AND', renamed)
+    
+    def _join_tables(self, tables: List[str], loaded: List[ColumnarTable], where) -> ColumnarTable:
+        """
+        JOIN delle tabelle caricate (colonne già con i nomi del risultato)
+        
+        L'ordine viene scelto da choose_join_order su righe delle tabelle e
+        selettività dei confronti tra colonne (in AND nel WHERE). Ogni passo
+        unisce il risultato intermedio con una tabella con la strategia di
+        choose_join_strategy: hash join (uguaglianze), sort-merge join
+        (lati grandi, confronti di range), block nested-loop join (altri
+        confronti) o prodotto cartesiano (nessun confronto). I risultati intermedi sono solo indici di riga
+        per tabella: le colonne vengono materializzate una volta, nell'ordine
+        del prodotto cartesiano delle tabelle della query. Il WHERE completo
+        viene comunque valutato dal kernel sulle righe accoppiate.
+        """
+        order = choose_join_order([len(table) for table in loaded], self._join_edges(loaded, where))
+        rows = {order[0]: array('q', range(len(loaded[order[0]])))}
+        owner = {name: order[0] for name in loaded[order[0]].names}
+        count = len(loaded[order[0]])
+        steps = []
+        for position in order[1:]:
+            right = loaded[position]
+            conditions = join_conditions(where, list(owner), right.names)
+            left = ColumnarTable([loaded[owner[name]].column(name).take(rows[owner[name]])
+                                  for name in dict.fromkeys(name for name, _, _ in conditions)])
+            sides = ('+'.join(tables[table] for table in rows), tables[position])
+            smaller = sides[1] if len(right) <= count else sides[0]
+            strategy = choose_join_strategy(conditions, count, len(right))
+            if strategy == 'hash':
+                conditions = [condition for condition in conditions if condition[1] == '=']
+                left_rows, right_rows = hash_join(left, right, [(l, r) for l, _, r in conditions])
+                step = {'strategy': 'hash', 'build': smaller}
+            elif strategy == 'sort_merge':
+                left_rows, right_rows, presorted, spilled = sort_merge_join(left, right, conditions)
+                step = {'strategy': 'sort_merge',
+                        'presorted': [side for side, flag in zip(sides, presorted) if flag],
+                        'spilled': spilled}
+            elif strategy == 'nested_loop':
+                left_rows, right_rows, spilled = nested_loop_join(left, right, conditions)
+                step = {'strategy': 'nested_loop', 'inner': smaller, 'spilled': spilled}
+            else:
+                left_rows = array('q', (row for row in range(count) for _ in range(len(right))))
+                right_rows = array('q', range(len(right))) * count
+                step = {'strategy': 'product'}
+            
+            rows = {table: array('q', map(table_rows.__getitem__, left_rows))
+                    for table, table_rows in rows.items()}
+            rows[position] = right_rows
+            owner.update({name: position for name in right.names})
+            count = len(right_rows)
+            steps.append({'table': tables[position], **step,
+                          'conditions': [' '.join(condition) for condition in conditions],
+                          'rows': count})
+        
+        if order != sorted(order):
+            # Stesso ordine di righe del prodotto cartesiano nell'ordine della query
+            keys = list(zip(*(rows[table] for table in range(len(loaded)))))
+            positions = sorted(range(count), key=keys.__getitem__)
+            rows = {table: array('q', map(table_rows.__getitem__, positions))
+                    for table, table_rows in rows.items()}
+        
+        if any(step['strategy'] != 'product' for step in steps):
+            self.profile.info['join'] = {
+                'order': [tables[table] for table in order], 'steps': steps, 'rows': count,
+            }
+        return ColumnarTable([column.take(rows[table])
+                              for table in range(len(loaded)) for column in loaded[table].columns])
+    
+    def _join_edges(self, loaded: List[ColumnarTable], where) -> List[Tuple[int, int, float]]:
+        """
+        Archi del grafo di join: coppie di tabelle con confronti tra le loro
+        colonne e selettività stimata (statistics.estimate_selectivity)
+        """
+        columns = [name for table in loaded for name in table.names]
+        edges = []
+        for a, b in combinations(range(len(loaded)), 2):
+            conditions = join_conditions(where, loaded[a].names, loaded[b].names)
+            if not conditions:
+                continue
+            stats = {}
+            for table in (loaded[a], loaded[b]):
+                for name in {name for condition in conditions for name in (condition[0], condition[2])}:
+                    if name in table:
+                        column = table.column(name)
+                        distinct = (len(column.dictionary) if column.dictionary is not None
+                                    else len(set(column.valid_values())))
+                        stats[name] = ColumnStats(len(column), column.null_count, distinct)
+            selectivity = 1.0
+            for left, op, right in conditions:
+                selectivity *= estimate_selectivity(Comparison(left, op, right), stats, columns)
+            edges.append((a, b, selectivity))
+        return edges
+    
+    def _compute_column_stats(self):
+        """Calcola NULL, valori distinti e min/max (colonne numeriche) di ogni colonna"""
+        self.column_stats = {}
+        for column in self.data.columns:
+            stats = ColumnStats(
+                row_count=len(column),
+                null_count=column.null_count,
+            )
+            if column.dictionary is not None:
+                stats.distinct_count = len(column.dictionary)
+            elif column.type in (int, float):
+                values = column.valid_values()
+                stats.distinct_count = len(set(values))
+                if values:
+                    stats.min_value, stats.max_value = min(values), max(values)
+            self.column_stats[column.name] = stats
+    
+    def _encode_string_columns(self):
+        """
+        Espone i dizionari delle colonne stringa caricate
+        
+        Il dizionario è ordinato e i codici preservano l'ordine: il valore
+        in posizione k ha codice 2k+1, mentre un letterale assente ha codice
+        2p (p = punto di inserimento). Così =, <>, <, >, <=, >= tra stringhe
+        diventano confronti tra interi nel kernel JIT. I NULL (celle vuote)
+        non entrano nel dizionario: sono rappresentati dalla validity bitmap.
+        Le colonne stringa sono già memorizzate come codici; qui si calcolano
+        le frequenze dei valori per le statistiche della colonna.
+        """
+        self.string_dictionaries = {}
+        self.string_codes = {}
+        for column in self.data.columns:
+            if column.dictionary is None:
+                continue
+            dictionary = column.dictionary
+            counts = Counter(column.values)
+            counts.pop(0, None)
+            self.string_dictionaries[column.name] = dictionary
+            self.string_codes[column.name] = {value: 2 * k + 1 for k, value in enumerate(dictionary)}
+            self.column_stats[column.name].dictionary = dictionary
+            self.column_stats[column.name].frequencies = {
+                dictionary[code >> 1]: count for code, count in counts.items()
+            }
+    
+    def _string_literal_code(self, column: str, literal: str) -> int:
+        """Risolve un letterale stringa nel codice del dizionario della colonna"""
+        dictionary = self.string_dictionaries[column]
+        pos = bisect_left(dictionary, literal)
+        if pos < len(dictionary) and dictionary[pos] == literal:
+            return 2 * pos + 1
+        return 2 * pos
     
     def _generate_query_function(self, ast: SelectQuery):
         """
         Genera UNA singola funzione LLVM parametrica per valutare WHERE
         
-        Firma: i1 @evaluate_row(i32 %col1, double %col2, ...)
-        Riceve i valori delle colonne come parametri
+        Firma: i1 @evaluate_row(i32 %col1, double %col2, ..., i1 %valid1, ...)
+        Riceve i valori delle colonne come parametri, seguiti da un flag di
+        validità (0 = NULL) per ogni colonna che contiene NULL
         Ritorna: 1 se la riga passa il filtro WHERE, 0 altrimenti
         """
         # Imposta triple nativo prima di generare il codice
@@ -265,9 +750,28 @@ class LLVMCodeGenerator(ASTVisitor):
                 elif col_type == float:
                     param_types.append(ir.DoubleType())
                 else:
-                    param_types.append(ir.IntType(32))  # String → int placeholder
+                    param_types.append(ir.IntType(32))  # String → codice dizionario
                 self.param_map[col] = idx
             
+            # Colonne stringa confrontate con un'altra colonna stringa: valori
+            # ricodificati nel dizionario della colonna sinistra
+            self.recoded_param_map = {}  # {(column_name, domain_column): param_index}
+            for col, domain in self._recoded_operands(ast.where):
+                self.recoded_param_map[(col, domain)] = len(param_types)
+                param_types.append(ir.IntType(32))
+            
+            # Flag di validità solo per le colonne che contengono NULL
+            self.validity_param_map = {}  # {column_name: param_index}
+            for col in where_columns:
+                if self.column_stats[col].null_count > 0:
+                    self.validity_param_map[col] = len(param_types)
+                    param_types.append(ir.IntType(1))
+            
+            # Ordine dei buffer passati al kernel batch
+            self.kernel_params = [(col, 'value', None) for col in where_columns]
+            self.kernel_params += [(col, 'recoded', domain) for col, domain in self.recoded_param_map]
+            self.kernel_params += [(col, 'validity', None) for col in self.validity_param_map]
+            
             # Crea funzione con parametri
             func_type = ir.FunctionType(ir.IntType(1), param_types)
             func = ir.Function(self.module, func_type, name="evaluate_row")
@@ -282,42 +786,293 @@ class LLVMCodeGenerator(ASTVisitor):
             # Genera codice per la condizione WHERE usando visit
             result = self.visit(ast.where)
             self.builder.ret(result)
+            
+            # Variante SIMD della stessa condizione per il corpo del kernel
+            vector_func = None
+            if self.vector_width > 1:
+                vector_func = self._generate_vector_function(ast, param_types)
+            
+            # Kernel batch che chiama evaluate_row/evaluate_vector sui buffer
+            self._generate_batch_kernel(func, vector_func)
         
-        # Applica ottimizzazioni LLVM se richiesto
-        if self.optimize:
-            self._optimize_llvm_ir()
+        return func
+    
+    def _generate_vector_function(self, ast: SelectQuery, param_types: List[ir.Type]):
+        """
+        Genera la variante SIMD del WHERE su vector_width righe
+        
+        Firma: <W x i1> @evaluate_vector(<W x i32> %col1, <W x double> %col2, ...,
+                                          <W x i1> %valid1, ...)
+        Stessi parametri di evaluate_row in forma vettoriale; il risultato è
+        la maschera delle righe che passano il filtro.
+        """
+        lanes = self.vector_width
+        vector_types = [ir.VectorType(ty, lanes) for ty in param_types]
+        func_type = ir.FunctionType(ir.VectorType(ir.IntType(1), lanes), vector_types)
+        func = ir.Function(self.module, func_type, name="evaluate_vector")
         
+        self.builder = ir.IRBuilder(func.append_basic_block(name="entry"))
+        self.func_params = func.args
+        self._lanes = lanes
+        try:
+            self.builder.ret(self.visit(ast.where))
+        finally:
+            self._lanes = None
         return func
     
-    def _optimize_llvm_ir(self):
+    def _lane_type(self, ty: ir.Type) -> ir.Type:
+        """Tipo scalare o vettoriale a seconda della modalità di generazione"""
+        return ir.VectorType(ty, self._lanes) if self._lanes else ty
+    
+    def _const(self, ty: ir.Type, value) -> ir.Constant:
+        """Costante scalare o splat su tutte le lane in modalità vettoriale"""
+        if self._lanes:
+            return ir.Constant(ir.VectorType(ty, self._lanes), [ir.Constant(ty, value)] * self._lanes)
+        return ir.Constant(ty, value)
+    
+    def _generate_batch_kernel(self, row_func, vector_func=None):
+        """
+        Genera il kernel batch che itera nativamente sulle righe
+        
+        Firma: i64 @evaluate_batch(i64 %start, i64 %end, i32* %col1, double* %col2, ...,
+                                   i8* %valid1, ..., i64* %sel)
+        Per ogni riga in [start, end) carica i valori dai buffer colonnari e i
+        bit di validità dalle bitmap (bit i%8 del byte i/8, ordine LSB),
+        chiama evaluate_row e, se la riga passa, ne scrive l'indice in sel.
+        
+        Con vector_func il loop principale avanza di W righe: carica vettori
+        <W x T> dai buffer, reinterpreta W bit della bitmap come <W x i1>,
+        chiama evaluate_vector e compatta la maschera in sel senza salti per
+        riga. Le righe residue (o tutte, se start non è multiplo di W) passano
+        dal loop scalare.
+        Ritorna: numero di righe selezionate
+        """
+        i64 = ir.IntType(64)
+        i8 = ir.IntType(8)
+        buffer_types = [ir.PointerType(i8) if kind == 'validity' else ir.PointerType(arg.type)
+                        for arg, (_, kind, _) in zip(row_func.args, self.kernel_params)]
+        func_type = ir.FunctionType(i64, [i64, i64] + buffer_types + [ir.PointerType(i64)])
+        kernel = ir.Function(self.module, func_type, name="evaluate_batch")
+        
+        start, end = kernel.args[0], kernel.args[1]
+        buffers = kernel.args[2:-1]
+        sel = kernel.args[-1]
+        
+        entry = kernel.append_basic_block(name="entry")
+        builder = ir.IRBuilder(entry)
+        
+        if vector_func is not None:
+            scalar_start, vector_count, vector_exit = self._generate_vector_loop(
+                builder, vector_func, start, end, buffers, sel
+            )
+        else:
+            scalar_start, vector_count, vector_exit = start, ir.Constant(i64, 0), entry
+        
+        loop = kernel.append_basic_block(name="loop")
+        body = kernel.append_basic_block(name="body")
+        select = kernel.append_basic_block(name="select")
+        latch = kernel.append_basic_block(name="latch")
+        done = kernel.append_basic_block(name="done")
+        
+        builder.branch(loop)
+        
+        # Header: indice riga e contatore righe selezionate
+        builder.position_at_end(loop)
+        idx = builder.phi(i64, name="idx")
+        count = builder.phi(i64, name="count")
+        builder.cbranch(builder.icmp_signed('<', idx, end), body, done)
+        
+        # Corpo: carica i valori della riga e valuta il WHERE
+        builder.position_at_end(body)
+        values = []
+        for buf, (_, kind, _) in zip(buffers, self.kernel_params):
+            if kind == 'validity':
+                byte = builder.load(builder.gep(buf, [builder.lshr(idx, ir.Constant(i64, 3))]))
+                bit = builder.trunc(builder.and_(idx, ir.Constant(i64, 7)), i8)
+                valid = builder.and_(builder.lshr(byte, bit), ir.Constant(i8, 1))
+                values.append(builder.trunc(valid, ir.IntType(1)))
+            else:
+                values.append(builder.load(builder.gep(buf, [idx])))
+        passes = builder.call(row_func, values)
+        builder.cbranch(passes, select, latch)
+        
+        # Riga selezionata: sel[count] = idx
+        builder.position_at_end(select)
+        builder.store(idx, builder.gep(sel, [count]))
+        count_inc = builder.add(count, ir.Constant(i64, 1))
+        builder.branch(latch)
+        
+        builder.position_at_end(latch)
+        next_count = builder.phi(i64)
+        next_count.add_incoming(count, body)
+        next_count.add_incoming(count_inc, select)
+        next_idx = builder.add(idx, ir.Constant(i64, 1))
+        builder.branch(loop)
+        
+        idx.add_incoming(scalar_start, vector_exit)
+        idx.add_incoming(next_idx, latch)
+        count.add_incoming(vector_count, vector_exit)
+        count.add_incoming(next_count, latch)
+        
+        builder.position_at_end(done)
+        builder.ret(count)
+        
+        return kernel
+    
+    def _generate_vector_loop(self, builder: ir.IRBuilder, vector_func, start, end, buffers, sel):
+        """
+        Genera il loop SIMD del kernel batch a partire dal blocco corrente
+        
+        Returns:
+            (prima riga per il loop scalare, righe selezionate finora,
+             blocco da cui si entra nel loop scalare)
+        """
+        kernel = builder.function
+        lanes = self.vector_width
+        i64 = ir.IntType(64)
+        mask_int = ir.IntType(lanes)
+        
+        # Parte vettoriale: [start, vector_end), solo se start è allineato a W
+        # (così le W righe occupano byte interi delle bitmap di validità)
+        aligned = builder.icmp_signed(
+            '==', builder.and_(start, ir.Constant(i64, lanes - 1)), ir.Constant(i64, 0)
+        )
+        span = builder.and_(builder.sub(end, start), ir.Constant(i64, -lanes))
+        vector_end = builder.select(aligned, builder.add(start, span), start)
+        
+        vloop = kernel.append_basic_block(name="vloop")
+        vbody = kernel.append_basic_block(name="vbody")
+        vselect = kernel.append_basic_block(name="vselect")
+        vlatch = kernel.append_basic_block(name="vlatch")
+        vdone = kernel.append_basic_block(name="vdone")
+        entry = builder.block
+        builder.branch(vloop)
+        
+        builder.position_at_end(vloop)
+        vidx = builder.phi(i64, name="vidx")
+        vcount = builder.phi(i64, name="vcount")
+        builder.cbranch(builder.icmp_signed('<', vidx, vector_end), vbody, vdone)
+        
+        # Corpo: W righe per iterazione (load non allineati: align dell'elemento)
+        builder.position_at_end(vbody)
+        values = []
+        for buf, param, (_, kind, _) in zip(buffers, vector_func.args, self.kernel_params):
+            if kind == 'validity':
+                byte_ptr = builder.gep(buf, [builder.lshr(vidx, ir.Constant(i64, 3))])
+                bits = builder.load(builder.bitcast(byte_ptr, ir.PointerType(mask_int)), align=1)
+                values.append(builder.bitcast(bits, param.type))
+            else:
+                elem_ptr = builder.gep(buf, [vidx])
+                align = 8 if isinstance(param.type.element, ir.DoubleType) else 4
+                values.append(builder.load(builder.bitcast(elem_ptr, ir.PointerType(param.type)),
+                                           align=align))
+        mask = builder.call(vector_func, values)
+        any_selected = builder.icmp_unsigned(
+            '!=', builder.bitcast(mask, mask_int), ir.Constant(mask_int, 0)
+        )
+        builder.cbranch(any_selected, vselect, vlatch)
+        
+        # Compattazione senza salti: scrive sempre l'indice, avanza solo se la lane passa
+        builder.position_at_end(vselect)
+        selected = vcount
+        for lane in range(lanes):
+            builder.store(builder.add(vidx, ir.Constant(i64, lane)), builder.gep(sel, [selected]))
+            bit = builder.zext(builder.extract_element(mask, ir.Constant(ir.IntType(32), lane)), i64)
+            selected = builder.add(selected, bit)
+        builder.branch(vlatch)
+        
+        builder.position_at_end(vlatch)
+        next_count = builder.phi(i64)
+        next_count.add_incoming(vcount, vbody)
+        next_count.add_incoming(selected, vselect)
+        next_idx = builder.add(vidx, ir.Constant(i64, lanes))
+        builder.branch(vloop)
+        
+        vidx.add_incoming(start, entry)
+        vidx.add_incoming(next_idx, vlatch)
+        vcount.add_incoming(ir.Constant(i64, 0), entry)
+        vcount.add_incoming(next_count, vlatch)
+        
+        builder.position_at_end(vdone)
+        return vidx, vcount, vdone
+    
+    def _create_target_machine(self):
         """
-        Applica passi di ottimizzazione LLVM IR (livello 2)
+        Crea la target machine nativa con il livello di ottimizzazione richiesto
         
-        Ottimizzazioni applicate:
-        - Dead code elimination
-        - Constant folding
-        - Instruction combining
-        - Simplificazione CFG
+        Usa nome e feature della CPU host (es. AVX2/AVX-512), così i vettori
+        <W x T> del kernel diventano istruzioni SIMD native; se la CPU host
+        non è rilevabile usa il target generico.
         """
+        llvm.initialize_native_target()
+        llvm.initialize_native_asmprinter()
+        target_obj = llvm.Target.from_default_triple()
         try:
-            # Inizializza target nativo (necessario per ottimizzazioni)
-            llvm.initialize_native_target()
-            llvm.initialize_native_asmprinter()
-            
-            # Parse modulo per ottimizzazione
-            llvmmod = llvm.parse_assembly(str(self.module))
+            return target_obj.create_target_machine(
+                cpu=llvm.get_host_cpu_name(),
+                features=llvm.get_host_cpu_features().flatten(),
+                opt=self.opt_level,
+            )
+        except RuntimeError:
+            return target_obj.create_target_machine(opt=self.opt_level)
+    
+    @staticmethod
+    def _count_instructions(llvmmod) -> int:
+        """Conta le istruzioni di tutte le funzioni definite nel modulo"""
+        return sum(1 for func in llvmmod.functions
+                   for block in func.blocks
+                   for _ in block.instructions)
+    
+    def _optimize_llvm_ir(self, target_machine=None):
+        """
+        Applica la pipeline di ottimizzazione LLVM (O0-O3) al modulo
+        
+        Usa il new pass manager con la pipeline standard per il livello
+        richiesto (inlining di evaluate_row nel kernel, instcombine, SimplifyCFG,
+        LICM, vettorizzazione di loop/SLP da O2). Con O0 il modulo viene
+        solo verificato.
+        
+        Returns:
+            ModuleRef ottimizzato (pronto per MCJIT); tempi e numero di
+            istruzioni sono salvati in self.optimization_stats
+        """
+        with self.profile.phase('optimize'):
+            return self._run_optimization_pipeline(target_machine)
+    
+    def _run_optimization_pipeline(self, target_machine):
+        """Parsing, verifica e pipeline di pass sul modulo corrente"""
+        # Parse modulo per ottimizzazione
+        llvmmod = llvm.parse_assembly(str(self.module))
+        llvmmod.verify()
+        
+        instructions_before = self._count_instructions(llvmmod)
+        start = time.perf_counter()
+        
+        if self.opt_level > 0:
+            if target_machine is None:
+                target_machine = self._create_target_machine()
+            pto = llvm.create_pipeline_tuning_options(speed_level=self.opt_level)
+            pass_builder = llvm.create_pass_builder(target_machine, pto)
+            pass_builder.getModulePassManager().run(llvmmod, pass_builder)
             llvmmod.verify()
-            
-            
-        except (AttributeError, Exception):
-            pass
+        
+        self.optimization_stats = {
+            'opt_level': self.opt_level,
+            'time_ms': (time.perf_counter() - start) * 1000,
+            'instructions_before': instructions_before,
+            'instructions_after': self._count_instructions(llvmmod),
+        }
+        return llvmmod
     
     def _compile_llvm_to_jit(self, func):
         """
         Compila LLVM IR a codice nativo usando MCJIT e wrappa con ctypes
         
+        Args:
+            func: Funzione evaluate_row (determina i tipi dei buffer del kernel)
+        
         Returns:
-            Callable Python function o None se fallisce
+            Callable ctypes del kernel evaluate_batch o None se fallisce
         
         Nota: Su ARM64 (Apple Silicon) MCJIT può crashare a runtime a causa di 
         restrizioni W^X. In caso di crash, usa fallback Python (più lento ma stabile).
@@ -329,41 +1084,69 @@ class LLVMCodeGenerator(ASTVisitor):
             import ctypes
             from llvmlite import binding as llvm
             
-            # Inizializza LLVM (llvm.initialize() è deprecato, si auto-inizializza)
-            llvm.initialize_native_target()
-            llvm.initialize_native_asmprinter()
+            # Cerca il kernel già compilato per lo stesso IR e livello di ottimizzazione
+            key = f"{ir_fingerprint(str(self.module))}-O{self.opt_level}"
+            if self.jit_cache is not None:
+                cached = self.jit_cache.get(key)
+                if cached is not None:
+                    self._jit_engine = cached.engine
+                    self.profile.info['jit'] = 'memory_cache'
+                    return cached.cfunc
+            
+            target_machine = self._create_target_machine()
+            
+            # Cerca il codice oggetto prodotto da un processo precedente
+            object_code = None
+            if self.object_cache is not None:
+                object_key = self.object_cache.make_key(
+                    key, target_machine.triple,
+                    llvm.get_host_cpu_name(), llvm.get_host_cpu_features().flatten()
+                )
+                object_code = self.object_cache.load(object_key)
             
-            # Compila modulo
-            mod = llvm.parse_assembly(str(self.module))
-            mod.verify()
+            if object_code is not None:
+                # Carica l'oggetto direttamente nell'engine (niente parsing né codegen)
+                with self.profile.phase('jit_finalize'):
+                    empty = llvm.parse_assembly("")
+                    empty.triple = target_machine.triple
+                    ee = llvm.create_mcjit_compiler(empty, target_machine)
+                    ee.add_object_file(llvm.ObjectFileRef.from_data(object_code))
+                    ee.finalize_object()
+                self.profile.info['jit'] = 'object_cache'
+            else:
+                # Compila modulo ottimizzato
+                mod = self._optimize_llvm_ir(target_machine)
+                
+                # Crea MCJIT compiler, salvando su disco l'oggetto emesso
+                with self.profile.phase('jit_finalize'):
+                    ee = llvm.create_mcjit_compiler(mod, target_machine)
+                    if self.object_cache is not None:
+                        ee.set_object_cache(
+                            notify_func=lambda _mod, buf: self.object_cache.store(object_key, buf)
+                        )
+                    ee.finalize_object()
+                self.profile.info['jit'] = 'compiled'
             
-            # Crea target machine e MCJIT compiler
-            target = llvm.Target.from_default_triple()
-            target_machine = target.create_target_machine()
-            ee = llvm.create_mcjit_compiler(mod, target_machine)
-            ee.finalize_object()
+            # Ottieni puntatore al kernel batch
+            func_ptr = ee.get_function_address("evaluate_batch")
             
-            # Ottieni puntatore a funzione
-            func_ptr = ee.get_function_address("evaluate_row")
+            # Signature ctypes: (start, end, buffer colonne..., selection vector)
+            param_types = [ctypes.c_int64, ctypes.c_int64]
+            param_types += [ctypes.c_void_p] * len(func.args)
+            param_types.append(ctypes.c_void_p)
             
-            # Determina signature ctypes in base ai parametri
-            param_types = []
-            for arg in func.args:
-                arg_type = arg.type
-                if isinstance(arg_type, ir.IntType):
-                    param_types.append(ctypes.c_int32)
-                elif isinstance(arg_type, ir.DoubleType):
-                    param_types.append(ctypes.c_double)
-                else:
-                    param_types.append(ctypes.c_int32)
+            # Crea callable Python (l'engine deve restare vivo quanto il callable)
+            cfunc = ctypes.CFUNCTYPE(ctypes.c_int64, *param_types)(func_ptr)
+            self._jit_engine = ee
             
-            # Crea callable Python
-            cfunc = ctypes.CFUNCTYPE(ctypes.c_bool, *param_types)(func_ptr)
+            if self.jit_cache is not None:
+                self.jit_cache.put(key, CompiledKernel(ee, func_ptr, cfunc))
             
             return cfunc
             
         except Exception:
             # Fallback silenzioso a esecuzione Python
+            self.profile.info['jit'] = 'fallback'
             return None
     
     def visit_select_query(self, node: SelectQuery):
@@ -371,6 +1154,50 @@ class LLVMCodeGenerator(ASTVisitor):
         pass
     
     def visit_comparison(self, node: Comparison):
+        """
+        Genera IR per comparazione con semantica SQL dei NULL
+        
+        Un confronto con un operando NULL è UNKNOWN. La grammatica non ha NOT,
+        quindi AND/OR sono monotoni e la WHERE seleziona le righe in cui la
+        condizione è TRUE: UNKNOWN equivale a FALSE già sulla foglia, cioè il
+        risultato del confronto viene messo in AND con i flag di validità.
+        """
+        operands = [node.left]
+        if self._is_column_comparison(node):
+            operands.append(node.right)
+        
+        if any(self.column_types.get(col) is type(None) for col in operands):
+            return self._const(ir.IntType(1), 0)  # Colonna tutta NULL: sempre UNKNOWN
+        
+        result = self._generate_comparison(node)
+        return self._mask_nulls(result, operands)
+    
+    def _is_column_comparison(self, node: Comparison) -> bool:
+        """True se l'operando destro è una colonna (es. nome = nome_2)"""
+        return isinstance(node.right, str) and node.right in self.columns
+    
+    def _recoded_operands(self, condition) -> List[tuple]:
+        """Coppie (colonna destra, colonna sinistra) dei confronti tra colonne stringa"""
+        operands = []
+        if isinstance(condition, Comparison):
+            if (self._is_column_comparison(condition)
+                    and self.column_types.get(condition.left) == str
+                    and self.column_types.get(condition.right) == str):
+                operands.append((condition.right, condition.left))
+        elif isinstance(condition, LogicOp):
+            for cond in condition.conditions:
+                operands.extend(self._recoded_operands(cond))
+        return list(dict.fromkeys(operands))
+    
+    def _mask_nulls(self, result, columns: List[str]):
+        """Mette in AND il risultato con la validità delle colonne che hanno NULL"""
+        for col in columns:
+            if col in self.validity_param_map:
+                valid = self.func_params[self.validity_param_map[col]]
+                result = self.builder.and_(valid, result)
+        return result
+    
+    def _generate_comparison(self, node: Comparison):
         """
         Genera IR per comparazione usando PARAMETRI della funzione
         
@@ -379,6 +1206,10 @@ class LLVMCodeGenerator(ASTVisitor):
           %1 = icmp sgt i32 %eta, 18
           ret i1 %1
         }
+        
+        Confronti tra colonne (es. nome = nome_2) usano due parametri:
+        int/float vengono promossi a double, le stringhe confrontano i codici
+        con l'operando destro ricodificato nel dizionario del sinistro.
         """
         col_type = self.column_types.get(node.left, int)
         
@@ -386,50 +1217,68 @@ class LLVMCodeGenerator(ASTVisitor):
         param_idx = self.param_map.get(node.left, 0)
         left_val = self.func_params[param_idx]
         
+        if self._is_column_comparison(node):
+            right_type = self.column_types.get(node.right, int)
+            
+            if col_type == str and right_type == str:
+                right_idx = self.recoded_param_map[(node.right, node.left)]
+                right_val = self.func_params[right_idx]
+                return self._emit_compare(node.operator, left_val, right_val, is_float=False)
+            
+            right_val = self.func_params[self.param_map[node.right]]
+            if col_type == float or right_type == float:
+                # Promozione int → double
+                if col_type == int:
+                    left_val = self.builder.sitofp(left_val, self._lane_type(ir.DoubleType()))
+                if right_type == int:
+                    right_val = self.builder.sitofp(right_val, self._lane_type(ir.DoubleType()))
+                return self._emit_compare(node.operator, left_val, right_val, is_float=True)
+            return self._emit_compare(node.operator, left_val, right_val, is_float=False)
+        
         if col_type == int:
+            if isinstance(node.right, (int, float)) and not (
+                    INT32_MIN <= node.right <= INT32_MAX and float(node.right).is_integer()):
+                # Letterale non intero o fuori da i32: promuove la colonna a double
+                left_val = self.builder.sitofp(left_val, self._lane_type(ir.DoubleType()))
+                right_val = self._const(ir.DoubleType(), node.right)
+                return self._emit_compare(node.operator, left_val, right_val, is_float=True)
+            
             # Valore destro
             if isinstance(node.right, (int, float)):
-                right_val = ir.Constant(ir.IntType(32), int(node.right))
+                right_val = self._const(ir.IntType(32), int(node.right))
             else:
-                right_val = ir.Constant(ir.IntType(32), 0)
-            
-            # Genera comparazione con PARAMETRO
-            if node.operator == '>':
-                return self.builder.icmp_signed('>', left_val, right_val)
-            elif node.operator == '<':
-                return self.builder.icmp_signed('<', left_val, right_val)
-            elif node.operator == '>=':
-                return self.builder.icmp_signed('>=', left_val, right_val)
-            elif node.operator == '<=':
-                return self.builder.icmp_signed('<=', left_val, right_val)
-            elif node.operator == '=':
-                return self.builder.icmp_signed('==', left_val, right_val)
-            elif node.operator in ['<>', '!=']:
-                return self.builder.icmp_signed('!=', left_val, right_val)
+                right_val = self._const(ir.IntType(32), 0)
+            return self._emit_compare(node.operator, left_val, right_val, is_float=False)
         
         elif col_type == float:
             # Valore destro
             if isinstance(node.right, (int, float)):
-                right_val = ir.Constant(ir.DoubleType(), float(node.right))
+                right_val = self._const(ir.DoubleType(), float(node.right))
+            else:
+                right_val = self._const(ir.DoubleType(), 0.0)
+            return self._emit_compare(node.operator, left_val, right_val, is_float=True)
+        
+        elif col_type == str and node.left in self.string_dictionaries:
+            # Valore destro: letterale risolto a compile time nel codice del dizionario
+            if isinstance(node.right, str):
+                code = self._string_literal_code(node.left, node.right)
+                right_val = self._const(ir.IntType(32), code)
             else:
-                right_val = ir.Constant(ir.DoubleType(), 0.0)
-            
-            # Genera comparazione con PARAMETRO
-            if node.operator == '>':
-                return self.builder.fcmp_ordered('>', left_val, right_val)
-            elif node.operator == '<':
-                return self.builder.fcmp_ordered('<', left_val, right_val)
-            elif node.operator == '>=':
-                return self.builder.fcmp_ordered('>=', left_val, right_val)
-            elif node.operator == '<=':
-                return self.builder.fcmp_ordered('<=', left_val, right_val)
-            elif node.operator == '=':
-                return self.builder.fcmp_ordered('==', left_val, right_val)
-            elif node.operator in ['<>', '!=']:
-                return self.builder.fcmp_ordered('!=', left_val, right_val)
+                right_val = self._const(ir.IntType(32), 0)
+            
+            # I codici preservano l'ordine: confronto tra interi
+            return self._emit_compare(node.operator, left_val, right_val, is_float=False)
         
         # Fallback
-        return ir.Constant(ir.IntType(1), 1)
+        return self._const(ir.IntType(1), 1)
+    
+    def _emit_compare(self, operator: str, left_val, right_val, is_float: bool):
+        """Emette icmp (signed) o fcmp (ordered) per l'operatore SQL"""
+        llvm_op = {'>': '>', '<': '<', '>=': '>=', '<=': '<=',
+                   '=': '==', '<>': '!=', '!=': '!='}[operator]
+        if is_float:
+            return self.builder.fcmp_ordered(llvm_op, left_val, right_val)
+        return self.builder.icmp_signed(llvm_op, left_val, right_val)
     
     def _extract_columns_from_condition(self, condition) -> List[str]:
         """Estrae lista colonne usate in una condizione WHERE preservando l'ordine"""
@@ -448,115 +1297,231 @@ class LLVMCodeGenerator(ASTVisitor):
         return list(dict.fromkeys(columns))
     
     def visit_null_check(self, node: NullCheck):
-        """Genera IR per NULL check usando parametri"""
-        # Per NULL check, confrontiamo il parametro con 0 (convenzione: NULL = 0)
-        param_idx = self.param_map.get(node.column, 0)
-        param = self.func_params[param_idx]
-        
-        # Controlla se parametro è 0 (NULL)
-        zero = ir.Constant(param.type, 0)
-        is_null = self.builder.icmp_signed('==', param, zero)
+        """Genera IR per NULL check usando il flag di validità della colonna"""
+        if node.column not in self.validity_param_map:
+            # Colonna senza NULL: IS NULL sempre falso, IS NOT NULL sempre vero
+            return self._const(ir.IntType(1), 0 if node.is_null else 1)
         
+        valid = self.func_params[self.validity_param_map[node.column]]
         if node.is_null:
-            return is_null
+            return self.builder.xor(valid, self._const(ir.IntType(1), 1))
         else:
-            return self.builder.xor(is_null, ir.Constant(ir.IntType(1), 1))
+            return valid
     
     def visit_logic_op(self, node: LogicOp):
-        """Genera IR per operatori logici usando parametri"""
-        results = [self.visit(cond) for cond in node.conditions]
+        """
+        Genera IR short-circuit per operatori logici
         
-        if node.operator == 'AND':
-            result = results[0]
-            for r in results[1:]:
-                result = self.builder.and_(result, r)
-            return result
-        elif node.operator == 'OR':
-            result = results[0]
-            for r in results[1:]:
-                result = self.builder.or_(result, r)
+        I figli sono ordinati per selettività e costo stimati dalle statistiche
+        delle colonne; ogni figlio tranne l'ultimo termina con un salto
+        condizionale al blocco di uscita (AND: appena un figlio è falso,
+        OR: appena è vero), dove un phi raccoglie il risultato.
+        In evaluate_vector i figli vengono invece combinati bit a bit.
+        """
+        conditions = self._ordered_conditions(node)
+        
+        if self._lanes:
+            # Modalità vettoriale: niente salti per lane, maschere combinate
+            # con and/or bit a bit (stesso ordine dei figli)
+            combine = self.builder.and_ if node.operator == 'AND' else self.builder.or_
+            result = self.visit(conditions[0])
+            for cond in conditions[1:]:
+                result = combine(result, self.visit(cond))
             return result
         
-        return ir.Constant(ir.IntType(1), 1)
+        func = self.builder.function
+        is_and = node.operator == 'AND'
+        
+        end_block = func.append_basic_block(name="and_end" if is_and else "or_end")
+        # Valore del risultato quando si esce in anticipo
+        short_value = ir.Constant(ir.IntType(1), 0 if is_and else 1)
+        incoming = []
+        
+        for cond in conditions[:-1]:
+            value = self.visit(cond)
+            next_block = func.append_basic_block(name="and_next" if is_and else "or_next")
+            incoming.append((short_value, self.builder.block))
+            if is_and:
+                self.builder.cbranch(value, next_block, end_block)
+            else:
+                self.builder.cbranch(value, end_block, next_block)
+            self.builder.position_at_end(next_block)
+        
+        # L'ultimo figlio determina il risultato se nessuno ha interrotto prima
+        last_value = self.visit(conditions[-1])
+        incoming.append((last_value, self.builder.block))
+        self.builder.branch(end_block)
+        
+        # Blocco di uscita in fondo alla funzione: IR leggibile dall'alto in basso
+        func.blocks.remove(end_block)
+        func.blocks.append(end_block)
+        self.builder.position_at_end(end_block)
+        result = self.builder.phi(ir.IntType(1))
+        for value, block in incoming:
+            result.add_incoming(value, block)
+        return result
+    
+    def _ordered_conditions(self, node: LogicOp) -> list:
+        """Figli del LogicOp nell'ordine di valutazione (memoizzato per nodo)"""
+        key = id(node)
+        if key not in self._condition_order:
+            self._condition_order[key] = order_conditions(node, self.column_stats, self.columns)
+        return self._condition_order[key]
     
     def _execute_query(self, ast: SelectQuery, engine) -> List[Dict[str, Any]]:
         """
-        Esegue la query usando il codice JIT compilato (se disponibile)
+        Esegue la query usando il kernel JIT batch (se disponibile)
         
         Se JIT non disponibile (ARM64), usa fallback Python
         """
-        results = []
+        return list(self._iter_query(ast))
+    
+    def _iter_query(self, ast: SelectQuery) -> Iterator[Dict[str, Any]]:
+        """
+        Pipeline scan → filtro → proiezione, un batch di BATCH_SIZE righe alla volta
         
-        # Applica filtro WHERE
-        for row in self.data:
-            if ast.where:
-                # Usa JIT se disponibile, altrimenti fallback Python
-                if self.jit_func is not None:
-                    passes = self._evaluate_condition_jit(ast.where, row)
-                else:
-                    passes = self._evaluate_condition_python(ast.where, row)
-                
-                if passes:
-                    results.append(row)
-            else:
-                results.append(row)
+        Il tempo della fase row_eval esclude il consumo delle righe da parte
+        del chiamante; info['result_rows'] è disponibile a generatore esaurito.
+        """
+        # Applica proiezione SELECT: solo le colonne richieste vengono decodificate
+        projection = None if ast.columns == "*" else ast.columns
+        select = self._batch_filter(ast)
+        data, profile = self.data, self.profile
+        total = len(data)
+        count = 0
+        for start in range(0, max(total, 1), BATCH_SIZE):
+            end = min(start + BATCH_SIZE, total)
+            with profile.phase('row_eval') as timing:
+                rows = data.rows(select(start, end), projection)
+                timing.add_rows(end - start)
+            count += len(rows)
+            yield from rows
+        profile.info['result_rows'] = count
+    
+    def _batch_filter(self, ast: SelectQuery) -> Callable[[int, int], Sequence[int]]:
+        """Funzione (start, end) → indici delle righe del batch che passano il WHERE"""
+        if ast.where is None:
+            return range
+        if self.jit_func is not None:
+            return self._filter_rows_jit()
+        return lambda start, end: [i for i in range(start, end)
+                                   if self._evaluate_condition_python(ast.where, i)]
+    
+    def _can_jit(self, condition) -> bool:
+        """
+        Verifica se la condizione è valutabile dal kernel JIT
         
-        # Applica proiezione SELECT
-        if ast.columns != "*":
-            results = [{col: row[col] for col in ast.columns} for row in results]
+        Supportati: NULL check, confronti tra colonne numeriche e letterali
+        numerici, tra colonne stringa e letterali stringa (codici del
+        dizionario) e tra due colonne dello stesso genere (numeriche o stringa).
+        """
+        if isinstance(condition, Comparison):
+            col_type = self.column_types.get(condition.left)
+            if self._is_column_comparison(condition):
+                right_type = self.column_types.get(condition.right)
+                if type(None) in (col_type, right_type):
+                    return True
+                if col_type in (int, float):
+                    return right_type in (int, float)
+                return col_type == str and right_type == str
+            if col_type in (int, float):
+                return isinstance(condition.right, (int, float))
+            if col_type == str:
+                return isinstance(condition.right, str)
+            return col_type is type(None)
+        elif isinstance(condition, NullCheck):
+            return condition.column in self.columns
+        elif isinstance(condition, LogicOp):
+            return all(self._can_jit(cond) for cond in condition.conditions)
+        return False
+    
+    def _build_column_buffers(self) -> List[array]:
+        """
+        Buffer tipizzati contigui per i parametri del kernel
         
-        return results
+        Returns:
+            Un array per parametro del kernel, nell'ordine di self.kernel_params:
+            valori (i32, double o codici i32 del dizionario; 0 per i NULL) e
+            validity bitmap (1 bit per riga) sono direttamente gli array della
+            tabella colonnare; i codici ricodificati nel dizionario di un'altra
+            colonna vengono calcolati qui
+        """
+        buffers = []
+        for col, kind, domain in self.kernel_params:
+            column = self.data.column(col)
+            if kind == 'validity':
+                buffers.append(column.validity)
+            elif kind == 'recoded':
+                buffers.append(self._build_recoded_buffer(col, domain))
+            else:
+                buffers.append(column.values)
+        return buffers
     
-    def _evaluate_condition_jit(self, condition, row: Dict[str, Any]) -> bool:
+    def _build_recoded_buffer(self, col: str, domain: str) -> array:
+        """Codici dei valori di col nel dizionario (ordinato) della colonna domain"""
+        dictionary = self.string_dictionaries[col]
+        recode = [0] * (2 * len(dictionary) + 1)  # Codice di col → codice nel dominio
+        for k, value in enumerate(dictionary):
+            recode[2 * k + 1] = self._string_literal_code(domain, value)
+        return array('i', (recode[code] for code in self.data.column(col).values))
+    
+    def _filter_rows_jit(self) -> Callable[[int, int], array]:
         """
-        Valuta la condizione usando la funzione JIT compilata
+        Filtro batch con il kernel JIT: una chiamata ctypes per batch
         
-        Estrae i valori delle colonne dalla riga e li passa come parametri
+        Returns:
+            Funzione (start, end) → indici delle righe che passano il filtro;
+            i buffer delle colonne restano vivi finché esiste la funzione
         """
-        # Estrai valori delle colonne usate nella condizione
-        where_columns = self._extract_columns_from_condition(condition)
+        buffers = self._build_column_buffers()
+        addresses = [buf.buffer_info()[0] for buf in buffers]
+        sel = array('q', bytes(8 * min(BATCH_SIZE, max(len(self.data), 1))))
+        sel_address = sel.buffer_info()[0]
+        kernel = self.jit_func
         
-        # Prepara parametri per la chiamata JIT
-        params = []
-        for col in where_columns:
-            val = row.get(col)
-            col_type = self.column_types.get(col, int)
-            
-            # Converti al tipo appropriato
-            if col_type == int:
-                params.append(int(val) if val != '' else 0)
-            elif col_type == float:
-                params.append(float(val) if val != '' else 0.0)
-            else:
-                params.append(0)  # String → fallback
+        def select(start: int, end: int) -> array:
+            count = kernel(start, end, *addresses, sel_address)
+            return sel[:count]
         
-        # Chiama funzione JIT con parametri
-        try:
-            return bool(self.jit_func(*params))
-        except Exception:
-            # Fallback silenzioso a Python
-            return self._evaluate_condition_python(condition, row)
+        # Il kernel legge i buffer tramite indirizzo: vanno tenuti in vita
+        select.buffers = buffers
+        return select
     
-    def _evaluate_condition_python(self, condition, row: Dict[str, Any]) -> bool:
+    def _evaluate_condition_python(self, condition, index: int) -> bool:
         """
-        Valuta la condizione in Python (fallback)
-        In una implementazione reale, chiameremmo la funzione LLVM JIT
+        Valuta la condizione in Python sulla riga `index` (fallback senza JIT)
+        
+        Legge i valori tipizzati dalle colonne: numeri confrontati come
+        numeri, stringhe come stringhe, tipi diversi sul testo della cella.
         """
         if isinstance(condition, Comparison):
-            left_val = row.get(condition.left)
-            right_val = condition.right
+            left = self.data.column(condition.left)
             
-            # Se right_val è una stringa che corrisponde a una colonna, caricala
-            if isinstance(right_val, str) and right_val in row:
-                right_val = row.get(right_val)
+            # Confronto con NULL: UNKNOWN, la riga non passa la WHERE
+            if not left.is_valid(index):
+                return False
             
-            # Converti tipi per confronto numerico
-            try:
-                if isinstance(right_val, (int, float)):
-                    left_val = float(left_val)
-                    right_val = float(right_val)
-            except (ValueError, TypeError):
-                pass
+            if self._is_column_comparison(condition):
+                right = self.data.column(condition.right)
+                if not right.is_valid(index):
+                    return False
+                numeric = left.type in (int, float) and right.type in (int, float)
+                if numeric or left.type == right.type:
+                    left_val, right_val = left.value(index), right.value(index)
+                else:
+                    left_val, right_val = left.text(index), right.text(index)
+            elif isinstance(condition.right, (int, float)):
+                right_val = condition.right
+                if left.type in (int, float):
+                    left_val = left.value(index)
+                else:
+                    # Colonna stringa con letterale numerico: solo celle numeriche
+                    try:
+                        left_val = float(left.text(index))
+                    except ValueError:
+                        return condition.operator in ('<>', '!=')
+            else:
+                left_val, right_val = left.text(index), condition.right
             
             op = condition.operator
             if op == '=': return left_val == right_val
@@ -567,12 +1532,13 @@ class LLVMCodeGenerator(ASTVisitor):
             elif op in ['<>', '!=']: return left_val != right_val
             
         elif isinstance(condition, NullCheck):
-            val = row.get(condition.column)
-            is_null = val == '' or val is None
+            is_null = not self.data.column(condition.column).is_valid(index)
             return is_null if condition.is_null else not is_null
         
         elif isinstance(condition, LogicOp):
-            results = [self._evaluate_condition_python(c, row) for c in condition.conditions]
+            # Short-circuit nello stesso ordine del codice generato
+            results = (self._evaluate_condition_python(c, index)
+                       for c in self._ordered_conditions(condition))
             if condition.operator == 'AND':
                 return all(results)
             elif condition.operator == 'OR':
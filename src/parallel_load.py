@@ -0,0 +1,171 @@
+"""
+Parallel Load: caricamento di un CSV su più processi
+Il file viene diviso in intervalli di byte allineati ai record; ogni worker
+di un ProcessPoolExecutor costruisce le colonne tipizzate del suo intervallo
+e le colonne parziali vengono concatenate nell'ordine del file
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .columnar import ColumnarTable, NULL_TYPE
+from .csv_scanner import CSVScanner
+from .ast_nodes import Condition
+from .pushdown import BlockPredicate, filter_blocks, predicate_column
+from .zone_map import ZoneMap, ZoneSummary, merge_summaries, summarize_cells
+
+
+# Byte minimi per intervallo: sotto questa soglia l'avvio dei processi
+# costa più del parsing
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# Intervallo da leggere: (indice della zona o None, inizio, fine)
+ZoneRange = Tuple[Optional[int], Optional[int], Optional[int]]
+
+
+def normalize_load_workers(workers: Optional[int] = None) -> int:
+    """
+    Processi per il caricamento: il valore indicato, altrimenti
+    $GOMORRASQL_LOAD_WORKERS o il numero di CPU
+    """
+    if workers is None:
+        override = os.environ.get("GOMORRASQL_LOAD_WORKERS")
+        workers = int(override) if override else (os.cpu_count() or 1)
+    if workers < 1:
+        raise ValueError(f"Numero di worker non valido: {workers} (minimo 1)")
+    return workers
+
+
+def _scan_ranges(scanner: CSVScanner, ranges: Sequence[ZoneRange], indices: Sequence[int],
+                 summarize: Sequence[int], summaries: Dict[Tuple[int, int], Optional[ZoneSummary]]):
+    """
+    Blocchi di celle degli intervalli indicati
+    
+    Per le zone tracciate (indice non None) e le posizioni in summarize
+    raccoglie in `summaries` il riassunto min/max delle celle lette, prima
+    dei predicati.
+    """
+    for zone, start, end in ranges:
+        for block in scanner.scan_columns(indices, start, end):
+            if zone is not None:
+                for position in summarize:
+                    summary = summarize_cells(block[position])
+                    key = (zone, position)
+                    summaries[key] = (merge_summaries(summaries[key], summary)
+                                      if key in summaries else summary)
+            yield block
+
+
+def _load_range(path: str, encoding: str, ranges: Sequence[ZoneRange], indices: Sequence[int],
+                names: Sequence[str], type_hints: Dict[str, type],
+                predicates: Sequence[BlockPredicate] = (), summarize: Sequence[int] = ()):
+    """
+    Worker: colonne tipizzate dei record negli intervalli che soddisfano i
+    predicati, e riassunti delle zone lette
+    """
+    summaries = {}
+    with CSVScanner(path, encoding) as scanner:
+        blocks = filter_blocks(_scan_ranges(scanner, ranges, indices, summarize, summaries),
+                               predicates, encoding)
+        table = ColumnarTable.from_column_blocks(names, blocks, type_hints, encoding=encoding)
+    return table, summaries
+
+
+def _group_ranges(ranges: Sequence[ZoneRange], parts: int, min_bytes: int) -> List[List[ZoneRange]]:
+    """Divide gli intervalli (in ordine) in al più `parts` gruppi contigui di almeno min_bytes"""
+    total = sum(end - start for _, start, end in ranges)
+    parts = max(1, min(parts, total // max(min_bytes, 1)))
+    target = total / parts
+    groups: List[List[ZoneRange]] = [[]]
+    size = 0
+    for zone_range in ranges:
+        if size >= target and len(groups) < parts:
+            groups.append([])
+            size = 0
+        groups[-1].append(zone_range)
+        size += zone_range[2] - zone_range[1]
+    return groups
+
+
+def load_table(scanner: CSVScanner, names: Dict[str, str], type_hints: Dict[str, type],
+               workers: int = 1, min_bytes: Optional[int] = None,
+               predicates: Sequence[Condition] = (), zone_map: Optional[ZoneMap] = None,
+               zones: Optional[Sequence[int]] = None,
+               summarize: Sequence[str] = (),
+               offsets: Optional[Sequence[int]] = None) -> ColumnarTable:
+    """
+    Carica le colonne indicate di un CSV già aperto, in parallelo se conviene
+    
+    Con un solo intervallo (file piccolo o workers=1) il parsing resta nel
+    processo corrente. Se il pool non è disponibile (es. ambiente senza
+    fork) il caricamento ripiega sul percorso seriale.
+    
+    Args:
+        scanner: CSVScanner aperto sul file
+        names: Colonne da caricare {nome nel CSV: nome nella tabella}
+        type_hints: Tipi di partenza per nome nel CSV
+        workers: Numero massimo di processi
+        min_bytes: Dimensione minima di un intervallo (default: PARALLEL_MIN_BYTES)
+        predicates: Predicati su una colonna caricata (nomi della tabella),
+                    applicati durante il parsing (vedi pushdown.predicate_column)
+        zone_map: Zone del file (vedi zone_map.ZoneMap); non per i CSV compressi
+        zones: Indici delle zone di zone_map da leggere (default: tutte);
+               le altre vengono saltate senza essere lette
+        summarize: Colonne numeriche caricate (nomi del CSV) di cui
+                   registrare in zone_map i riassunti delle zone lette
+        offsets: Offset dei soli record da leggere (da un indice secondario),
+                 in ordine di file; esclude zone e parallelismo
+    """
+    header = scanner.header
+    indices = [idx for idx, col in enumerate(header) if col in names]
+    table_names = [names[header[idx]] for idx in indices]
+    hints = {names[header[idx]]: type_hints.get(header[idx], NULL_TYPE) for idx in indices}
+    positions = [(table_names.index(predicate_column(condition, table_names)), condition)
+                 for condition in predicates]
+    
+    if offsets is not None:
+        blocks = filter_blocks(scanner.read_records(offsets, indices), positions, scanner.encoding)
+        return ColumnarTable.from_column_blocks(table_names, blocks, hints, encoding=scanner.encoding)
+    
+    min_bytes = PARALLEL_MIN_BYTES if min_bytes is None else min_bytes
+    if zone_map is None:
+        # CSV compresso: un solo flusso (i worker dello scanner decomprimono)
+        parallel = workers > 1 and scanner.compression is None
+        split = scanner.split_ranges(workers, min_bytes) if parallel else [(None, None)]
+        groups = [[(None, start, end)] for start, end in split]
+        summarize = []
+    else:
+        selected = range(len(zone_map)) if zones is None else zones
+        ranges = [(zone, *zone_map.zones[zone]) for zone in selected]
+        groups = _group_ranges(ranges, workers, min_bytes) if workers > 1 else [ranges]
+        summarize = [position for position, idx in enumerate(indices)
+                     if header[idx] in summarize and type_hints.get(header[idx]) in (int, float)
+                     and not all(zone_map.has_summary(zone, header[idx]) for zone in selected)]
+    
+    results = None
+    if len(groups) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+                futures = [pool.submit(_load_range, str(scanner.path), scanner.encoding,
+                                       group, indices, table_names, hints, positions, summarize)
+                           for group in groups]
+                results = [future.result() for future in futures]
+        except (OSError, BrokenProcessPool):
+            pass  # Ripiega sul caricamento seriale
+    
+    if results is None:
+        summaries = {}
+        blocks = _scan_ranges(scanner, [zone_range for group in groups for zone_range in group],
+                              indices, summarize, summaries)
+        table = ColumnarTable.from_column_blocks(
+            table_names, filter_blocks(blocks, positions, scanner.encoding), hints,
+            encoding=scanner.encoding)
+        results = [(table, summaries)]
+    
+    for _, summaries in results:
+        for (zone, position), summary in summaries.items():
+            zone_map.record(zone, header[indices[position]], summary)
+    tables = [table for table, _ in results]
+    return tables[0] if len(tables) == 1 else ColumnarTable.concat(tables)
@@ -0,0 +1,95 @@
+"""
+Profiling: Tempi per fase della pipeline di una query
+Raccoglie wall time, CPU time e righe elaborate per parsing, analisi,
+caricamento CSV, generazione IR, ottimizzazione, JIT e valutazione righe
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class PhaseTiming:
+    """Tempi cumulativi di una fase (una fase può essere eseguita più volte)"""
+    name: str
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    calls: int = 0
+    rows: Optional[int] = None
+    
+    def add_rows(self, count: int):
+        """Somma le righe elaborate dalla fase"""
+        self.rows = (self.rows or 0) + count
+
+
+class QueryProfile:
+    """
+    Profilo di una singola query
+    
+    Le fasi compaiono nell'ordine in cui vengono eseguite la prima volta;
+    info raccoglie dettagli non temporali (es. esito della cache JIT).
+    """
+    
+    def __init__(self):
+        self.phases: Dict[str, PhaseTiming] = {}
+        self.info: Dict[str, Any] = {}
+    
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Misura il blocco come fase `name`
+        
+        Uso:
+            with profile.phase('csv_load') as timing:
+                ...
+                timing.add_rows(len(rows))
+        """
+        timing = self.phases.get(name)
+        if timing is None:
+            timing = self.phases[name] = PhaseTiming(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield timing
+        finally:
+            timing.wall_ms += (time.perf_counter() - wall_start) * 1000
+            timing.cpu_ms += (time.process_time() - cpu_start) * 1000
+            timing.calls += 1
+    
+    @property
+    def total_wall_ms(self) -> float:
+        return sum(p.wall_ms for p in self.phases.values())
+    
+    @property
+    def total_cpu_ms(self) -> float:
+        return sum(p.cpu_ms for p in self.phases.values())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Rappresentazione serializzabile (JSON) del profilo"""
+        return {
+            'phases': [asdict(p) for p in self.phases.values()],
+            'total_wall_ms': self.total_wall_ms,
+            'total_cpu_ms': self.total_cpu_ms,
+            'info': dict(self.info),
+        }
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, default=str)
+    
+    def format(self) -> str:
+        """Report leggibile: una riga per fase più il totale"""
+        lines = [
+            f"{'fase':<16}{'wall ms':>12}{'cpu ms':>12}{'chiamate':>10}{'righe':>12}",
+            "-" * 62,
+        ]
+        for p in self.phases.values():
+            rows = "-" if p.rows is None else str(p.rows)
+            lines.append(f"{p.name:<16}{p.wall_ms:>12.3f}{p.cpu_ms:>12.3f}{p.calls:>10}{rows:>12}")
+        lines.append("-" * 62)
+        lines.append(f"{'totale':<16}{self.total_wall_ms:>12.3f}{self.total_cpu_ms:>12.3f}")
+        for key, value in self.info.items():
+            lines.append(f"{key}: {value}")
+        return "\n".join(lines)
@@ -0,0 +1,136 @@
+"""
+Pushdown dei predicati nello scanner CSV
+I predicati economici su una sola colonna (confronto con un letterale, NULL
+check, AND/OR sulla stessa colonna) vengono valutati sulle celle bytes
+durante il parsing: le righe scartate non vengono mai materializzate
+"""
+
+import codecs
+import operator
+from itertools import compress, repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .ast_nodes import Comparison, NullCheck, LogicOp
+
+
+_OPERATORS = {
+    '=': operator.eq, '<>': operator.ne, '!=': operator.ne,
+    '<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+}
+
+# Posizione della colonna nel blocco e condizione da applicare
+BlockPredicate = Tuple[int, object]
+
+
+def split_conjuncts(condition) -> List:
+    """Condizioni in AND al primo livello (la condizione stessa se non è un AND)"""
+    if isinstance(condition, LogicOp) and condition.operator == 'AND':
+        return [leaf for child in condition.conditions for leaf in split_conjuncts(child)]
+    return [] if condition is None else [condition]
+
+
+def predicate_column(condition, columns: Sequence[str]) -> Optional[str]:
+    """
+    Colonna su cui è definito un predicato spingibile nello scanner, o None
+    
+    Spingibili: confronti con un letterale, NULL check, AND/OR i cui figli
+    sono spingibili sulla stessa colonna. I confronti tra due colonne
+    restano al kernel.
+    """
+    if isinstance(condition, NullCheck):
+        return condition.column
+    if isinstance(condition, Comparison):
+        if isinstance(condition.right, str) and condition.right in columns:
+            return None  # Confronto tra colonne
+        return condition.left
+    if isinstance(condition, LogicOp):
+        found = {predicate_column(child, columns) for child in condition.conditions}
+        if len(found) == 1 and None not in found:
+            return found.pop()
+    return None
+
+
+def rename_columns(condition, names: Dict[str, str]):
+    """
+    Stessa condizione con le colonne rinominate (es. dai nomi del risultato
+    di una JOIN, nome_2, a quelli del CSV); solo per predicati spingibili,
+    il cui operando destro è sempre un letterale
+    """
+    if isinstance(condition, NullCheck):
+        return NullCheck(names.get(condition.column, condition.column), condition.is_null)
+    if isinstance(condition, Comparison):
+        return Comparison(names.get(condition.left, condition.left), condition.operator, condition.right)
+    if isinstance(condition, LogicOp):
+        return LogicOp(condition.operator, [rename_columns(child, names) for child in condition.conditions])
+    return condition
+
+
+def _numbers(cells: Sequence[bytes]) -> List[Optional[float]]:
+    """float() di ogni cella, None per le celle non numeriche"""
+    try:
+        return list(map(float, cells))
+    except ValueError:
+        pass
+    numbers = []
+    for cell in cells:
+        try:
+            numbers.append(float(cell))
+        except ValueError:
+            numbers.append(None)
+    return numbers
+
+
+def cell_mask(condition, cells: Sequence[bytes], encoding: str = 'utf-8') -> List[bool]:
+    """
+    Valuta un predicato su una colonna di celle bytes (b'' = NULL)
+    
+    Stessa semantica della valutazione Python sulle colonne tipizzate: un
+    confronto con NULL è falso; letterale numerico confrontato con il valore
+    numerico della cella (celle non numeriche: vero solo per <>); letterale
+    stringa confrontato con il testo della cella. L'ordine dei bytes UTF-8
+    coincide con quello dei code point, quindi non serve decodificare.
+    """
+    if isinstance(condition, NullCheck):
+        return list(map(operator.not_, cells)) if condition.is_null else list(map(bool, cells))
+    
+    if isinstance(condition, LogicOp):
+        masks = [cell_mask(child, cells, encoding) for child in condition.conditions]
+        combine = operator.and_ if condition.operator == 'AND' else operator.or_
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = list(map(combine, mask, other))
+        return mask
+    
+    compare = _OPERATORS[condition.operator]
+    valid = list(map(bool, cells))
+    if isinstance(condition.right, (int, float)):
+        literal = condition.right
+        unparsable = condition.operator in ('<>', '!=')
+        return [ok and (unparsable if number is None else compare(number, literal))
+                for ok, number in zip(valid, _numbers([c or b'0' for c in cells]))]
+    
+    if codecs.lookup(encoding).name in ('utf-8', 'ascii') or condition.operator in ('=', '<>', '!='):
+        literal = condition.right.encode(encoding)
+    else:
+        # Altre codifiche: l'ordine dei bytes non è quello dei caratteri
+        cells = [cell.decode(encoding) for cell in cells]
+        literal = condition.right
+    return list(map(operator.and_, valid, map(compare, cells, repeat(literal))))
+
+
+def filter_blocks(blocks: Iterable[List[Sequence[bytes]]], predicates: Sequence[BlockPredicate],
+                  encoding: str = 'utf-8') -> Iterator[List[Sequence[bytes]]]:
+    """
+    Applica i predicati ai blocchi di celle (uno per colonna) dello scanner
+    
+    Le righe che non soddisfano tutti i predicati vengono tolte da ogni
+    colonna del blocco (compress, a livello C) prima della materializzazione.
+    """
+    for block in blocks:
+        mask = None
+        for position, condition in predicates:
+            current = cell_mask(condition, block[position], encoding)
+            mask = current if mask is None else list(map(operator.and_, mask, current))
+        if mask is not None and not all(mask):
+            block = [list(compress(cells, mask)) for cells in block]
+        yield block
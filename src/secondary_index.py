@@ -0,0 +1,300 @@
+"""
+Secondary Index: indici persistenti su una colonna di un CSV
+Il file <tabella>.csv.<colonna>.gidx associa i valori della colonna agli
+offset di byte dei record: un indice hash risponde alle uguaglianze, uno
+ordinato anche agli intervalli, senza leggere l'intero CSV
+"""
+
+import mmap
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate, compress, repeat
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from .ast_nodes import Comparison
+from .column_store import source_fingerprint
+from .compression import compression_of
+from .csv_scanner import CSVScanner
+from .sidecar import read_manifest, section_offsets, write_sidecar
+
+
+SUFFIX = ".gidx"
+MAGIC = b"GIDX"
+VERSION = 1
+
+# hash: solo uguaglianze; sorted: uguaglianze e intervalli
+KINDS = ('hash', 'sorted')
+
+
+def index_path(csv_path, column: str) -> Path:
+    """Path dell'indice di una colonna (es. guaglioni.csv.eta.gidx)"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.name}.{quote(column, safe='')}{SUFFIX}")
+
+
+def _hash_function(numeric: bool):
+    """
+    Hash delle chiavi: hash() dei float non dipende dal processo (a differenza
+    di quello dei bytes) e vale lo stesso per -0.0 e 0.0; crc32 per i bytes
+    """
+    return hash if numeric else zlib.crc32
+
+
+class _TextKeys:
+    """Sequenza delle chiavi testuali ordinate (per bisect) sopra i buffer mappati"""
+    
+    def __init__(self, bounds: memoryview, data: memoryview):
+        self.bounds = bounds
+        self.data = data
+    
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+    
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.data[self.bounds[i]:self.bounds[i + 1]])
+
+
+class SecondaryIndex:
+    """
+    Indice persistente (hash o ordinato) su una colonna di un CSV
+    
+    Le chiavi sono numeriche (float del testo) se tutte le celle non NULL
+    della colonna sono numeri, altrimenti i bytes della cella: l'indice
+    serve solo i confronti con un letterale dello stesso genere, con la
+    stessa semantica della valutazione delle righe. Le celle NULL non sono
+    indicizzate (un confronto con NULL è falso). Il risultato di lookup è un
+    sovrainsieme delle righe che soddisfano il confronto (collisioni hash,
+    estremi inclusi per le chiavi float): il WHERE completo resta al kernel.
+    
+    Formato: MAGIC, lunghezza (u32 little-endian) del manifest JSON, manifest
+    (impronta del CSV, colonna, tipo, genere delle chiavi, righe, offset dei
+    buffer), poi i buffer:
+    - hash: buckets (inizio di ogni bucket in offsets) e offsets dei record
+    - sorted: chiavi ordinate (double, oppure limiti + bytes) e offsets
+    
+    open() mappa il file in memoria: un lookup legge solo i buffer che tocca.
+    
+    Uso:
+        SecondaryIndex.build(csv_path, 'id', 'hash')
+        with SecondaryIndex(csv_path, 'id') as index:
+            if index.open() and not index.stale:
+                offsets = index.lookup([Comparison('id', '=', 42)])
+    """
+    
+    def __init__(self, csv_path, column: str):
+        self.csv_path = Path(csv_path)
+        self.column = column
+        self.path = index_path(csv_path, column)
+        self.kind: Optional[str] = None
+        self.numeric = False
+        self.rows = 0
+        self.stale = False
+        self.encoding = 'utf-8'
+        self._file = None
+        self._mmap = None
+        self._views: List[memoryview] = []
+        self._buffers: Dict[str, memoryview] = {}
+    
+    def __enter__(self) -> "SecondaryIndex":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def open(self) -> bool:
+        """
+        Mappa l'indice; False se manca, è corrotto o di un'altra versione
+        
+        Un indice valido ma costruito su un CSV diverso da quello attuale
+        viene aperto con stale = True e non va usato.
+        """
+        self.close()
+        try:
+            self._file = open(self.path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            header = read_manifest(self._mmap, MAGIC)
+            fingerprint = source_fingerprint(self.csv_path)
+        except (OSError, ValueError):
+            self.close()
+            return False
+        if header is None:
+            self.close()
+            return False
+        
+        manifest, data_start = header
+        if (manifest.get('version') != VERSION
+                or manifest.get('byteorder') != sys.byteorder
+                or manifest.get('column') != self.column
+                or manifest.get('kind') not in KINDS
+                or manifest.get('hash_width') != sys.hash_info.width):
+            self.close()
+            return False
+        
+        self.kind = manifest['kind']
+        self.numeric = manifest['keys'] == 'number'
+        self.rows = manifest['rows']
+        self.encoding = manifest['encoding']
+        self.stale = manifest['source'] != fingerprint
+        
+        root = memoryview(self._mmap)
+        self._views.append(root)
+        for name, (typecode, offset, size) in manifest['buffers'].items():
+            view = root[data_start + offset:data_start + offset + size].cast(typecode)
+            self._views.append(view)
+            self._buffers[name] = view
+        return True
+    
+    def close(self):
+        self._buffers = {}
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def lookup(self, conditions: Sequence) -> Optional[List[int]]:
+        """
+        Offset (in ordine di file) dei record che possono soddisfare tutti i
+        confronti indicati (congiunti del WHERE sulla colonna); None se
+        l'indice non ne serve nessuno
+        
+        Con l'indice ordinato gli intervalli dei confronti si intersecano
+        (es. id >= 100 e id < 200); con l'hash si usa un'uguaglianza.
+        """
+        spans = [span for span in map(self._span, conditions) if span is not None]
+        if not spans:
+            return None
+        offsets = self._buffers['offsets']
+        if self.kind == 'hash':
+            low, high = min(spans, key=lambda span: span[1] - span[0])
+            return list(offsets[low:high])
+        low = max(span[0] for span in spans)
+        high = min(span[1] for span in spans)
+        return sorted(offsets[low:high]) if low < high else []
+    
+    def _span(self, condition) -> Optional[Tuple[int, int]]:
+        """Posizioni [low, high) in offsets dei candidati di un confronto, o None"""
+        if (self.kind is None or not isinstance(condition, Comparison)
+                or condition.left != self.column):
+            return None
+        literal = condition.right
+        if self.numeric:
+            if isinstance(literal, bool) or not isinstance(literal, (int, float)):
+                return None
+            key = float(literal)
+        else:
+            if not isinstance(literal, str):
+                return None
+            key = literal.encode(self.encoding)
+        operator = condition.operator
+        
+        if self.kind == 'hash':
+            if operator != '=':
+                return None
+            buckets = self._buffers['buckets']
+            bucket = _hash_function(self.numeric)(key) & (len(buckets) - 2)
+            return buckets[bucket], buckets[bucket + 1]
+        
+        if self.numeric:
+            keys = self._buffers['keys']
+        else:
+            keys = _TextKeys(self._buffers['key_bounds'], self._buffers['key_data'])
+        # Chiavi float: estremi sempre inclusi (arrotondamento degli interi grandi)
+        inclusive = self.numeric
+        if operator == '=':
+            return bisect_left(keys, key), bisect_right(keys, key)
+        if operator in ('<', '<='):
+            return 0, (bisect_right(keys, key) if operator == '<=' or inclusive
+                       else bisect_left(keys, key))
+        if operator in ('>', '>='):
+            return (bisect_left(keys, key) if operator == '>=' or inclusive
+                    else bisect_right(keys, key)), len(keys)
+        return None
+    
+    @classmethod
+    def build(cls, csv_path, column: str, kind: str = 'hash', encoding: str = 'utf-8') -> Path:
+        """
+        Costruisce l'indice leggendo la colonna dal CSV e lo salva (atomico)
+        
+        Raises:
+            ValueError: tipo di indice sconosciuto, colonna assente o CSV
+                        compresso (i record non hanno offset rileggibili)
+            OSError: CSV illeggibile o directory non scrivibile
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Tipo di indice non valido: {kind} (atteso {' o '.join(KINDS)})")
+        if compression_of(csv_path) is not None:
+            raise ValueError(f"Indice non supportato su un CSV compresso: {Path(csv_path).name}")
+        fingerprint = source_fingerprint(csv_path)
+        offsets = array('q')
+        cells: List[bytes] = []
+        rows = 0
+        with CSVScanner(csv_path, encoding) as scanner:
+            if column not in scanner.header:
+                raise ValueError(f"Colonna '{column}' non trovata in {Path(csv_path).name}")
+            for block_offsets, block_cells in scanner.scan_offsets(scanner.header.index(column)):
+                rows += len(block_cells)
+                valid = list(map(bool, block_cells))
+                offsets.extend(compress(block_offsets, valid))
+                cells.extend(compress(block_cells, valid))
+        
+        try:
+            keys: Sequence = list(map(float, cells))
+            numeric = True
+        except ValueError:
+            keys, numeric = cells, False
+        total = sum(keys) if numeric else 0.0
+        if total != total:
+            # NaN: nessun confronto è vero, la riga non va indicizzata
+            valid = [key == key for key in keys]
+            keys = list(compress(keys, valid))
+            offsets = array('q', compress(offsets, valid))
+        
+        buffers: Dict[str, array] = {}
+        if kind == 'hash':
+            bucket_count = 1 << max(len(keys) - 1, 1).bit_length()
+            bucket_of = list(map((bucket_count - 1).__and__, map(_hash_function(numeric), keys)))
+            order = sorted(range(len(keys)), key=bucket_of.__getitem__)
+            counts = Counter(bucket_of)
+            buffers['buckets'] = array('q', accumulate(map(counts.get, range(bucket_count), repeat(0)),
+                                                       initial=0))
+        else:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            if numeric:
+                buffers['keys'] = array('d', map(keys.__getitem__, order))
+            else:
+                sorted_keys = list(map(keys.__getitem__, order))
+                buffers['key_bounds'] = array('q', accumulate(map(len, sorted_keys), initial=0))
+                buffers['key_data'] = array('B', b''.join(sorted_keys))
+        buffers['offsets'] = array('q', map(offsets.__getitem__, order))
+        
+        cls._write(index_path(csv_path, column), csv_path, {
+            'version': VERSION,
+            'byteorder': sys.byteorder,
+            'hash_width': sys.hash_info.width,
+            'source': fingerprint,
+            'column': column,
+            'kind': kind,
+            'keys': 'number' if numeric else 'text',
+            'encoding': encoding,
+            'rows': rows,
+        }, buffers)
+        return index_path(csv_path, column)
+    
+    @staticmethod
+    def _write(path: Path, csv_path, manifest: dict, buffers: Dict[str, array]):
+        """Scrive manifest e buffer in un temporaneo e lo sostituisce all'indice"""
+        sizes = [len(buffer) * buffer.itemsize for buffer in buffers.values()]
+        spans = {name: [buffer.typecode, offset, size]
+                 for (name, buffer), offset, size in zip(buffers.items(), section_offsets(sizes), sizes)}
+        write_sidecar(path, MAGIC, {**manifest, 'buffers': spans},
+                      (buffer.tobytes() for buffer in buffers.values()), mode_from=csv_path)
@@ -3,10 +3,10 @@ Semantic Analyzer: Analisi Semantica
 Valida che l'AST sia semanticamente corretto
 """
 
-import csv
 from pathlib import Path
-from typing import Set, Dict, List
+from typing import Optional, Set
 from .ast_nodes import SelectQuery, Comparison, NullCheck, LogicOp
+from .catalog import TableCatalog, join_column_names
 
 
 class SemanticError(Exception):
@@ -17,32 +17,27 @@ class SemanticError(Exception):
 class SemanticAnalyzer:
     """Analizzatore semantico per GomorraSQL"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", catalog: Optional[TableCatalog] = None):
         """
         Inizializza l'analyzer
         
         Args:
             data_dir: Directory contenente i file CSV
+            catalog: Catalogo delle tabelle condiviso con il code generator
+                     (default: uno nuovo)
         """
         self.data_dir = Path(data_dir)
-        self.table_schemas: Dict[str, Set[str]] = {}
+        self.catalog = catalog if catalog is not None else TableCatalog()
     
     def _load_table_schema(self, table_name: str) -> Set[str]:
-        """Carica le colonne di una tabella CSV"""
-        if table_name in self.table_schemas:
-            return self.table_schemas[table_name]
-        
+        """Carica le colonne di una tabella CSV (header dal catalogo)"""
         csv_path = self.data_dir / table_name
         
         if not csv_path.exists():
             raise SemanticError(f"Tabella '{table_name}' non trovata")
         
         try:
-            with open(csv_path, 'r') as f:
-                reader = csv.reader(f)
-                columns = set(next(reader))
-                self.table_schemas[table_name] = columns
-                return columns
+            return set(self.catalog.header(csv_path))
         except Exception as e:
             raise SemanticError(f"Errore leggendo la tabella '{table_name}': {e}")
     
@@ -59,24 +54,14 @@ class SemanticAnalyzer:
         Raises:
             SemanticError: se ci sono errori semantici
         """
-        # 1. Carica schemi delle tabelle
+        # 1. Carica schemi delle tabelle; nelle JOIN le colonne già presenti
+        #    in una tabella precedente sono disponibili anche con il suffisso
+        #    della posizione (nome_2, nome_3, ...)
         all_columns: Set[str] = set()
-        disambiguated_columns: Set[str] = set()  # Colonne con suffissi _2
-        
-        for i, table in enumerate(ast.tables):
-            columns = self._load_table_schema(table)
-            
-            # Se è JOIN, aggiungi anche versioni disambiguate
-            if len(ast.tables) > 1 and i > 0:
-                for col in columns:
-                    if col in all_columns:
-                        # Colonna duplicata, aggiungi versione con suffisso
-                        disambiguated_columns.add(f"{col}_2")
-            
-            all_columns.update(columns)
-        
-        # Aggiungi colonne disambiguate
-        all_columns.update(disambiguated_columns)
+        headers = [self._load_table_schema(table) for table in ast.tables]
+        for names in join_column_names(headers):
+            all_columns.update(names)
+            all_columns.update(names.values())
         
         # 2. Valida proiezione (SELECT)
         if ast.columns != "*":
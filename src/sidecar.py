@@ -0,0 +1,105 @@
+"""
+Sidecar: formato comune dei file di metadati accanto ai CSV
+(.gcol, .gidx, .gzone) e scrittura atomica dei file delle cache
+Un sidecar è MAGIC, lunghezza (u32 little-endian) del manifest JSON,
+manifest, poi sezioni binarie allineate a ALIGN byte (offset relativi
+all'inizio dei dati, registrati nel manifest)
+"""
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+# Allineamento delle sezioni (i buffer di double restano allineati)
+ALIGN = 8
+
+
+def padding(offset: int) -> int:
+    """Byte di riempimento dopo offset fino al prossimo multiplo di ALIGN"""
+    return -offset % ALIGN
+
+
+def section_offsets(sizes: Sequence[int]) -> List[int]:
+    """Offset (dall'inizio dei dati) di sezioni consecutive delle dimensioni date"""
+    offsets = []
+    offset = 0
+    for size in sizes:
+        offsets.append(offset)
+        offset += size + padding(size)
+    return offsets
+
+
+def atomic_write(path: Path, chunks: Iterable[bytes], mode_from=None):
+    """
+    Scrive i byte in un temporaneo nella stessa directory e lo sostituisce
+    a path (os.replace): un lettore vede il file vecchio o quello completo
+    
+    Args:
+        mode_from: File di cui copiare i permessi (mkstemp crea con 0600)
+    
+    Raises:
+        OSError: directory non scrivibile o errore di I/O (il temporaneo
+                 viene rimosso)
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        if mode_from is not None:
+            shutil.copymode(mode_from, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_sidecar(path: Path, magic: bytes, manifest: dict, sections: Iterable[bytes] = (),
+                  mode_from=None):
+    """
+    Scrive manifest e sezioni (negli offset di section_offsets) in modo atomico
+    
+    Raises:
+        OSError: vedi atomic_write
+    """
+    header = json.dumps(manifest).encode('utf-8')
+    prefix = magic + struct.pack('<I', len(header)) + header
+    
+    def chunks():
+        yield prefix + bytes(padding(len(prefix)))
+        for data in sections:
+            yield data
+            yield bytes(padding(len(data)))
+    
+    atomic_write(path, chunks(), mode_from)
+
+
+def read_manifest(f, magic: bytes) -> Optional[Tuple[dict, int]]:
+    """
+    Manifest di un sidecar aperto (file o mmap, posizionato all'inizio)
+    
+    Returns:
+        (manifest, offset dell'inizio dei dati), None se il file non è un
+        sidecar valido con quel MAGIC
+    
+    Raises:
+        OSError: errore di lettura
+    """
+    prefix = f.read(len(magic) + 4)
+    if len(prefix) < len(magic) + 4 or prefix[:len(magic)] != magic:
+        return None
+    (length,) = struct.unpack('<I', prefix[len(magic):])
+    try:
+        manifest = json.loads(f.read(length).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    end = len(magic) + 4 + length
+    return manifest, end + padding(end)
@@ -0,0 +1,201 @@
+"""
+Statistiche delle colonne e stima di selettività/costo dei predicati
+Usate per ordinare le condizioni AND/OR in modo che la valutazione
+short-circuit si fermi il prima possibile
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from .ast_nodes import Comparison, NullCheck, LogicOp
+
+
+# Selettività di default quando mancano statistiche utili
+DEFAULT_EQ_SELECTIVITY = 0.1
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+
+
+@dataclass
+class ColumnStats:
+    """Statistiche di una colonna caricata"""
+    row_count: int
+    null_count: int = 0
+    distinct_count: int = 0
+    min_value: Optional[float] = None        # Solo colonne numeriche
+    max_value: Optional[float] = None
+    dictionary: Optional[List[str]] = None   # Solo colonne stringa (ordinato)
+    frequencies: Optional[Dict[str, int]] = None
+    
+    @property
+    def non_null_fraction(self) -> float:
+        if self.row_count == 0:
+            return 0.0
+        return (self.row_count - self.null_count) / self.row_count
+
+
+def _clamp(value: float) -> float:
+    return min(1.0, max(0.0, value))
+
+
+def _is_column_ref(condition: Comparison, columns: Sequence[str]) -> bool:
+    return isinstance(condition.right, str) and condition.right in columns
+
+
+def _numeric_range_fraction(op: str, value: float, stats: ColumnStats) -> float:
+    """Frazione dei valori non NULL che soddisfa col OP value (distribuzione uniforme)"""
+    low, high = stats.min_value, stats.max_value
+    if high == low:
+        holds = {'>': low > value, '<': low < value, '>=': low >= value, '<=': low <= value}[op]
+        return 1.0 if holds else 0.0
+    if op in ('>', '>='):
+        return _clamp((high - value) / (high - low))
+    return _clamp((value - low) / (high - low))
+
+
+def _string_range_fraction(op: str, value: str, dictionary: List[str]) -> float:
+    """Frazione dei valori distinti del dizionario che soddisfa col OP value"""
+    if not dictionary:
+        return 0.0
+    if op == '>':
+        matching = len(dictionary) - bisect_right(dictionary, value)
+    elif op == '>=':
+        matching = len(dictionary) - bisect_left(dictionary, value)
+    elif op == '<':
+        matching = bisect_left(dictionary, value)
+    else:
+        matching = bisect_right(dictionary, value)
+    return matching / len(dictionary)
+
+
+def estimate_selectivity(condition, stats: Dict[str, ColumnStats], columns: Sequence[str]) -> float:
+    """
+    Stima la frazione di righe per cui la condizione è TRUE
+    
+    Args:
+        condition: Nodo condizione dell'AST
+        stats: Statistiche per colonna
+        columns: Colonne disponibili (per riconoscere i confronti tra colonne)
+    """
+    if isinstance(condition, NullCheck):
+        col_stats = stats.get(condition.column)
+        if col_stats is None:
+            return 0.5
+        null_fraction = 1.0 - col_stats.non_null_fraction
+        return null_fraction if condition.is_null else 1.0 - null_fraction
+    
+    if isinstance(condition, LogicOp):
+        selectivities = [estimate_selectivity(c, stats, columns) for c in condition.conditions]
+        if condition.operator == 'AND':
+            result = 1.0
+            for sel in selectivities:
+                result *= sel
+            return result
+        miss = 1.0
+        for sel in selectivities:
+            miss *= 1.0 - sel
+        return 1.0 - miss
+    
+    if not isinstance(condition, Comparison):
+        return 1.0
+    
+    op = '<>' if condition.operator == '!=' else condition.operator
+    left = stats.get(condition.left)
+    if left is None:
+        return DEFAULT_EQ_SELECTIVITY if op == '=' else DEFAULT_RANGE_SELECTIVITY
+    
+    if _is_column_ref(condition, columns):
+        right = stats.get(condition.right)
+        non_null = left.non_null_fraction * (right.non_null_fraction if right else 1.0)
+        distinct = max(left.distinct_count, right.distinct_count if right else 0, 1)
+        if op == '=':
+            return non_null / distinct
+        if op == '<>':
+            return non_null * (1.0 - 1.0 / distinct)
+        return non_null * DEFAULT_RANGE_SELECTIVITY
+    
+    value = condition.right
+    non_null = left.non_null_fraction
+    
+    if left.frequencies is not None and isinstance(value, str):
+        # Colonna stringa: frequenze esatte per = e <>, dizionario per i range
+        equal = left.frequencies.get(value, 0) / left.row_count if left.row_count else 0.0
+        if op == '=':
+            return equal
+        if op == '<>':
+            return non_null - equal
+        return non_null * _string_range_fraction(op, value, left.dictionary or [])
+    
+    if left.min_value is not None and isinstance(value, (int, float)):
+        in_range = left.min_value <= value <= left.max_value
+        equal = non_null / max(left.distinct_count, 1) if in_range else 0.0
+        if op == '=':
+            return equal
+        if op == '<>':
+            return non_null - equal
+        return non_null * _numeric_range_fraction(op, float(value), left)
+    
+    if op == '=':
+        return non_null * DEFAULT_EQ_SELECTIVITY
+    if op == '<>':
+        return non_null * (1.0 - DEFAULT_EQ_SELECTIVITY)
+    return non_null * DEFAULT_RANGE_SELECTIVITY
+
+
+def estimate_cost(condition, stats: Dict[str, ColumnStats], columns: Sequence[str]) -> float:
+    """
+    Stima il costo di valutazione di una condizione per riga
+    
+    Foglie: un'unità per operando caricato più una per ogni controllo di
+    validità. LogicOp: costo atteso con short-circuit nell'ordine ottimale.
+    """
+    if isinstance(condition, NullCheck):
+        return 1.0
+    
+    if isinstance(condition, Comparison):
+        operands = [condition.left]
+        if _is_column_ref(condition, columns):
+            operands.append(condition.right)
+        nullable = sum(1 for col in operands if col in stats and stats[col].null_count > 0)
+        return float(len(operands) + nullable)
+    
+    if isinstance(condition, LogicOp):
+        return _plan_logic_op(condition, stats, columns)[0]
+    
+    return 1.0
+
+
+def order_conditions(node: LogicOp, stats: Dict[str, ColumnStats], columns: Sequence[str]) -> list:
+    """
+    Ordina i figli di un AND/OR per minimizzare il costo atteso con short-circuit
+    
+    AND: ordine crescente di costo / (1 - selettività), cioè prima i predicati
+    economici che scartano più righe. OR: ordine crescente di costo / selettività.
+    L'ordinamento è stabile: a parità di rango resta l'ordine della query.
+    """
+    return _plan_logic_op(node, stats, columns)[1]
+
+
+def _plan_logic_op(node: LogicOp, stats: Dict[str, ColumnStats],
+                   columns: Sequence[str]) -> Tuple[float, list]:
+    """
+    Costo atteso e ordine dei figli di un AND/OR
+    
+    Costo e selettività di ogni figlio vengono stimati una sola volta e
+    riusati per rango e costo: ricalcolarli renderebbe la stima
+    esponenziale nella profondità delle condizioni annidate.
+    """
+    ranked = []
+    for child in node.conditions:
+        cost = estimate_cost(child, stats, columns)
+        sel = estimate_selectivity(child, stats, columns)
+        stop_probability = 1.0 - sel if node.operator == 'AND' else sel
+        rank = cost / stop_probability if stop_probability > 0.0 else float('inf')
+        ranked.append((rank, cost, sel, child))
+    ranked.sort(key=lambda item: item[0])
+    
+    total = 0.0
+    reach = 1.0
+    for _, cost, sel, _ in ranked:
+        total += reach * cost
+        reach *= sel if node.operator == 'AND' else 1.0 - sel
+    return total, [child for *_, child in ranked]
@@ -0,0 +1,240 @@
+"""
+Zone Map: riassunti min/max per blocco dei CSV
+Il file è diviso in zone di byte allineate ai record; per ogni zona e
+colonna numerica vengono registrati minimo, massimo e numero di NULL, così
+lo scan salta le zone in cui il WHERE non può essere vero. Su richiesta
+(zone_map_cache) zone e riassunti vengono salvati in <tabella>.csv.gzone
+accanto al CSV e riusati tra processi; se il CSV cresce solo in coda
+restano validi quelli delle zone già complete
+"""
+
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .ast_nodes import Comparison, NullCheck, LogicOp
+from .column_store import source_fingerprint
+from .sidecar import read_manifest, write_sidecar
+
+
+# Dimensione indicativa di una zona (al più CSVScanner.CHUNK_BYTES)
+ZONE_BYTES = 512 * 1024
+
+SUFFIX = ".gzone"
+MAGIC = b"GZON"
+VERSION = 1
+
+# Byte all'inizio e alla fine della versione salvata del CSV confrontati
+# (crc32) per riconoscere un file cresciuto solo in coda
+CHECK_BYTES = 64 * 1024
+
+# Zone dei dati da un offset (inizio di un record; None = dopo l'header)
+ZoneSplitter = Callable[[Optional[int]], List[Tuple[int, int]]]
+
+
+def zone_map_path(csv_path) -> Path:
+    """Path della zone map di un CSV (es. eventi.csv.gzone)"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.name + SUFFIX)
+
+
+def _content_check(csv_path, size: int) -> Dict[str, int]:
+    """crc32 dei primi e degli ultimi CHECK_BYTES byte tra i primi `size` byte del file"""
+    with open(csv_path, 'rb') as f:
+        head = f.read(min(size, CHECK_BYTES))
+        f.seek(max(0, size - CHECK_BYTES))
+        tail = f.read(min(size, CHECK_BYTES))
+    return {'head': zlib.crc32(head), 'tail': zlib.crc32(tail)}
+
+
+@dataclass(frozen=True)
+class ZoneSummary:
+    """Minimo, massimo (None se tutta NULL), NULL e righe di una colonna in una zona"""
+    min: Optional[float]
+    max: Optional[float]
+    null_count: int
+    rows: int
+    
+    def merge(self, other: "ZoneSummary") -> "ZoneSummary":
+        """Riassunto dell'unione di due parti della stessa zona"""
+        bounds = [value for value in (self.min, other.min, self.max, other.max) if value is not None]
+        return ZoneSummary(min(bounds) if bounds else None, max(bounds) if bounds else None,
+                           self.null_count + other.null_count, self.rows + other.rows)
+
+
+def summarize_cells(cells: Sequence[bytes]) -> Optional[ZoneSummary]:
+    """
+    Riassunto di una colonna di celle bytes (b'' = NULL)
+    
+    None se una cella non è un numero (o è NaN): il confronto con un
+    letterale numerico dipende allora dal testo e la zona non si può saltare.
+    """
+    values = cells if all(cells) else [cell for cell in cells if cell]
+    try:
+        numbers = list(map(float, values))
+    except ValueError:
+        return None
+    total = sum(numbers)
+    if total != total:
+        return None  # NaN: min/max non significativi
+    if not numbers:
+        return ZoneSummary(None, None, len(cells), len(cells))
+    return ZoneSummary(min(numbers), max(numbers), len(cells) - len(values), len(cells))
+
+
+def merge_summaries(first: Optional[ZoneSummary], second: Optional[ZoneSummary]) -> Optional[ZoneSummary]:
+    """Unione di due riassunti della stessa zona (None = non numerica)"""
+    if first is None or second is None:
+        return None
+    return first.merge(second)
+
+
+def zone_may_match(condition, summaries: Dict[str, Optional[ZoneSummary]]) -> bool:
+    """
+    False solo se nessuna riga della zona può soddisfare la condizione
+    
+    Usa i confronti tra una colonna e un letterale numerico e i NULL check,
+    combinati con AND/OR; tutto il resto (letterali stringa, confronti tra
+    colonne, colonne senza riassunto) è conservativamente vero. Un
+    confronto con NULL è falso, come nella valutazione delle righe.
+    """
+    if isinstance(condition, LogicOp):
+        results = (zone_may_match(child, summaries) for child in condition.conditions)
+        return all(results) if condition.operator == 'AND' else any(results)
+    
+    if isinstance(condition, NullCheck):
+        summary = summaries.get(condition.column)
+        if summary is None:
+            return True
+        if condition.is_null:
+            return summary.null_count > 0
+        return summary.null_count < summary.rows
+    
+    if not isinstance(condition, Comparison) or isinstance(condition.right, str):
+        return True
+    summary = summaries.get(condition.left)
+    if summary is None:
+        return True
+    if summary.min is None:
+        return False  # Solo NULL
+    
+    literal, low, high = condition.right, summary.min, summary.max
+    if condition.operator == '=':
+        return low <= literal <= high
+    if condition.operator in ('<>', '!='):
+        return not (low == high == literal)
+    if condition.operator == '<':
+        return low < literal
+    if condition.operator == '<=':
+        return low <= literal
+    if condition.operator == '>':
+        return high > literal
+    if condition.operator == '>=':
+        return high >= literal
+    return True
+
+
+class ZoneMap:
+    """
+    Zone di un CSV e riassunti per colonna (nomi del CSV)
+    
+    Le zone sono fissate alla prima lettura del file; i riassunti di una
+    colonna vengono aggiunti quando una zona viene letta per intero con
+    quella colonna caricata. Vive nella voce del catalogo della tabella e
+    nel file .gzone (open() / save()): se il CSV è cresciuto in coda,
+    open() tiene le zone che finiscono prima della vecchia dimensione con i
+    loro riassunti e divide in zone solo la parte nuova; ogni altra modifica
+    del CSV scarta zone e riassunti.
+    """
+    
+    def __init__(self, zones: Sequence[Tuple[int, int]]):
+        self.zones: List[Tuple[int, int]] = list(zones)
+        self.columns: Dict[str, Dict[int, Optional[ZoneSummary]]] = {}
+        self.csv_path: Optional[Path] = None
+        self.source: Optional[Dict[str, int]] = None
+        self.dirty = True
+    
+    def __len__(self) -> int:
+        return len(self.zones)
+    
+    def record(self, zone: int, column: str, summary: Optional[ZoneSummary]):
+        self.columns.setdefault(column, {})[zone] = summary
+        self.dirty = True
+    
+    def has_summary(self, zone: int, column: str) -> bool:
+        return zone in self.columns.get(column, {})
+    
+    def select(self, condition) -> List[int]:
+        """Indici delle zone in cui la condizione può essere vera"""
+        if condition is None:
+            return list(range(len(self.zones)))
+        return [zone for zone in range(len(self.zones))
+                if zone_may_match(condition, {column: summaries[zone]
+                                              for column, summaries in self.columns.items()
+                                              if zone in summaries})]
+    
+    @classmethod
+    def open(cls, csv_path, split: ZoneSplitter) -> "ZoneMap":
+        """
+        Zone map del CSV dal file .gzone, aggiornata alle righe aggiunte in
+        coda; nuova (zone da split) se manca, è corrotta o il CSV è cambiato
+        """
+        csv_path = Path(csv_path)
+        source = source_fingerprint(csv_path)
+        manifest = cls._read_manifest(zone_map_path(csv_path))
+        zone_map = None
+        if manifest is not None:
+            saved = manifest['source']
+            zones = [tuple(zone) for zone in manifest['zones']]
+            if saved == source:
+                zone_map = cls(zones)
+                kept = len(zones)
+            elif (saved['size'] < source['size']
+                  and _content_check(csv_path, saved['size']) == manifest['check']):
+                # Aggiunta in coda: l'ultima zona salvata può finire con un record incompleto
+                kept = sum(1 for _, end in zones if end < saved['size'])
+                zone_map = cls(zones[:kept] + split(zones[kept - 1][1] if kept else None))
+            if zone_map is not None:
+                for column, summaries in manifest['columns'].items():
+                    for zone, *fields in summaries:
+                        if zone < kept:
+                            zone_map.record(zone, column, ZoneSummary(*fields) if fields else None)
+                zone_map.dirty = saved != source
+        if zone_map is None:
+            zone_map = cls(split(None))
+        zone_map.csv_path, zone_map.source = csv_path, source
+        return zone_map
+    
+    @staticmethod
+    def _read_manifest(path: Path) -> Optional[dict]:
+        """Manifest del file .gzone; None se manca o non è valido"""
+        try:
+            with open(path, 'rb') as f:
+                header = read_manifest(f, MAGIC)
+        except OSError:
+            return None
+        if header is None or header[0].get('version') != VERSION:
+            return None
+        return header[0]
+    
+    def save(self):
+        """
+        Scrive zone e riassunti nel file .gzone se cambiati (atomico, best
+        effort: una directory in sola lettura non deve bloccare la query)
+        """
+        if not self.dirty or self.csv_path is None:
+            return
+        columns = {column: [[zone] if summary is None else
+                            [zone, summary.min, summary.max, summary.null_count, summary.rows]
+                            for zone, summary in sorted(summaries.items())]
+                   for column, summaries in self.columns.items()}
+        try:
+            write_sidecar(zone_map_path(self.csv_path), MAGIC, {
+                'version': VERSION, 'source': self.source,
+                'check': _content_check(self.csv_path, self.source['size']),
+                'zones': self.zones, 'columns': columns,
+            }, mode_from=self.csv_path)
+        except OSError:
+            return
+        self.dirty = False
@@ -0,0 +1,97 @@
+"""
+Test per il catalogo delle tabelle condiviso da analyzer e code generator
+"""
+import os
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.catalog import TableCatalog, join_column_names
+from src.compiler import GomorraCompiler
+from src.semantic_analyzer import SemanticError
+
+
+def test_catalog_shared_and_sampled_once():
+    """Test che header e tipi vengano letti una sola volta per tutte le query"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "persone.csv").write_text("nome,eta\nCiro,30\nGenny,17\nPatrizia,\n")
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        assert compiler.semantic_analyzer.catalog is compiler.catalog
+        assert compiler.codegen.catalog is compiler.catalog
+        
+        query = 'RIPIGLIAMMO nome MMIEZ \'A "persone.csv" arò eta > 18'
+        assert compiler.compile_and_run(query) == [{'nome': 'Ciro'}]
+        assert 'type_inference' in compiler.last_profile.phases
+        misses = compiler.catalog.misses
+        
+        assert compiler.compile_and_run(query) == [{'nome': 'Ciro'}]
+        assert 'type_inference' not in compiler.last_profile.phases
+        assert compiler.catalog.misses == misses
+        
+        info = compiler.catalog.table(Path(tmpdir) / "persone.csv")
+        assert info.header == ['nome', 'eta']
+        assert info.type_hints == {'nome': str, 'eta': int}
+        assert info.row_count is None  # Caricamento filtrato dal pushdown
+        
+        compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "persone.csv"')
+        assert info.row_count == 3
+
+
+def test_catalog_invalidated_when_file_changes():
+    """Test che un CSV modificato venga riletto (nuove colonne visibili)"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "persone.csv"
+        path.write_text("nome,eta\nCiro,30\n")
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "persone.csv"')
+        with pytest.raises(SemanticError):
+            compiler.compile_and_run('RIPIGLIAMMO zona MMIEZ \'A "persone.csv"')
+        
+        path.write_text("nome,eta,zona\nCiro,30,Vomero\nGenny,17,Centro\n")
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 10**9))
+        results = compiler.compile_and_run('RIPIGLIAMMO zona MMIEZ \'A "persone.csv" arò eta > 18')
+        assert results == [{'zona': 'Vomero'}]
+        assert compiler.codegen.column_types['zona'] == str
+
+
+def test_column_types_not_stale_across_tables():
+    """Test che column_types descriva solo le tabelle dell'ultima query"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "a.csv").write_text("id,prezzo\n1,2.5\n")
+        (Path(tmpdir) / "b.csv").write_text("id,nome\n1,Ciro\n")
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        compiler.compile_and_run('RIPIGLIAMMO prezzo MMIEZ \'A "a.csv"')
+        compiler.codegen._analyze_csv_types(Path(tmpdir) / "a.csv")
+        compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "b.csv"')
+        assert compiler.codegen.column_types == {'id': int, 'nome': str}
+
+
+def test_row_estimate_from_sample():
+    """Test stima delle righe da dimensione del file e campione"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "numeri.csv"
+        path.write_text("n\n" + "".join(f"{i % 10}\n" for i in range(1000)))
+        catalog = TableCatalog(sample_size=50)
+        assert catalog.type_hints(path) == {'n': int}
+        info = catalog.table(path)
+        assert info.sample_rows == 50
+        assert info.row_estimate == 1000
+        assert info.rows == 1000
+
+
+
+def test_join_column_names():
+    """Test dei suffissi con la posizione della tabella per le colonne ripetute"""
+    names = join_column_names([["id", "nome"], ["id", "ruolo"], ["id", "nome", "zona"]])
+    assert names == [
+        {'id': 'id', 'nome': 'nome'},
+        {'id': 'id_2', 'ruolo': 'ruolo'},
+        {'id': 'id_3', 'nome': 'nome_3', 'zona': 'zona'},
+    ]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,96 @@
+"""
+Test per la cache colonnare su disco (.gcol)
+"""
+import os
+import shutil
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.compiler import GomorraCompiler
+from src.column_store import ColumnStore, sidecar_path
+from src.columnar import ColumnarTable, NULL_TYPE
+
+
+QUERY = 'RIPIGLIAMMO nome, eta MMIEZ \'A "guaglioni.csv" arò eta > 18'
+
+
+@pytest.fixture
+def data_dir():
+    """Copia della directory data: i .gcol non finiscono nel repository"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shutil.copy(Path("data") / "guaglioni.csv", tmpdir)
+        yield Path(tmpdir)
+
+
+def test_round_trip():
+    """Test che tipi, NULL, dizionari e testi originali sopravvivano alla cache"""
+    table = ColumnarTable.from_records(
+        ['id', 'prezzo', 'zona', 'vuota'],
+        [['007', '1.50', 'Vomero', ''], ['2', '', 'Centro', ''], ['3', '80.25', '', '']],
+        {'id': int, 'prezzo': float, 'zona': str},
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = Path(tmpdir) / "prezzi.csv"
+        csv_path.write_text("id,prezzo,zona,vuota\n")
+        ColumnStore(csv_path).write(['id', 'prezzo', 'zona', 'vuota'], {'id': int}, table)
+        
+        store = ColumnStore(csv_path)
+        assert store.open()
+        assert store.type_hints == {'id': int}
+        # Dizionari e override in sezioni proprie, non nel manifest
+        sections = {meta['name']: meta['text'] for meta in store._manifest['columns']}
+        assert sections['zona'] is not None and sections['vuota'] is None
+        assert 'dictionary' not in store._manifest['columns'][2]
+        
+        loaded = store.read()
+        assert loaded.schema == {'id': int, 'prezzo': float, 'zona': str, 'vuota': NULL_TYPE}
+        assert loaded.rows(range(3)) == table.rows(range(3))
+        assert list(loaded.column('zona').values) == list(table.column('zona').values)
+        
+        # Solo le colonne richieste, rinominate
+        partial = store.read({'zona': 'zona_2'})
+        assert partial.names == ['zona_2']
+
+
+def test_invalidated_when_csv_changes(data_dir):
+    """Test che la cache venga ricostruita se cambiano dimensione o mtime del CSV"""
+    compiler = GomorraCompiler(data_dir=str(data_dir), column_cache=True)
+    
+    first = compiler.compile_and_run(QUERY)
+    assert sidecar_path(data_dir / "guaglioni.csv").exists()
+    assert compiler.last_profile.info['column_cache'] == {'guaglioni.csv': 'rebuilt'}
+    
+    assert compiler.compile_and_run(QUERY) == first
+    assert compiler.last_profile.info['column_cache'] == {'guaglioni.csv': 'hit'}
+    assert 'type_inference' not in compiler.last_profile.phases
+    
+    # Nuova riga: dimensione e mtime cambiano
+    csv_path = data_dir / "guaglioni.csv"
+    with open(csv_path, 'a') as f:
+        f.write("Totore,Sanità,99\n")
+    stat = csv_path.stat()
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    
+    results = compiler.compile_and_run(QUERY)
+    assert compiler.last_profile.info['column_cache'] == {'guaglioni.csv': 'rebuilt'}
+    assert results[-1] == {'nome': 'Totore', 'eta': '99'}
+
+
+def test_corrupted_cache_is_rebuilt(data_dir):
+    """Test che un .gcol illeggibile venga ignorato e riscritto"""
+    sidecar_path(data_dir / "guaglioni.csv").write_bytes(b"GCOL\xff\xff")
+    
+    compiler = GomorraCompiler(data_dir=str(data_dir), column_cache=True)
+    expected = GomorraCompiler(data_dir=str(data_dir)).compile_and_run(QUERY)
+    
+    assert compiler.compile_and_run(QUERY) == expected
+    assert compiler.last_profile.info['column_cache'] == {'guaglioni.csv': 'rebuilt'}
+    assert ColumnStore(data_dir / "guaglioni.csv").open()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,111 @@
+"""
+Test per la tabella colonnare tipizzata
+"""
+import csv
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.compiler import GomorraCompiler
+from src.columnar import ColumnBuilder, ColumnarTable, NULL_TYPE
+
+
+def test_typed_columns_and_validity():
+    """Test array tipizzati, codici del dizionario e bitmap di validità"""
+    table = ColumnarTable.from_records(
+        ['id', 'peso', 'zona'],
+        [['1', '70.5', 'Vomero'], ['2', '', 'Centro'], ['3', '80', '']],
+        {'id': int, 'peso': float, 'zona': str},
+    )
+    
+    assert len(table) == 3
+    assert table.schema == {'id': int, 'peso': float, 'zona': str}
+    assert table.column('id').values.typecode == 'i'
+    assert table.column('peso').values.typecode == 'd'
+    
+    zona = table.column('zona')
+    assert zona.dictionary == ['Centro', 'Vomero']
+    assert list(zona.values) == [3, 1, 0]       # Codici 2k+1, NULL = 0
+    assert list(zona.validity) == [0b011]
+    assert zona.null_count == 1
+    assert table.column('peso').value(1) is None
+
+
+def test_text_round_trip():
+    """Test che l'output riproduca il testo originale delle celle"""
+    table = ColumnarTable.from_records(
+        ['codice', 'prezzo'],
+        [['007', '1.50'], ['42', '80'], ['-3', '2.25']],
+        {'codice': int, 'prezzo': float},
+    )
+    
+    assert table.rows(range(3)) == [
+        {'codice': '007', 'prezzo': '1.50'},
+        {'codice': '42', 'prezzo': '80'},
+        {'codice': '-3', 'prezzo': '2.25'},
+    ]
+    assert table.column('codice').value(0) == 7
+    assert table.rows([1], ['prezzo']) == [{'prezzo': '80'}]
+
+
+@pytest.mark.parametrize("cells,expected", [
+    (['1', '2', '3.5'], float),
+    (['1', 'abc', '3'], str),
+    (['1', str(2 ** 40)], float),
+    (['', '', '5'], int),
+    (['', ''], NULL_TYPE),
+])
+def test_type_promotion(cells, expected):
+    """Test promozione del tipo quando un valore non è rappresentabile"""
+    builder = ColumnBuilder('col', int if cells[0] else NULL_TYPE)
+    for cell in cells:
+        builder.append(cell)
+    column = builder.finish()
+    
+    assert column.type == expected
+    assert [column.text(i) for i in range(len(cells))] == cells
+
+
+def test_short_records_and_product():
+    """Test record incompleti (NULL) e prodotto cartesiano con colonne rinominate"""
+    left = ColumnarTable.from_records(['id', 'nome'], [['1', 'Ciro'], ['2']], {'id': int, 'nome': str})
+    right = ColumnarTable.from_records(['nome'], [['Genny'], ['Ciro']], {'nome': str})
+    
+    assert left.column('nome').null_count == 1
+    
+    product = ColumnarTable.product(left, right, ['nome_2'])
+    assert product.names == ['id', 'nome', 'nome_2']
+    assert [(r['id'], r['nome'], r['nome_2']) for r in product.rows(range(len(product)))] == [
+        ('1', 'Ciro', 'Genny'), ('1', 'Ciro', 'Ciro'), ('2', '', 'Genny'), ('2', '', 'Ciro'),
+    ]
+
+
+@pytest.mark.parametrize("jit", ['0', '1'])
+def test_promotion_after_type_sample(monkeypatch, jit):
+    """
+    Test colonna che il campione della type inference vede come intera ma
+    contiene testo oltre le prime 100 righe: promossa a stringa, stessi
+    risultati con e senza JIT
+    """
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', jit)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(Path(tmpdir) / "misto.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'codice'])
+            for i in range(150):
+                writer.writerow([i, 'X9' if i == 120 else i])
+        
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        results = compiler.compile_and_run('RIPIGLIAMMO id MMIEZ \'A "misto.csv" arò codice = "X9"')
+        
+        assert isinstance(compiler.codegen.data, ColumnarTable)
+        assert compiler.codegen.column_types['codice'] == str
+        assert results == [{'id': '120'}]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
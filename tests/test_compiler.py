@@ -202,38 +202,25 @@ def test_negative_values(compiler):
     assert len(results) == 0  # Nessuna età negativa
 
 
-def test_comparison_with_float():
+def test_comparison_with_float(tmp_path):
     """Test comparazioni con valori float"""
-    # Crea CSV temporaneo con valori float
-    import tempfile
-    import os
-    
-    csv_content = """nome,altezza
+    (tmp_path / "altezze.csv").write_text("""nome,altezza
 Ciro,1.85
 Genny,1.72
 Patrizia,1.65
-O_Track,1.80"""
-    
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, dir='data') as f:
-        f.write(csv_content)
-        temp_file = f.name
-    
-    try:
-        compiler = GomorraCompiler(data_dir='data')
-        filename = os.path.basename(temp_file)
-        
-        query = f'''
-        RIPIGLIAMMO nome, altezza
-        MMIEZ 'A "{filename}"
-        arò altezza > 1.75
-        '''
-        
-        results = compiler.compile_and_run(query)
-        assert len(results) == 2  # Ciro (1.85) e O_Track (1.80)
-        heights = [float(r['altezza']) for r in results]
-        assert all(h > 1.75 for h in heights)
-    finally:
-        os.unlink(temp_file)
+O_Track,1.80""")
+    compiler = GomorraCompiler(data_dir=str(tmp_path))
+    
+    query = '''
+    RIPIGLIAMMO nome, altezza
+    MMIEZ 'A "altezze.csv"
+    arò altezza > 1.75
+    '''
+    
+    results = compiler.compile_and_run(query)
+    assert len(results) == 2  # Ciro (1.85) e O_Track (1.80)
+    heights = [float(r['altezza']) for r in results]
+    assert all(h > 1.75 for h in heights)
 
 
 def test_comparison_operators(compiler):
@@ -328,35 +315,23 @@ def test_null_check_in_logic_op(compiler):
     assert 'Patrizia' in names
 
 
-def test_all_null_column():
+def test_all_null_column(tmp_path):
     """Test colonna con tutti valori NULL"""
-    import tempfile
-    import os
-    
     # CSV con colonna completamente vuota
-    csv_content = """nome,commento,eta
+    (tmp_path / "commenti.csv").write_text("""nome,commento,eta
 Ciro,,35
 Genny,,19
-Patrizia,,22"""
-    
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, dir='data') as f:
-        f.write(csv_content)
-        temp_file = f.name
-    
-    try:
-        compiler = GomorraCompiler(data_dir='data')
-        filename = os.path.basename(temp_file)
-        
-        query = f'''
-        RIPIGLIAMMO nome, commento
-        MMIEZ 'A "{filename}"
-        arò commento è nisciun
-        '''
-        
-        results = compiler.compile_and_run(query)
-        assert len(results) == 3  # Tutti hanno commento NULL
-    finally:
-        os.unlink(temp_file)
+Patrizia,,22""")
+    compiler = GomorraCompiler(data_dir=str(tmp_path))
+    
+    query = '''
+    RIPIGLIAMMO nome, commento
+    MMIEZ 'A "commenti.csv"
+    arò commento è nisciun
+    '''
+    
+    results = compiler.compile_and_run(query)
+    assert len(results) == 3  # Tutti hanno commento NULL
 
 
 def test_complex_logic_operators(compiler):
@@ -498,6 +473,117 @@ def test_boolean_value_conversion():
     assert result_other == 'somevalue'
 
 
+def test_jit_batch_kernel(compiler, monkeypatch):
+    """Test WHERE valutato dal kernel JIT batch (una chiamata ctypes per batch)"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    query = '''
+    RIPIGLIAMMO nome, eta
+    MMIEZ 'A "guaglioni.csv"
+    arò eta > 18 e eta < 30
+    '''
+    
+    results = compiler.compile_and_run(query)
+    assert compiler.codegen.jit_func is not None
+    assert [r['nome'] for r in results] == ['Genny', 'SangueBlu']
+
+
+@pytest.mark.parametrize("opt_level", [0, 1, 2, 3])
+def test_jit_optimization_levels(monkeypatch, opt_level):
+    """Test che ogni livello di ottimizzazione produca gli stessi risultati JIT"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    compiler = GomorraCompiler(data_dir="data", optimize=opt_level)
+    query = '''
+    RIPIGLIAMMO nome
+    MMIEZ 'A "guaglioni.csv"
+    arò (eta > 18 e eta < 30) o eta = 17
+    '''
+    
+    results = compiler.compile_and_run(query)
+    assert compiler.codegen.jit_func is not None
+    assert [r['nome'] for r in results] == ['Genny', 'O_Track', 'SangueBlu']
+
+
+@pytest.mark.parametrize("condition", [
+    'zona = "Scampia"',
+    'zona <> "Scampia"',
+    'zona = "Posillipo"',
+    'zona > "Forcella"',
+    'zona <= "Scampia" e eta > 18',
+    'nome >= "O" o zona < "D"',
+])
+def test_jit_string_predicates(compiler, monkeypatch, condition):
+    """Test predicati su stringhe nel kernel JIT (codici del dizionario)"""
+    query = f'RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò {condition}'
+    expected = compiler.compile_and_run(query)
+    
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    results = compiler.compile_and_run(query)
+    
+    assert compiler.codegen.jit_func is not None
+    assert results == expected
+
+
+@pytest.mark.parametrize("condition, expected", [
+    ('zona è nisciun', ['Genny', 'Patrizia']),
+    ('zona nun è nisciun e eta < 30', ['O_Track']),
+    ('zona <> "Centro"', ['Ciro']),
+    ('eta < 20', ['Genny', 'O_Track']),
+    ('eta < 20 o zona è nisciun', ['Genny', 'O_Track', 'Patrizia']),
+])
+def test_null_semantics_jit_and_python(compiler, monkeypatch, condition, expected):
+    """Test semantica SQL dei NULL: confronti con NULL non selezionano la riga"""
+    query = f'RIPIGLIAMMO nome MMIEZ \'A "guaglioni_null.csv" arò {condition}'
+    assert [r['nome'] for r in compiler.compile_and_run(query)] == expected
+    
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    results = compiler.compile_and_run(query)
+    assert compiler.codegen.jit_func is not None
+    assert [r['nome'] for r in results] == expected
+
+
+def test_null_distinct_from_zero(monkeypatch, tmp_path):
+    """Test che uno zero reale non sia confuso con NULL nel kernel JIT"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    (tmp_path / "punti.csv").write_text("nome,punti\nCiro,0\nGenny,\nPatrizia,3\n")
+    compiler = GomorraCompiler(data_dir=str(tmp_path))
+    
+    zero = compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "punti.csv" arò punti = 0')
+    assert [r['nome'] for r in zero] == ['Ciro']
+    
+    null = compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "punti.csv" arò punti è nisciun')
+    assert [r['nome'] for r in null] == ['Genny']
+    assert compiler.codegen.jit_func is not None
+
+
+@pytest.mark.parametrize("query_file, expected_rows", [
+    ('queries/05_join_inner.gsql', 4),
+    ('queries/10_join_advanced.gsql', 1),
+])
+def test_jit_column_to_column_join(compiler, monkeypatch, query_file, expected_rows):
+    """Test predicati tra colonne (nome = nome_2) valutati dal kernel JIT"""
+    expected = compiler.run_file(query_file)
+    assert len(expected) == expected_rows
+    
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    results = compiler.run_file(query_file)
+    assert compiler.codegen.jit_func is not None
+    assert results == expected
+    assert all(row['nome'] == row['nome_2'] for row in results)
+
+
+def test_numeric_column_comparison(monkeypatch, tmp_path):
+    """Test confronto tra colonne int/float: numerico (non lessicografico) in entrambi i path"""
+    (tmp_path / "misure.csv").write_text("id,peso,soglia\n1,9,10.5\n2,80,65.5\n3,12,12.0\n")
+    compiler = GomorraCompiler(data_dir=str(tmp_path))
+    query = 'RIPIGLIAMMO id MMIEZ \'A "misure.csv" arò peso >= soglia'
+    
+    assert [r['id'] for r in compiler.compile_and_run(query)] == ['2', '3']
+    
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    assert [r['id'] for r in compiler.compile_and_run(query)] == ['2', '3']
+    assert compiler.codegen.jit_func is not None
+
+
 
 
 
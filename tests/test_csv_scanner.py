@@ -0,0 +1,78 @@
+"""
+Test per lo scanner CSV basato su mmap
+"""
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.csv_scanner as csv_scanner
+from src.compiler import GomorraCompiler
+from src.csv_scanner import CSVScanner
+
+
+def _scan(tmpdir, content: bytes, indices):
+    path = Path(tmpdir) / "dati.csv"
+    path.write_bytes(content)
+    with CSVScanner(path) as scanner:
+        columns = [[] for _ in indices]
+        for block in scanner.scan_columns(indices):
+            for column, cells in zip(columns, block):
+                column.extend(cells)
+        return scanner.header, columns
+
+
+def test_fast_path_and_crlf():
+    """Test blocchi senza virgolette, CRLF, righe vuote e colonne selezionate"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        header, columns = _scan(tmpdir, b"id,nome,zona\r\n1,Ciro,Vomero\r\n\r\n2,Genny,\r\n", [0, 2])
+    
+    assert header == ['id', 'nome', 'zona']
+    assert columns == [[b'1', b'2'], [b'Vomero', b'']]
+
+
+def test_quoted_fields_and_short_rows():
+    """Test virgolette con virgole e newline nei campi, righe corte = NULL"""
+    content = b'id,nota,zona\n1,"ciao, comm\'e\nstai",Centro\n2,"detto ""bello"""\n3,x,Vomero\n'
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _, columns = _scan(tmpdir, content, [0, 1, 2])
+    
+    assert columns == [
+        [b'1', b'2', b'3'],
+        ["ciao, comm'e\nstai".encode(), b'detto "bello"', b'x'],
+        [b'Centro', b'', b'Vomero'],
+    ]
+
+
+def test_chunks_aligned_to_records(monkeypatch):
+    """Test blocchi piccoli: nessun record spezzato, anche se quotato su più righe"""
+    monkeypatch.setattr(csv_scanner, 'CHUNK_BYTES', 7)
+    rows = [f'{i},"riga\n{i}"' if i % 3 == 0 else f'{i},riga {i}' for i in range(50)]
+    content = ("id,testo\n" + "\n".join(rows) + "\n").encode()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _, (ids, texts) = _scan(tmpdir, content, [0, 1])
+    
+    assert ids == [str(i).encode() for i in range(50)]
+    assert texts[3] == b'riga\n3'
+    assert texts[4] == b'riga 4'
+
+
+def test_only_needed_columns_loaded():
+    """Test che vengano caricate solo le colonne di proiezione e WHERE"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "persone.csv").write_text(
+            "id,nome,eta,zona\n1,Ciro,30,Vomero\n2,Genny,17,Centro\n"
+        )
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        results = compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "persone.csv" arò eta > 18')
+        
+        assert results == [{'nome': 'Ciro'}]
+        assert sorted(compiler.codegen.data.names) == ['eta', 'nome']
+        assert compiler.codegen.columns == ['id', 'nome', 'eta', 'zona']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
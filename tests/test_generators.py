@@ -11,6 +11,7 @@ import os
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.compiler import GomorraCompiler
+from src.semantic_analyzer import SemanticError
 
 
 def test_generator_scalability():
@@ -119,5 +120,101 @@ def test_generator_column_headers():
         assert len(compiler.codegen.data) == 0
 
 
+def test_jit_batches_over_large_table(monkeypatch):
+    """
+    Test kernel JIT su più batch: gli indici selezionati devono
+    rispettare l'ordine delle righe anche attraverso i confini dei batch
+    """
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    monkeypatch.setattr('src.llvm_codegen.BATCH_SIZE', 7)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_csv = Path(tmpdir) / "batch.csv"
+        with open(test_csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'valore'])
+            for i in range(100):
+                writer.writerow([i, (i * 37) % 100])
+        
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        results = compiler.compile_and_run(
+            'RIPIGLIAMMO id MMIEZ \'A "batch.csv" arò valore >= 50'
+        )
+        
+        assert compiler.codegen.jit_func is not None
+        expected = [str(i) for i in range(100) if (i * 37) % 100 >= 50]
+        assert [r['id'] for r in results] == expected
+
+
+
+@pytest.mark.parametrize("width", ['1', '8', '16'])
+@pytest.mark.parametrize("batch_size", [64, 7])
+def test_jit_vector_kernel_matches_python(monkeypatch, width, batch_size):
+    """
+    Test kernel SIMD: stesso risultato del fallback Python per ogni
+    larghezza vettoriale, con righe residue, batch non allineati e NULL
+    """
+    monkeypatch.setenv('GOMORRASQL_SIMD_WIDTH', width)
+    monkeypatch.setattr('src.llvm_codegen.BATCH_SIZE', batch_size)
+    query = 'RIPIGLIAMMO id MMIEZ \'A "simd.csv" arò valore >= 50 e peso < 30.5 o zona è nisciun'
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(Path(tmpdir) / "simd.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'valore', 'peso', 'zona'])
+            for i in range(203):
+                valore = '' if i % 11 == 0 else (i * 37) % 100
+                zona = '' if i % 17 == 0 else ['Centro', 'Vomero'][i % 2]
+                writer.writerow([i, valore, (i * 13) % 60 + 0.5, zona])
+        
+        monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '0')
+        expected = GomorraCompiler(data_dir=tmpdir).compile_and_run(query)
+        
+        monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        results = compiler.compile_and_run(query)
+        
+        assert compiler.codegen.vector_width == int(width)
+        assert compiler.codegen.jit_func is not None
+        assert results == expected
+
+
+@pytest.mark.parametrize("jit", ['0', '1'])
+def test_iter_query_streams_batches(monkeypatch, jit):
+    """
+    Test iter_query: la prima riga arriva dopo aver valutato un solo batch,
+    le righe complessive coincidono con compile_and_run
+    """
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', jit)
+    monkeypatch.setattr('src.llvm_codegen.BATCH_SIZE', 7)
+    # Confronto tra colonne: nessun predicato filtrato già nello scanner
+    query = 'RIPIGLIAMMO id MMIEZ \'A "stream.csv" arò valore >= id'
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(Path(tmpdir) / "stream.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'valore'])
+            for i in range(100):
+                writer.writerow([i, (i * 37) % 100])
+        
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        expected = compiler.compile_and_run(query)
+        
+        rows = compiler.iter_query(query)
+        first = next(rows)
+        profile = compiler.last_profile
+        assert first == expected[0]
+        assert profile.phases['row_eval'].calls == 1
+        assert profile.phases['row_eval'].rows == 7
+        
+        assert [first] + list(rows) == expected
+        assert profile.phases['row_eval'].calls == 15
+        assert profile.info['result_rows'] == len(expected)
+        
+        # Gli errori semantici vengono sollevati subito, non al primo next()
+        with pytest.raises(SemanticError, match="non trovata"):
+            compiler.iter_query('RIPIGLIAMMO id MMIEZ \'A "manca.csv"')
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,103 @@
+"""
+Test per la cache dei kernel JIT compilati
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.compiler import GomorraCompiler
+from src.jit_cache import JITCache, ObjectCache, CompiledKernel, ir_fingerprint
+
+
+def test_lru_eviction():
+    """Test che la cache evicti l'elemento usato meno di recente"""
+    cache = JITCache(maxsize=2)
+    cache.put('a', CompiledKernel(None, 1, None))
+    cache.put('b', CompiledKernel(None, 2, None))
+    
+    # 'a' diventa il più recente, quindi viene evictato 'b'
+    assert cache.get('a').func_ptr == 1
+    cache.put('c', CompiledKernel(None, 3, None))
+    
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert cache.cache_info() == (1, 0, 2, 2)
+
+
+def test_ir_fingerprint_ignores_comments():
+    """Test che l'impronta ignori commenti e righe vuote dell'IR"""
+    ir_a = '; ModuleID = "a"\ndefine i1 @"f"()\n{\nentry:\n  ret i1 1\n}\n'
+    ir_b = '; ModuleID = "b"\n\ndefine i1 @"f"()\n{\nentry:\n  ret i1 1\n}'
+    ir_c = '; ModuleID = "a"\ndefine i1 @"f"()\n{\nentry:\n  ret i1 0\n}\n'
+    
+    assert ir_fingerprint(ir_a) == ir_fingerprint(ir_b)
+    assert ir_fingerprint(ir_a) != ir_fingerprint(ir_c)
+
+
+def test_repeated_query_hits_cache(monkeypatch):
+    """Test che una query ripetuta riusi l'engine compilato"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    compiler = GomorraCompiler(data_dir="data")
+    query = 'RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta > 18'
+    
+    first = compiler.compile_and_run(query)
+    second = compiler.compile_and_run(query)
+    compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta < 18')
+    
+    assert first == second
+    info = compiler.jit_cache.cache_info()
+    assert info.hits == 1
+    assert info.misses == 2
+    assert info.currsize == 2
+
+
+def test_cache_disabled(monkeypatch):
+    """Test che jit_cache_size=0 disabiliti la cache senza alterare i risultati"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    compiler = GomorraCompiler(data_dir="data", jit_cache_size=0)
+    query = 'RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta > 18'
+    
+    assert len(compiler.compile_and_run(query)) == 3
+    assert len(compiler.compile_and_run(query)) == 3
+    assert len(compiler.jit_cache) == 0
+
+
+def test_object_cache_across_compilers(monkeypatch, tmp_path):
+    """Test che un nuovo compilatore (nuovo processo) carichi l'oggetto da disco"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    query = 'RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta >= 19'
+    
+    first = GomorraCompiler(data_dir="data", object_cache_dir=str(tmp_path))
+    expected = first.compile_and_run(query)
+    assert first.object_cache.misses == 1
+    assert len(list(tmp_path.glob('*.o'))) == 1
+    
+    second = GomorraCompiler(data_dir="data", object_cache_dir=str(tmp_path))
+    results = second.compile_and_run(query)
+    assert second.object_cache.hits == 1
+    assert second.codegen.jit_func is not None
+    assert results == expected
+
+
+def test_object_cache_eviction(tmp_path):
+    """Test eviction per dimensione: restano le voci usate più di recente"""
+    import os
+    
+    cache = ObjectCache(str(tmp_path), max_bytes=250)
+    cache.store('a', b'x' * 100)
+    cache.store('b', b'y' * 100)
+    os.utime(tmp_path / 'a.o', (0, 0))  # 'a' è la voce meno recente
+    cache.store('c', b'z' * 100)
+    
+    assert cache.load('a') is None
+    assert cache.load('b') == b'y' * 100
+    assert cache.load('c') == b'z' * 100
+    # Nessun file temporaneo lasciato dagli scrittori
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,351 @@
+"""
+Test per le strategie di join (hash join sulle uguaglianze tra colonne)
+"""
+import random
+import tempfile
+import tracemalloc
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import join, join_planner, llvm_codegen
+from src.ast_nodes import Comparison, LogicOp
+from src.columnar import ColumnarTable
+from src.compiler import GomorraCompiler
+from src.join import equi_join_keys, presorted
+from src.join_planner import _greedy_order, choose_join_order, choose_join_strategy
+
+
+def _write_tables(tmpdir: str, rows: int = 60):
+    """Due tabelle con chiavi ripetute, NULL, interi/float e testo misto"""
+    rng = random.Random(7)
+    persone = ["id,nome,peso,codice"]
+    for i in range(rows):
+        nome = '' if i % 11 == 0 else f"N{rng.randint(0, 9)}"
+        peso = '' if i % 7 == 0 else (f"{rng.randint(60, 70)}.0" if i % 2 else str(rng.randint(60, 70)))
+        persone.append(f"{rng.randint(0, 20)},{nome},{peso},{rng.randint(0, 5)}")
+    ruoli = ["id,nome,peso,codice"]
+    for i in range(rows // 2):
+        codice = rng.choice(['1', '2', 'x', '007', ''])
+        ruoli.append(f"{rng.randint(0, 20)},N{rng.randint(0, 12)},{rng.randint(60, 70)},{codice}")
+    (Path(tmpdir) / "persone.csv").write_text("\n".join(persone) + "\n")
+    (Path(tmpdir) / "ruoli.csv").write_text("\n".join(ruoli) + "\n")
+
+
+def test_equi_join_keys_orientation():
+    """Test delle uguaglianze di join: orientate sinistra → destra, solo in AND"""
+    where = LogicOp('AND', [
+        Comparison('nome_2', '=', 'nome'),
+        Comparison('id', '=', 'id_2'),
+        Comparison('eta', '>', 18),
+        LogicOp('OR', [Comparison('zona', '=', 'zona_2'), Comparison('eta', '<', 3)]),
+    ])
+    keys = equi_join_keys(where, ['id', 'nome', 'eta', 'zona'], ['id_2', 'nome_2', 'zona_2'])
+    assert keys == [('nome', 'nome_2'), ('id', 'id_2')]
+    assert equi_join_keys(Comparison('id', '<', 'id_2'), ['id'], ['id_2']) == []
+    assert equi_join_keys(None, ['id'], ['id_2']) == []
+
+
+@pytest.mark.parametrize("where", [
+    "id = id_2",
+    "nome = nome_2",
+    "peso = peso_2 e id > 5",
+    "id_2 = id e nome = nome_2",
+    "codice = codice_2",
+    "id = id_2 e (peso > 65 o nome nun è nisciun)",
+])
+def test_hash_join_matches_product(where, monkeypatch):
+    """Test che l'hash join dia le stesse righe (e lo stesso ordine) del prodotto filtrato"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_tables(tmpdir)
+        query = ("RIPIGLIAMMO id, nome, peso, codice, id_2, nome_2, codice_2 "
+                 f"MMIEZ 'A \"persone.csv\" pesc e pesc \"ruoli.csv\" arò {where}")
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        joined = compiler.compile_and_run(query)
+        assert compiler.last_profile.info['join']['steps'][0]['strategy'] == 'hash'
+        
+        monkeypatch.setattr(llvm_codegen, "join_conditions", lambda *args: [])
+        product = GomorraCompiler(data_dir=tmpdir, optimize=False).compile_and_run(query)
+        assert joined == product
+        assert len(joined) > 0
+
+
+@pytest.mark.parametrize("where", [
+    "id < id_2",
+    "peso >= peso_2 e nome <> nome_2",
+    "codice_2 > codice",
+    "id_2 <= id e peso > 63",
+])
+@pytest.mark.parametrize("spill", [False, True])
+def test_nested_loop_join_matches_product(where, spill, monkeypatch):
+    """Test del block nested-loop join (anche con i blocchi interni su disco)"""
+    if spill:
+        monkeypatch.setattr(join, "INNER_MEMORY_ROWS", 5)
+    monkeypatch.setattr(join, "INNER_BLOCK_ROWS", 7)
+    monkeypatch.setattr(join, "OUTER_BLOCK_ROWS", 9)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_tables(tmpdir)
+        query = ("RIPIGLIAMMO id, nome, peso, codice, id_2, nome_2, peso_2, codice_2 "
+                 f"MMIEZ 'A \"persone.csv\" pesc e pesc \"ruoli.csv\" arò {where}")
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        joined = compiler.compile_and_run(query)
+        info = compiler.last_profile.info['join']['steps'][0]
+        assert info['strategy'] == 'nested_loop'
+        assert info['inner'] == 'ruoli.csv' and info['spilled'] == spill
+        
+        monkeypatch.setattr(llvm_codegen, "join_conditions", lambda *args: [])
+        product = GomorraCompiler(data_dir=tmpdir, optimize=False).compile_and_run(query)
+        assert joined == product
+        assert len(joined) > 0
+
+
+@pytest.mark.parametrize("where", [
+    "id < id_2",
+    "peso >= peso_2 e nome <> nome_2",
+    "codice_2 > codice",
+    "id_2 <= id e peso > 63",
+    "id = id_2 e peso < peso_2",
+    "codice <= id_2 e id_2 < id e nome = nome_2",
+])
+@pytest.mark.parametrize("spill", [False, True])
+def test_sort_merge_join_matches_product(where, spill, monkeypatch):
+    """Test del sort-merge join (anche con l'ordinamento esterno su disco)"""
+    monkeypatch.setattr(join_planner, "HASH_BUILD_MAX_ROWS", 0)
+    monkeypatch.setattr(join_planner, "NESTED_LOOP_MAX_PAIRS", 0)
+    if spill:
+        monkeypatch.setattr(join, "SORT_RUN_ROWS", 6)
+    monkeypatch.setattr(join, "INNER_BLOCK_ROWS", 4)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_tables(tmpdir)
+        query = ("RIPIGLIAMMO id, nome, peso, codice, id_2, nome_2, peso_2, codice_2 "
+                 f"MMIEZ 'A \"persone.csv\" pesc e pesc \"ruoli.csv\" arò {where}")
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        joined = compiler.compile_and_run(query)
+        info = compiler.last_profile.info['join']['steps'][0]
+        assert info['strategy'] == 'sort_merge' and info['spilled'] == spill
+        
+        monkeypatch.setattr(llvm_codegen, "join_conditions", lambda *args: [])
+        product = GomorraCompiler(data_dir=tmpdir, optimize=False).compile_and_run(query)
+        assert joined == product
+        assert len(joined) > 0
+
+
+def test_sort_merge_join_presorted_band():
+    """Test di un band join (inizio <= t e t < fine) su tabelle già ordinate per chiave"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "turni.csv").write_text(
+            "inizio,fine,turno\n" + "".join(f"{i * 10},{i * 10 + 10},T{i}\n" for i in range(2000)))
+        (Path(tmpdir) / "eventi.csv").write_text(
+            "t,evento\n" + "".join(f"{i},E{i}\n" for i in range(0, 20000, 3)))
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        results = compiler.compile_and_run(
+            "RIPIGLIAMMO evento, turno MMIEZ 'A \"eventi.csv\" pesc e pesc \"turni.csv\" "
+            "arò inizio <= t e t < fine")
+        info = compiler.last_profile.info['join']['steps'][0]
+        assert info['strategy'] == 'sort_merge'
+        assert info['presorted'] == ["eventi.csv", "turni.csv"]
+        assert [(row['evento'], row['turno']) for row in results] == [
+            (f"E{i}", f"T{i // 10}") for i in range(0, 20000, 3)]
+
+
+def _sort_merge_peak(run_rows: int, monkeypatch) -> int:
+    """Picco di memoria allocata dal sort-merge join con il lato esterno grande e non ordinato"""
+    monkeypatch.setattr(join, "SORT_RUN_ROWS", run_rows)
+    monkeypatch.setattr(join, "INNER_BLOCK_ROWS", 100)
+    rng = random.Random(3)
+    left = ColumnarTable.from_records(['a'], ([f"{rng.random() * 1000:.3f}"] for _ in range(20000)))
+    right = ColumnarTable.from_records(['b'], ([f"{i * 10}.0"] for i in range(100)))
+    tracemalloc.start()
+    try:
+        left_rows, right_rows, presorted_sides, spilled = join.sort_merge_join(left, right, [('a', '=', 'b')])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert presorted_sides == (False, True) and spilled == (run_rows < 20000)
+    assert all(left.column('a').value(l) == right.column('b').value(r)
+               for l, r in zip(left_rows, right_rows))
+    return peak
+
+
+def test_sort_merge_external_sort_bounds_memory(monkeypatch):
+    """Test che l'ordinamento esterno non tenga in memoria le chiavi di tutto il lato esterno"""
+    in_memory = _sort_merge_peak(10 ** 6, monkeypatch)
+    assert _sort_merge_peak(1000, monkeypatch) < in_memory / 2
+
+
+@pytest.mark.parametrize("run_rows", [10 ** 6, 100])
+def test_sort_merge_large_output_bounds_memory(run_rows, monkeypatch):
+    """Test che le coppie vadano dritte nel risultato: picco vicino alla dimensione dell'output"""
+    monkeypatch.setattr(join, "SORT_RUN_ROWS", run_rows)
+    rng = random.Random(5)
+    left = ColumnarTable.from_records(['a'], ([str(rng.randint(0, 10 ** 6))] for _ in range(800)))
+    right = ColumnarTable.from_records(['b'], ([str(rng.randint(0, 10 ** 6))] for _ in range(600)))
+    tracemalloc.start()
+    try:
+        left_rows, right_rows, _, spilled = join.sort_merge_join(left, right, [('a', '<', 'b')])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Run interni e ordinamento esterno del lato esterno con run_rows = 100
+    assert spilled == (run_rows < 800)
+    pairs = list(zip(left_rows, right_rows))
+    assert len(pairs) > 200_000 and pairs == sorted(pairs)
+    assert all(left.column('a').value(l) < right.column('b').value(r) for l, r in pairs[::97])
+    output = left_rows.itemsize * len(left_rows) + right_rows.itemsize * len(right_rows)
+    assert peak < 1.5 * output
+
+
+def test_presorted():
+    """Test del riconoscimento dell'ordinamento: campione, poi verifica completa"""
+    keys = list(range(5000))
+    assert presorted(keys) and presorted([]) and presorted([3, 3, 4])
+    assert not presorted(keys[::-1])
+    # Scambio tra due posizioni fuori dal campione: lo scopre la verifica completa
+    keys[2501], keys[2502] = keys[2502], keys[2501]
+    assert not presorted(keys)
+
+
+def test_choose_join_strategy():
+    """Test della strategia per JOIN: hash, sort-merge, nested loop o prodotto"""
+    equal, less, different = ('a', '=', 'b'), ('a', '<', 'b'), ('a', '<>', 'b')
+    assert choose_join_strategy([], 10, 10) == 'product'
+    assert choose_join_strategy([equal, less], 10 ** 6, 10 ** 7) == 'hash'
+    assert choose_join_strategy([equal], 10 ** 8, 10 ** 8) == 'sort_merge'
+    assert choose_join_strategy([less], 100, 100) == 'nested_loop'
+    assert choose_join_strategy([less], 10 ** 4, 10 ** 4) == 'sort_merge'
+    assert choose_join_strategy([different], 10 ** 4, 10 ** 4) == 'nested_loop'
+
+
+def _nested_loop_peak(spill: bool, monkeypatch) -> int:
+    """Picco di memoria allocata dal nested loop (tabelle già caricate)"""
+    monkeypatch.setattr(join, "INNER_MEMORY_ROWS", 0 if spill else 10 ** 9)
+    monkeypatch.setattr(join, "INNER_BLOCK_ROWS", 200)
+    monkeypatch.setattr(join, "OUTER_BLOCK_ROWS", 100)
+    # Lato esterno quasi tutto NULL e poche coppie: conta la memoria delle chiavi
+    left = ColumnarTable.from_records(['a'], (['4990' if i % 500 == 0 else ''] for i in range(5000)))
+    right = ColumnarTable.from_records(['b'], ([f"{i}.5"] for i in range(5000)))
+    tracemalloc.start()
+    try:
+        left_rows, _, spilled = join.nested_loop_join(left, right, [('a', '<', 'b')])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert spilled == spill and len(left_rows) > 0
+    return peak
+
+
+def test_nested_loop_spill_bounds_memory(monkeypatch):
+    """Test che con i blocchi interni su disco le chiavi interne non restino tutte in memoria"""
+    in_memory = _nested_loop_peak(False, monkeypatch)
+    assert _nested_loop_peak(True, monkeypatch) < in_memory / 2
+
+
+def test_join_without_cross_condition_is_product():
+    """Test che senza confronti tra colonne dei due lati resti il prodotto cartesiano"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_tables(tmpdir, rows=10)
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        results = compiler.compile_and_run(
+            "RIPIGLIAMMO id, id_2 MMIEZ 'A \"persone.csv\" pesc e pesc \"ruoli.csv\" arò id < 5 o id_2 < 5")
+        assert 'join' not in compiler.last_profile.info
+        assert all(int(row['id']) < 5 or int(row['id_2']) < 5 for row in results)
+
+
+def _write_star(tmpdir: str):
+    """Tabella dei fatti con tre dimensioni (chiavi id ripetute nei nomi)"""
+    rng = random.Random(11)
+    vendite = ["id,cliente,prodotto,zona,importo"]
+    for i in range(300):
+        cliente = '' if i % 23 == 0 else str(rng.randint(1, 12))
+        vendite.append(f"{i},{cliente},{rng.randint(1, 8)},{rng.randint(1, 4)},{rng.randint(1, 100)}")
+    (Path(tmpdir) / "vendite.csv").write_text("\n".join(vendite) + "\n")
+    (Path(tmpdir) / "clienti.csv").write_text(
+        "id,nome\n" + "".join(f"{i},C{i % 5}\n" for i in range(1, 11)))
+    (Path(tmpdir) / "prodotti.csv").write_text(
+        "id,nome,prezzo\n" + "".join(f"{i},P{i},{i * 10}\n" for i in range(1, 9)))
+    (Path(tmpdir) / "zone.csv").write_text("id,citta\n1,Napoli\n2,Caserta\n3,Salerno\n")
+
+
+@pytest.mark.parametrize("where", [
+    "cliente = id_2 e prodotto = id_3 e zona = id_4",
+    "zona = id_4 e prodotto = id_3 e cliente = id_2 e citta = \"Napoli\" e nome = \"C1\"",
+    "cliente = id_2 e importo > prezzo e zona = id_4",
+    "prodotto = id_3 e id_4 < 3",
+])
+def test_multi_way_join_matches_product(where, monkeypatch):
+    """Test di una JOIN a quattro tabelle: stesso risultato (e ordine) del prodotto filtrato"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_star(tmpdir)
+        query = ("RIPIGLIAMMO id, nome, nome_3, prezzo, citta, importo "
+                 "MMIEZ 'A \"vendite.csv\" pesc e pesc \"clienti.csv\" "
+                 f"pesc e pesc \"prodotti.csv\" pesc e pesc \"zone.csv\" arò {where}")
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        joined = compiler.compile_and_run(query)
+        info = compiler.last_profile.info['join']
+        assert sorted(info['order']) == ["clienti.csv", "prodotti.csv", "vendite.csv", "zone.csv"]
+        assert len(info['steps']) == 3
+        
+        monkeypatch.setattr(llvm_codegen, "join_conditions", lambda *args: [])
+        product = GomorraCompiler(data_dir=tmpdir, optimize=False).compile_and_run(query)
+        assert joined == product
+        assert len(joined) > 0
+
+
+def test_choose_join_order():
+    """Test del join planner: prima le JOIN selettive, niente prodotti inutili"""
+    # Catena 0 - 1 - 2: la tabella grande 0 si unisce per ultima
+    edges = [(0, 1, 1 / 1000), (1, 2, 1 / 10)]
+    assert choose_join_order([100000, 1000, 10], edges) == [1, 2, 0]
+    # Senza archi resta l'ordine della query a parità di costo
+    assert choose_join_order([5, 5, 5], []) == [0, 1, 2]
+    # Greedy oltre DP_MAX_TABLES: stessa scelta sulla catena
+    assert _greedy_order([100000, 1000, 10], {(0, 1): 1 / 1000, (1, 2): 1 / 10}) == [2, 1, 0]
+
+
+def test_join_loads_unreferenced_table():
+    """Test di una JOIN in cui una tabella non compare né in proiezione né nel WHERE"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_star(tmpdir)
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        results = compiler.compile_and_run(
+            "RIPIGLIAMMO citta MMIEZ 'A \"zone.csv\" pesc e pesc \"prodotti.csv\"")
+        assert len(results) == 3 * 8
+
+
+@pytest.mark.parametrize("where", [
+    "id = id_2 e peso > 65 e nome_2 <> \"N3\"",
+    "codice_2 nun è nisciun e id < id_2 e (peso < 62 o peso > 68)",
+    "nome = \"N1\" e nome_2 <> \"N1\"",
+])
+def test_pushdown_below_join(where, monkeypatch):
+    """Test che i predicati di una sola tabella la filtrino prima della JOIN"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_tables(tmpdir)
+        query = ("RIPIGLIAMMO id, nome, peso, id_2, nome_2, codice_2 "
+                 f"MMIEZ 'A \"persone.csv\" pesc e pesc \"ruoli.csv\" arò {where}")
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        pushed = compiler.compile_and_run(query)
+        loaded = compiler.last_profile.phases['csv_load'].rows
+        
+        monkeypatch.setattr(llvm_codegen.LLVMCodeGenerator, "_pushdown_predicates",
+                            lambda self, ast, columns: [])
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        assert compiler.compile_and_run(query) == pushed
+        assert loaded < compiler.last_profile.phases['csv_load'].rows == 60 + 30
+        assert len(pushed) > 0
+
+
+def test_pushdown_below_join_uses_index():
+    """Test dell'indice secondario su una colonna rinominata nella JOIN (id_2 → id)"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_tables(tmpdir)
+        rows = ["id,ruolo"] + [f"{i},R{i % 3}" for i in range(200)]
+        (Path(tmpdir) / "ruoli.csv").write_text("\n".join(rows) + "\n")
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        compiler.create_index("ruoli.csv", "id")
+        results = compiler.compile_and_run(
+            "RIPIGLIAMMO nome, ruolo MMIEZ 'A \"persone.csv\" pesc e pesc \"ruoli.csv\" arò id = id_2 e id_2 = 7")
+        assert compiler.last_profile.info['index']['ruoli.csv']['column'] == 'id'
+        assert {row['ruolo'] for row in results} == {'R1'}
@@ -48,6 +48,13 @@ def get_llvm_ir(query: str, setup_compiler) -> str:
     return compilation_result.llvm_ir
 
 
+def get_function_ir(ir_code: str, name: str) -> str:
+    """Helper che estrae il testo di una singola funzione dal modulo IR"""
+    start = ir_code.rindex('define', 0, ir_code.index(f'@"{name}"('))
+    end = ir_code.index('\n}', start)
+    return ir_code[start:end + 2]
+
+
 
 # ============================================================================
 # TEST: Operatori di Confronto
@@ -169,8 +176,10 @@ def test_llvm_logic_and(setup_compiler):
     assert ir_code.count('icmp sgt') >= 1  # eta > 18
     assert ir_code.count('icmp slt') >= 1  # eta < 30
     
-    # Verifica operatore AND bitwise
-    assert 'and i1' in ir_code
+    # Verifica AND short-circuit: salto condizionale e phi nel blocco di uscita
+    assert 'and_end:' in ir_code
+    assert 'br i1' in ir_code
+    assert 'phi  i1 [0,' in ir_code
 
 
 def test_llvm_logic_or(setup_compiler):
@@ -187,8 +196,9 @@ def test_llvm_logic_or(setup_compiler):
     assert 'icmp slt' in ir_code  # eta < 20
     assert 'icmp sgt' in ir_code  # eta > 30
     
-    # Verifica operatore OR bitwise
-    assert 'or i1' in ir_code
+    # Verifica OR short-circuit: esce con 1 appena un figlio è vero
+    assert 'or_end:' in ir_code
+    assert 'phi  i1 [1,' in ir_code
 
 
 def test_llvm_logic_complex(setup_compiler):
@@ -205,9 +215,9 @@ def test_llvm_logic_complex(setup_compiler):
     param_count = ir_code.count('i32 %')
     assert param_count >= 2  # Almeno eta e uno tra zona/nome
     
-    # Verifica operatori logici
-    assert 'and i1' in ir_code  # AND interno
-    assert 'or i1' in ir_code   # OR esterno
+    # Verifica operatori logici (short-circuit)
+    assert 'and_end:' in ir_code  # AND interno
+    assert 'or_end:' in ir_code   # OR esterno
     
     # Verifica confronti
     assert 'icmp sgt' in ir_code  # eta > 18
@@ -235,6 +245,28 @@ def test_llvm_null_check_is_null(setup_compiler):
     # In futuro dovrebbe contenere: icmp eq ptr null
 
 
+def test_llvm_null_validity_bitmap(setup_compiler):
+    """Test NULL: flag di validità in evaluate_row e bitmap nel kernel batch"""
+    query = '''
+    RIPIGLIAMMO nome, zona
+    MMIEZ 'A "guaglioni_null.csv"
+    arò zona è nisciun o eta > 18
+    '''
+    
+    ir_code = get_llvm_ir(query, setup_compiler)
+    row_func = get_function_ir(ir_code, 'evaluate_row')
+    kernel = get_function_ir(ir_code, 'evaluate_batch')
+    
+    # zona ed eta hanno NULL: due flag i1 dopo i valori
+    assert 'define i1 @"evaluate_row"(i32 %".1", i32 %".2", i1 %".3", i1 %".4")' in row_func
+    # IS NULL = NOT valid, confronto mascherato dalla validità (UNKNOWN → false)
+    assert 'xor i1 %".3", 1' in row_func
+    assert 'and i1 %".4"' in row_func
+    # Il kernel estrae il bit i%8 del byte i/8
+    assert 'lshr i64 %"idx", 3' in kernel
+    assert 'i8*' in kernel
+
+
 def test_llvm_null_check_is_not_null(setup_compiler):
     """Test generazione IR per controllo IS NOT NULL"""
     query = '''
@@ -304,7 +336,76 @@ def test_llvm_multiple_columns_different_values(setup_compiler):
     assert 'i32 %' in ir_code  # eta
     
     # Verifica operatore AND
-    assert 'and i1' in ir_code
+    assert 'and_end:' in ir_code
+
+
+def test_llvm_string_dictionary_codes(setup_compiler):
+    """Test stringhe: letterale risolto a compile time nel codice del dizionario"""
+    query = '''
+    RIPIGLIAMMO nome, zona
+    MMIEZ 'A "guaglioni.csv"
+    arò zona = "Scampia" o zona = "Posillipo"
+    '''
+    
+    ir_code = get_function_ir(get_llvm_ir(query, setup_compiler), 'evaluate_row')
+    
+    # Dizionario ordinato: Centro, Forcella, Scampia, Secondigliano
+    # "Scampia" (posizione 2) → 5, "Posillipo" assente (inserimento in 2) → 4
+    assert 'icmp eq i32 %".1", 5' in ir_code
+    assert 'icmp eq i32 %".1", 4' in ir_code
+
+
+def test_llvm_column_to_column_comparison(setup_compiler):
+    """Test confronto tra colonne stringa: due parametri, nessuna costante"""
+    query = '''
+    RIPIGLIAMMO nome, nome_2
+    MMIEZ 'A "guaglioni.csv"
+    pesc e pesc "ruoli.csv"
+    arò nome = nome_2
+    '''
+    
+    ir_code = get_llvm_ir(query, setup_compiler)
+    row_func = get_function_ir(ir_code, 'evaluate_row')
+    
+    # nome, nome_2 e nome_2 ricodificato nel dizionario di nome
+    assert 'define i1 @"evaluate_row"(i32 %".1", i32 %".2", i32 %".3")' in row_func
+    assert 'icmp eq i32 %".1", %".3"' in row_func
+
+
+def test_llvm_int_float_promotion():
+    """Test promozione int → double nei confronti misti"""
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "misure.csv").write_text("id,peso,soglia\n1,70,65.5\n2,80,82.5\n")
+        parser = GomorraParser()
+        codegen = LLVMCodeGenerator(data_dir=tmpdir, optimize=False)
+        
+        ir_code = codegen.get_ir(parser.parse(
+            'RIPIGLIAMMO id MMIEZ \'A "misure.csv" arò peso > soglia o id >= 1.5'
+        )).llvm_ir
+        
+        assert 'sitofp i32' in ir_code
+        assert 'fcmp ogt double' in ir_code
+        assert 'fcmp oge double' in ir_code
+
+
+@pytest.mark.parametrize("where", ["a < 3000000000", "a > -3000000000", "a <= 2147483648"])
+def test_llvm_int_literal_outside_i32(where, monkeypatch):
+    """Test letterali interi fuori da i32: stesso risultato con e senza JIT"""
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "numeri.csv").write_text("a\n2147483647\n-2147483648\n-5\n10\n")
+        query = f'RIPIGLIAMMO a MMIEZ \'A "numeri.csv" arò {where}'
+        
+        monkeypatch.setenv("GOMORRASQL_ENABLE_JIT", "0")
+        expected = GomorraCompiler(data_dir=tmpdir, optimize=False).compile_and_run(query)
+        monkeypatch.setenv("GOMORRASQL_ENABLE_JIT", "1")
+        compiler = GomorraCompiler(data_dir=tmpdir, optimize=False)
+        assert compiler.compile_and_run(query) == expected
+        assert compiler.last_profile.info['jit'] in ('compiled', 'object_cache', 'memory_cache')
+        assert len(expected) == 4
 
 
 # ============================================================================
@@ -334,24 +435,45 @@ def test_llvm_basic_structure(setup_compiler):
     assert 'ret i1' in ir_code
 
 
-def test_llvm_single_basic_block(setup_compiler):
-    """Test che venga generato un solo basic block (nessun branching)"""
+def test_llvm_short_circuit_blocks(setup_compiler):
+    """Test struttura short-circuit: un salto per figlio e nessun branch senza AND/OR"""
+    # Condizione singola: un solo basic block, nessun branch
+    single = get_function_ir(get_llvm_ir('''
+    RIPIGLIAMMO nome, eta
+    MMIEZ 'A "guaglioni.csv"
+    arò eta > 18
+    ''', setup_compiler), 'evaluate_row')
+    assert single.count(':\n') == 1
+    assert 'br ' not in single
+    
     query = '''
     RIPIGLIAMMO nome, eta
     MMIEZ 'A "guaglioni.csv"
     arò (eta > 18 e eta < 30) o nome = "Ciro"
     '''
     
-    ir_code = get_llvm_ir(query, setup_compiler)
+    ir_code = get_function_ir(get_llvm_ir(query, setup_compiler), 'evaluate_row')
     
-    # Verifica un solo entry block (no branching)
-    assert ir_code.count('entry:') == 1
+    # Un salto condizionale per ogni figlio tranne l'ultimo di ciascun operatore
+    assert ir_code.count('br i1') == 2
+    assert ir_code.count('phi') == 2
+    # Nessun operatore bitwise: i figli non vengono valutati tutti
+    assert 'and i1' not in ir_code
+    assert 'or i1' not in ir_code
+
+
+def test_llvm_conditions_ordered_by_selectivity(setup_compiler):
+    """Test ordine dei figli AND: prima il predicato che scarta più righe"""
+    query = '''
+    RIPIGLIAMMO nome, eta
+    MMIEZ 'A "guaglioni.csv"
+    arò eta > 10 e zona = "Scampia"
+    '''
     
-    # Non deve contenere label aggiuntivi o br (branch)
-    assert 'br ' not in ir_code or ir_code.count('br ') <= 1
+    ir_code = get_function_ir(get_llvm_ir(query, setup_compiler), 'evaluate_row')
     
-    # Verifica operatori bitwise invece di branching
-    assert 'and i1' in ir_code or 'or i1' in ir_code
+    # zona = "Scampia" seleziona 1 riga su 4, eta > 10 tutte: zona va valutata prima
+    assert ir_code.index('icmp eq') < ir_code.index('icmp sgt')
 
 
 def test_llvm_function_signature_parametric(setup_compiler):
@@ -372,6 +494,102 @@ def test_llvm_function_signature_parametric(setup_compiler):
     assert '%' in ir_code  # Uso di variabili SSA
 
 
+def test_llvm_batch_kernel(setup_compiler):
+    """Test generazione del kernel batch che itera sui buffer colonnari"""
+    query = '''
+    RIPIGLIAMMO nome, eta
+    MMIEZ 'A "guaglioni.csv"
+    arò eta > 18
+    '''
+    
+    ir_code = get_llvm_ir(query, setup_compiler)
+    kernel = get_function_ir(ir_code, 'evaluate_batch')
+    
+    # Firma: (start, end, buffer eta, selection vector)
+    assert 'define i64 @"evaluate_batch"(i64' in kernel
+    
+    # Loop nativo che chiama evaluate_row e scrive gli indici selezionati
+    assert 'phi' in kernel
+    assert 'call i1 @"evaluate_row"' in kernel
+    assert 'store i64' in kernel
+
+
+def test_llvm_vector_kernel():
+    """Test IR vettoriale: confronti su <8 x i32> e maschere <8 x i1>"""
+    parser = GomorraParser()
+    codegen = LLVMCodeGenerator(data_dir="data", optimize=False, vector_width=8)
+    ir_code = codegen.get_ir(parser.parse(
+        'RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta > 18 e zona = "Centro"'
+    )).llvm_ir
+    
+    vector = get_function_ir(ir_code, 'evaluate_vector')
+    assert 'define <8 x i1> @"evaluate_vector"(<8 x i32>' in vector
+    assert 'icmp sgt <8 x i32>' in vector
+    # Nessun salto per lane: AND bit a bit tra maschere
+    assert 'and <8 x i1>' in vector
+    assert 'br i1' not in vector
+    
+    # Il kernel usa il loop vettoriale e ricade sul loop scalare per il resto
+    kernel = get_function_ir(ir_code, 'evaluate_batch')
+    assert 'call <8 x i1> @"evaluate_vector"' in kernel
+    assert 'call i1 @"evaluate_row"' in kernel
+    assert 'load <8 x i32>' in kernel
+
+
+def test_llvm_scalar_fallback():
+    """Test vector_width=1: solo kernel scalare, nessun tipo vettoriale"""
+    parser = GomorraParser()
+    codegen = LLVMCodeGenerator(data_dir="data", optimize=False, vector_width=1)
+    result = codegen.get_ir(parser.parse(
+        'RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta > 18'
+    ))
+    
+    assert 'evaluate_vector' not in result.llvm_ir
+    assert ' x i' not in result.llvm_ir
+    assert result.metadata['vector_width'] == 1
+
+
+# ============================================================================
+# TEST: Pipeline di Ottimizzazione
+# ============================================================================
+
+def test_llvm_optimization_levels(setup_compiler):
+    """Test pipeline O0-O3: statistiche riportate e inlining a partire da O2"""
+    parser, transformer, semantic_analyzer = setup_compiler
+    ast = parser.parse('''
+    RIPIGLIAMMO nome, eta
+    MMIEZ 'A "guaglioni.csv"
+    arò eta > 18 e eta < 30
+    ''')
+    
+    for level in (1, 2, 3):
+        result = LLVMCodeGenerator(data_dir="data", optimize=level).get_ir(ast)
+        stats = result.metadata['optimization']
+        assert result.optimized
+        assert stats['opt_level'] == level
+        assert stats['time_ms'] >= 0
+        assert stats['instructions_before'] > 0
+        assert stats['instructions_after'] > 0
+    
+    # Da O2 evaluate_row viene inlined nel kernel batch
+    optimized_ir = LLVMCodeGenerator(data_dir="data", optimize=True).get_ir(ast).llvm_ir
+    kernel = optimized_ir[optimized_ir.index('@evaluate_batch('):]
+    assert 'call' not in kernel
+    
+    # O0: nessuna pipeline, IR identico a quello generato
+    result = LLVMCodeGenerator(data_dir="data", optimize=0).get_ir(ast)
+    assert not result.optimized
+    assert result.metadata['optimization'] == {}
+
+
+def test_llvm_invalid_optimization_level():
+    """Test livello di ottimizzazione e larghezza vettoriale fuori range"""
+    with pytest.raises(ValueError):
+        LLVMCodeGenerator(data_dir="data", optimize=4)
+    with pytest.raises(ValueError):
+        LLVMCodeGenerator(data_dir="data", vector_width=12)
+
+
 # ============================================================================
 # TEST: Edge Cases
 # ============================================================================
@@ -425,22 +643,14 @@ def test_llvm_parentheses_precedence(setup_compiler):
     assert ir_code.count('icmp') >= 3
     
     # Verifica AND e OR
-    assert 'and i1' in ir_code
-    assert 'or i1' in ir_code
-    
-    # Verifica struttura: AND dovrebbe essere valutato prima di OR
-    # (ordine delle istruzioni SSA)
-    and_line = None
-    or_line = None
-    for i, line in enumerate(ir_code.split('\n')):
-        if 'and i1' in line:
-            and_line = i
-        if 'or i1' in line:
-            or_line = i
-    
-    # AND deve apparire prima di OR nel codice
-    if and_line is not None and or_line is not None:
-        assert and_line < or_line
+    assert 'and_end:' in ir_code
+    assert 'or_end:' in ir_code
+    
+    # Verifica struttura: l'AND tra parentesi è un figlio dell'OR,
+    # quindi il suo blocco di uscita salta a quello dell'OR
+    and_end = ir_code[ir_code.index('and_end:'):]
+    and_end = and_end[:and_end.index('\n', and_end.index('br '))]
+    assert 'or_end' in and_end
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+"""
+Test per il caricamento parallelo dei CSV
+"""
+import csv
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.parallel_load as parallel_load
+from src.columnar import Column, ColumnarTable
+from src.compiler import GomorraCompiler
+from src.csv_scanner import CSVScanner
+from src.parallel_load import load_table, normalize_load_workers
+
+
+def _write_csv(path: Path, rows: int):
+    """CSV con campi quotati su più righe, NULL e promozioni nelle righe finali"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'misura', 'nota', 'zona'])
+        for i in range(rows):
+            misura = f'{i}.5' if i == rows - 10 else ('' if i % 7 == 0 else str(i))
+            nota = f'riga {i},\n"seconda" riga' if i % 5 == 0 else f'nota {i}'
+            zona = 'Z' + str(i % 13) if i < rows - 3 else str(i)
+            writer.writerow([i, misura, nota, zona])
+
+
+def test_split_ranges_aligned_to_records():
+    """Test intervalli contigui che iniziano sempre su un record, anche con newline quotati"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "dati.csv"
+        _write_csv(path, 500)
+        
+        with CSVScanner(path) as scanner:
+            ranges = scanner.split_ranges(6, min_bytes=64)
+            assert len(ranges) == 6
+            assert ranges[0][0] == scanner.split_ranges(1)[0][0]
+            assert ranges[-1][1] == scanner.size
+            assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+            
+            ids = []
+            for start, end in ranges:
+                for block in scanner.scan_columns([0], start, end):
+                    ids.extend(block[0])
+            assert ids == [str(i).encode() for i in range(500)]
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_matches_serial(workers):
+    """Test stessi tipi, NULL, dizionari e testi del caricamento seriale"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "dati.csv"
+        _write_csv(path, 400)
+        hints = {'id': int, 'misura': int, 'nota': str, 'zona': str}
+        names = {col: col for col in hints}
+        
+        with CSVScanner(path) as scanner:
+            serial = load_table(scanner, names, hints, workers=1)
+            parallel = load_table(scanner, names, hints, workers=workers, min_bytes=64)
+        
+        assert parallel.schema == serial.schema == {'id': int, 'misura': float, 'nota': str, 'zona': str}
+        assert parallel.rows(range(400)) == serial.rows(range(400))
+        for name in hints:
+            assert list(parallel.column(name).values) == list(serial.column(name).values)
+            assert parallel.column(name).validity == serial.column(name).validity
+
+
+def test_concat_unifies_types():
+    """Test concatenazione di parti con tipi diversi e bitmap non allineate al byte"""
+    parts = [
+        ColumnarTable.from_records(['v'], [['1'], [''], ['3']], {'v': int}).column('v'),
+        ColumnarTable.from_records(['v'], [['2.50']], {'v': float}).column('v'),
+        ColumnarTable.from_records(['v'], [[''], ['b'], ['a']], {'v': str}).column('v'),
+    ]
+    merged = Column.concat(parts)
+    
+    assert merged.type == str
+    assert merged.dictionary == ['1', '2.50', '3', 'a', 'b']
+    assert [merged.text(i) for i in range(len(merged))] == ['1', '', '3', '2.50', '', 'b', 'a']
+    assert merged.null_count == 2
+
+
+def test_compiler_with_load_workers(monkeypatch):
+    """Test end-to-end: risultati identici con 1 e 3 processi di caricamento"""
+    monkeypatch.setattr(parallel_load, 'PARALLEL_MIN_BYTES', 64)
+    query = 'RIPIGLIAMMO id, zona MMIEZ \'A "dati.csv" arò misura > 100 e zona <> "Z3"'
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_csv(Path(tmpdir) / "dati.csv", 300)
+        serial = GomorraCompiler(data_dir=tmpdir, load_workers=1).compile_and_run(query)
+        parallel = GomorraCompiler(data_dir=tmpdir, load_workers=3).compile_and_run(query)
+    
+    assert parallel == serial
+    assert len(serial) > 0
+    with pytest.raises(ValueError):
+        normalize_load_workers(0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,72 @@
+"""
+Test per il profilo per fase delle query
+"""
+import json
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.compiler import GomorraCompiler
+from src.profiling import QueryProfile
+
+
+def test_profile_phases_jit(monkeypatch):
+    """Test che compile_and_run registri tutte le fasi, con tempi e righe"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '1')
+    compiler = GomorraCompiler(data_dir="data", jit_cache_size=0)
+    results = compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta > 18')
+    
+    profile = compiler.last_profile
+    assert list(profile.phases) == [
+        'parse', 'analyze', 'type_inference', 'csv_load', 'column_stats',
+        'ir_gen', 'optimize', 'jit_finalize', 'row_eval',
+    ]
+    assert all(p.calls == 1 and p.wall_ms >= 0 and p.cpu_ms >= 0 for p in profile.phases.values())
+    # eta > 18 viene applicato già durante il parsing: 3 righe caricate su 4
+    assert profile.phases['csv_load'].rows == 3
+    assert profile.phases['row_eval'].rows == 3
+    assert profile.phases['parse'].rows is None
+    assert profile.info == {'jit': 'compiled', 'result_rows': len(results)}
+
+
+def test_profile_python_fallback(monkeypatch):
+    """Test profilo senza JIT: nessuna fase di ottimizzazione o finalize"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', '0')
+    compiler = GomorraCompiler(data_dir="data")
+    compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv" arò eta > 18')
+    first = compiler.last_profile
+    compiler.compile_and_run('RIPIGLIAMMO nome MMIEZ \'A "guaglioni.csv"')
+    
+    # Ogni query ha un profilo nuovo
+    assert compiler.last_profile is not first
+    assert 'optimize' not in first.phases
+    assert 'jit_finalize' not in first.phases
+    assert first.info['jit'] == 'disabled'
+    assert compiler.last_profile.info['jit'] == 'no_where'
+
+
+def test_profile_report_formats():
+    """Test report leggibile e JSON"""
+    profile = QueryProfile()
+    with profile.phase('csv_load') as timing:
+        timing.add_rows(10)
+    with profile.phase('csv_load') as timing:
+        timing.add_rows(5)
+    profile.info['jit'] = 'compiled'
+    
+    data = json.loads(profile.to_json())
+    assert data['phases'][0]['name'] == 'csv_load'
+    assert data['phases'][0]['calls'] == 2
+    assert data['phases'][0]['rows'] == 15
+    assert data['total_wall_ms'] == pytest.approx(profile.total_wall_ms)
+    
+    report = profile.format()
+    assert 'csv_load' in report
+    assert 'totale' in report
+    assert 'jit: compiled' in report
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
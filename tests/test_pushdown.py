@@ -0,0 +1,76 @@
+"""
+Test per il pushdown dei predicati nello scanner CSV
+"""
+import csv
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ast_nodes import Comparison, NullCheck, LogicOp
+from src.columnar import ColumnarTable
+from src.compiler import GomorraCompiler
+from src.llvm_codegen import LLVMCodeGenerator
+from src.pushdown import cell_mask, predicate_column, split_conjuncts
+
+
+CELLS = ['12', '', '7.5', 'abc', '-3', '007', 'Vomero', '100', 'vomero', 'Àrzano']
+
+
+def test_split_and_classify():
+    """Test congiunti del WHERE e predicati spingibili su una sola colonna"""
+    eta = Comparison('eta', '>', 18)
+    zona = LogicOp('OR', [Comparison('zona', '=', 'Centro'), NullCheck('zona', True)])
+    mixed = LogicOp('OR', [eta, Comparison('zona', '=', 'Centro')])
+    columns = ['eta', 'zona', 'nome']
+    
+    assert split_conjuncts(LogicOp('AND', [eta, LogicOp('AND', [zona, mixed])])) == [eta, zona, mixed]
+    assert split_conjuncts(None) == []
+    assert predicate_column(eta, columns) == 'eta'
+    assert predicate_column(zona, columns) == 'zona'
+    assert predicate_column(mixed, columns) is None
+    assert predicate_column(Comparison('zona', '=', 'nome'), columns) is None
+
+
+@pytest.mark.parametrize("condition", [
+    Comparison('c', '>', 10), Comparison('c', '=', 7.5), Comparison('c', '<>', 12),
+    Comparison('c', '<=', 0), Comparison('c', '=', 'Vomero'), Comparison('c', '<>', '007'),
+    Comparison('c', '>', 'V'), Comparison('c', '<', 'vomero'), Comparison('c', '>=', 'Àrzano'),
+    NullCheck('c', True), NullCheck('c', False),
+])
+def test_mask_matches_python_evaluation(condition):
+    """Test stessa semantica della valutazione Python sulla colonna tipizzata"""
+    codegen = LLVMCodeGenerator()
+    codegen.data = ColumnarTable.from_records(['c'], [[cell] for cell in CELLS])
+    codegen.columns = ['c']
+    
+    expected = [codegen._evaluate_condition_python(condition, i) for i in range(len(CELLS))]
+    assert cell_mask(condition, [cell.encode() for cell in CELLS]) == expected
+
+
+@pytest.mark.parametrize("jit", ['0', '1'])
+def test_rejected_rows_not_loaded(monkeypatch, jit):
+    """Test end-to-end: solo le righe che passano i predicati su una colonna vengono caricate"""
+    monkeypatch.setenv('GOMORRASQL_ENABLE_JIT', jit)
+    query = ('RIPIGLIAMMO id MMIEZ \'A "dati.csv" '
+             'arò eta >= 30 e (zona = "Centro" o zona è nisciun) e eta < peso')
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        rows = [(i, 20 + i % 40, ['Centro', 'Vomero', ''][i % 3], 10 + i % 70) for i in range(300)]
+        with open(Path(tmpdir) / "dati.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'eta', 'zona', 'peso'])
+            writer.writerows(rows)
+        
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        results = compiler.compile_and_run(query)
+        
+        loaded = [r for r in rows if r[1] >= 30 and r[2] in ('Centro', '')]
+        assert len(compiler.codegen.data) == len(loaded)
+        assert [r['id'] for r in results] == [str(r[0]) for r in loaded if r[1] < r[3]]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
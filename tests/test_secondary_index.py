@@ -0,0 +1,138 @@
+"""
+Test per gli indici secondari persistenti (hash e ordinati)
+"""
+import os
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ast_nodes import Comparison
+from src.compiler import GomorraCompiler
+from src.csv_scanner import CSVScanner
+from src.secondary_index import SecondaryIndex, index_path
+from src.semantic_analyzer import SemanticError
+
+
+def _write_people(path: Path, rows: int = 200):
+    """CSV con NULL, CRLF e campi quotati su più righe"""
+    lines = ["id,nome,zona"]
+    for i in range(rows):
+        nome = f'"Ciro\n{i}"' if i % 17 == 0 else ('' if i % 13 == 0 else f'Nome{i % 50}')
+        lines.append(f"{i},{nome},Z{i % 7}")
+    path.write_bytes(("\r\n".join(lines) + "\r\n").encode())
+
+
+def _lookup(path: Path, column: str, conditions, names):
+    with SecondaryIndex(path, column) as index:
+        assert index.open() and not index.stale
+        offsets = index.lookup(conditions)
+    if offsets is None:
+        return None
+    with CSVScanner(path) as scanner:
+        indices = [scanner.header.index(name) for name in names]
+        cells = [[] for _ in names]
+        for block in scanner.read_records(offsets, indices):
+            for column_cells, block_cells in zip(cells, block):
+                column_cells.extend(block_cells)
+    return [tuple(row) for row in zip(*cells)]
+
+
+def test_scan_offsets_match_scan_columns():
+    """Test che gli offset dei record rileggano le stesse righe dello scan"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "persone.csv"
+        _write_people(path)
+        with CSVScanner(path) as scanner:
+            offsets, cells = [], []
+            for block_offsets, block_cells in scanner.scan_offsets(1):
+                offsets.extend(block_offsets)
+                cells.extend(block_cells)
+            expected = [cell for block in scanner.scan_columns([1]) for cell in block[0]]
+            reread = [cell for block in scanner.read_records(offsets, [1], block_rows=7)
+                      for cell in block[0]]
+        assert cells == expected == reread
+        assert len(offsets) == 200
+
+
+@pytest.mark.parametrize("kind", ["hash", "sorted"])
+def test_lookup_numeric_and_text(kind):
+    """Test uguaglianze su chiavi numeriche e testuali, NULL esclusi"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "persone.csv"
+        _write_people(path)
+        SecondaryIndex.build(path, 'id', kind)
+        SecondaryIndex.build(path, 'nome', kind)
+        
+        assert _lookup(path, 'id', [Comparison('id', '=', 42)], ['id', 'zona']) == [(b'42', b'Z0')]
+        assert _lookup(path, 'id', [Comparison('id', '=', 42.0)], ['id']) == [(b'42',)]
+        assert _lookup(path, 'id', [Comparison('id', '=', '42')], ['id']) is None
+        rows = _lookup(path, 'nome', [Comparison('nome', '=', 'Nome3')], ['id', 'nome'])
+        assert [row[0] for row in rows if row[1] == b'Nome3'] == [b'3', b'53', b'103']
+        assert _lookup(path, 'nome', [Comparison('nome', '=', 'Ciro\n34')], ['id']) == [(b'34',)]
+        assert _lookup(path, 'nome', [Comparison('nome', '=', '')], ['id']) in ([], None)
+
+
+def test_sorted_ranges():
+    """Test intervalli (anche intersecati) sull'indice ordinato; hash solo uguaglianze"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "persone.csv"
+        _write_people(path)
+        SecondaryIndex.build(path, 'id', 'sorted')
+        
+        rows = _lookup(path, 'id', [Comparison('id', '>=', 190)], ['id'])
+        assert [int(row[0]) for row in rows] == list(range(190, 200))
+        rows = _lookup(path, 'id', [Comparison('id', '>', 100), Comparison('id', '<', 104)], ['id'])
+        assert {int(row[0]) for row in rows} >= {101, 102, 103}
+        assert _lookup(path, 'id', [Comparison('id', '<', -1)], ['id']) == []
+        assert _lookup(path, 'id', [Comparison('id', '<>', 5)], ['id']) is None
+        
+        SecondaryIndex.build(path, 'id', 'hash')
+        assert _lookup(path, 'id', [Comparison('id', '>', 5)], ['id']) is None
+
+
+def test_planner_uses_index_and_rebuilds_when_stale():
+    """Test query con indice: stessi risultati, indice ricostruito se il CSV cambia"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "persone.csv"
+        _write_people(path)
+        query = 'RIPIGLIAMMO id, zona MMIEZ \'A "persone.csv" arò id >= 40 e id < 44 e zona <> "Z0"'
+        expected = GomorraCompiler(data_dir=tmpdir).compile_and_run(query)
+        assert [row['id'] for row in expected] == ['40', '41', '43']
+        
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        assert compiler.create_index('persone.csv', 'id', 'sorted') == index_path(path, 'id')
+        assert compiler.compile_and_run(query) == expected
+        assert compiler.last_profile.info['index']['persone.csv'] == {
+            'column': 'id', 'kind': 'sorted', 'rows': 5, 'status': 'used'}  # Estremi inclusi
+        
+        # Poco selettivo: scan completo
+        compiler.compile_and_run('RIPIGLIAMMO id MMIEZ \'A "persone.csv" arò id > 10')
+        assert 'index' not in compiler.last_profile.info
+        
+        with open(path, 'ab') as f:
+            f.write(b"41,Ciro,Z3\r\n")
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 10**9))
+        results = compiler.compile_and_run(query)
+        assert [row['id'] for row in results] == ['40', '41', '43', '41']
+        assert compiler.last_profile.info['index']['persone.csv']['status'] == 'rebuilt'
+        
+        assert compiler.drop_index('persone.csv', 'id')
+        assert not compiler.drop_index('persone.csv', 'id')
+
+
+def test_create_index_errors():
+    """Test colonna inesistente e tipo di indice non valido"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_people(Path(tmpdir) / "persone.csv")
+        compiler = GomorraCompiler(data_dir=tmpdir)
+        with pytest.raises(SemanticError):
+            compiler.create_index('persone.csv', 'eta')
+        with pytest.raises(ValueError):
+            compiler.create_index('persone.csv', 'id', 'btree')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
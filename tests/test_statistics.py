@@ -0,0 +1,72 @@
+"""
+Test per statistiche di colonna e stima di selettività
+"""
+import pytest
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ast_nodes import Comparison, NullCheck, LogicOp
+from src.statistics import ColumnStats, estimate_cost, estimate_selectivity, order_conditions
+
+
+@pytest.fixture
+def stats():
+    """Statistiche di una tabella da 10 righe: eta 10-60, zona con un NULL"""
+    return {
+        'eta': ColumnStats(row_count=10, distinct_count=10, min_value=10, max_value=60),
+        'zona': ColumnStats(
+            row_count=10, null_count=1, distinct_count=3,
+            dictionary=['Centro', 'Forcella', 'Scampia'],
+            frequencies={'Centro': 6, 'Forcella': 2, 'Scampia': 1},
+        ),
+    }
+
+
+def test_selectivity_leaves(stats):
+    """Test stime per confronti numerici, stringhe e NULL check"""
+    columns = list(stats)
+    assert estimate_selectivity(Comparison('eta', '>', 35), stats, columns) == pytest.approx(0.5)
+    assert estimate_selectivity(Comparison('eta', '=', 99), stats, columns) == 0.0
+    assert estimate_selectivity(Comparison('zona', '=', 'Centro'), stats, columns) == pytest.approx(0.6)
+    assert estimate_selectivity(Comparison('zona', '<>', 'Centro'), stats, columns) == pytest.approx(0.3)
+    assert estimate_selectivity(NullCheck('zona', True), stats, columns) == pytest.approx(0.1)
+
+
+def test_selectivity_logic_ops(stats):
+    """Test combinazione AND (prodotto) e OR (complemento del prodotto)"""
+    columns = list(stats)
+    eta = Comparison('eta', '>', 35)        # 0.5
+    zona = Comparison('zona', '=', 'Centro')  # 0.6
+    assert estimate_selectivity(LogicOp('AND', [eta, zona]), stats, columns) == pytest.approx(0.3)
+    assert estimate_selectivity(LogicOp('OR', [eta, zona]), stats, columns) == pytest.approx(0.8)
+
+
+def test_order_conditions(stats):
+    """Test ordinamento: AND prima il più selettivo, OR prima il meno selettivo"""
+    columns = list(stats)
+    common = Comparison('zona', '=', 'Centro')   # 0.6
+    rare = Comparison('zona', '=', 'Scampia')    # 0.1
+    
+    assert order_conditions(LogicOp('AND', [common, rare]), stats, columns) == [rare, common]
+    assert order_conditions(LogicOp('OR', [rare, common]), stats, columns) == [common, rare]
+
+
+def test_deeply_nested_planning_is_linear(stats):
+    """Test che costo e ordine di AND/OR annidati in profondità si stimino in fretta"""
+    columns = list(stats)
+    node = Comparison('eta', '>', 35)
+    for depth in range(40):
+        node = LogicOp('AND' if depth % 2 else 'OR', [node, Comparison('zona', '=', 'Centro')])
+    
+    start = time.perf_counter()
+    assert estimate_cost(node, stats, columns) > 0
+    assert len(order_conditions(node, stats, columns)) == 2
+    # Con costi ricalcolati per livello servirebbero ~4^40 stime
+    assert time.perf_counter() - start < 1.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
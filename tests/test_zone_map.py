@@ -0,0 +1,169 @@
+"""
+Test per le zone map min/max e il salto delle zone nello scan
+"""
+import os
+import tempfile
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.llvm_codegen as llvm_codegen
+import src.parallel_load as parallel_load
+from src.ast_nodes import Comparison, NullCheck, LogicOp
+from src.compiler import GomorraCompiler
+from src.csv_scanner import CSVScanner
+from src.zone_map import ZoneMap, ZoneSummary, summarize_cells, zone_map_path, zone_may_match
+
+
+def test_summarize_cells():
+    """Test min/max/NULL di una zona; None con celle non numeriche o NaN"""
+    assert summarize_cells([b'3', b'', b'-1.5', b'7']) == ZoneSummary(-1.5, 7.0, 1, 4)
+    assert summarize_cells([b'', b'']) == ZoneSummary(None, None, 2, 2)
+    assert summarize_cells([b'1', b'Ciro']) is None
+    assert summarize_cells([b'1', b'nan']) is None
+    assert summarize_cells([b'1']).merge(ZoneSummary(None, None, 1, 1)) == ZoneSummary(1.0, 1.0, 1, 2)
+
+
+@pytest.mark.parametrize("condition, expected", [
+    (Comparison('eta', '>', 40), False),
+    (Comparison('eta', '>=', 30), True),
+    (Comparison('eta', '<', 10), False),
+    (Comparison('eta', '=', 25), True),
+    (Comparison('eta', '<>', 25), True),
+    (Comparison('eta', '=', 'trenta'), True),
+    (Comparison('eta', '>', 'peso'), True),
+    (Comparison('peso', '>', 1000), True),
+    (NullCheck('eta', True), True),
+    (NullCheck('eta', False), True),
+    (LogicOp('AND', [Comparison('eta', '>', 12), Comparison('eta', '<', 9)]), False),
+    (LogicOp('OR', [Comparison('eta', '>', 40), Comparison('eta', '=', 11)]), True),
+    (LogicOp('OR', [Comparison('eta', '>', 40), Comparison('peso', '<', 0)]), True),
+])
+def test_zone_may_match(condition, expected):
+    """Test salto conservativo: solo confronti numerici e NULL check con riassunto"""
+    summaries = {'eta': ZoneSummary(10, 30, 1, 5)}
+    assert zone_may_match(condition, summaries) is expected
+
+
+def test_zone_may_match_null_only_and_constant():
+    """Test zone tutte NULL e zone con un solo valore"""
+    assert not zone_may_match(Comparison('eta', '<>', 3), {'eta': ZoneSummary(None, None, 4, 4)})
+    assert not zone_may_match(NullCheck('eta', False), {'eta': ZoneSummary(None, None, 4, 4)})
+    assert not zone_may_match(Comparison('eta', '<>', 3), {'eta': ZoneSummary(3, 3, 0, 4)})
+    assert not zone_may_match(NullCheck('eta', True), {'eta': ZoneSummary(3, 3, 0, 4)})
+
+
+def _write_events(path: Path, rows: int):
+    """CSV append-only: ts crescente, una riga non numerica e qualche NULL"""
+    lines = ["ts,eta,zona"]
+    for i in range(rows):
+        eta = '' if i % 11 == 0 else ('boh' if i == rows // 2 else str(i % 90))
+        lines.append(f"{1000 + i},{eta},Z{i % 4}")
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scan_skips_zones(monkeypatch, workers):
+    """Test che la seconda query salti le zone e dia gli stessi risultati"""
+    monkeypatch.setattr(llvm_codegen, 'ZONE_BYTES', 256)
+    monkeypatch.setattr(parallel_load, 'PARALLEL_MIN_BYTES', 512)
+    queries = [
+        'RIPIGLIAMMO ts, eta MMIEZ \'A "eventi.csv" arò ts >= 1950',
+        'RIPIGLIAMMO ts MMIEZ \'A "eventi.csv" arò ts < 1010 o ts > 1990',
+        'RIPIGLIAMMO ts, eta MMIEZ \'A "eventi.csv" arò ts > 1400 e eta <> 5',
+        'RIPIGLIAMMO ts MMIEZ \'A "eventi.csv" arò eta = 88 e ts > 1000',
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_events(Path(tmpdir) / "eventi.csv", 1000)
+        compiler = GomorraCompiler(data_dir=tmpdir, load_workers=workers)
+        for query in queries:
+            fresh = GomorraCompiler(data_dir=tmpdir, load_workers=workers).compile_and_run(query)
+            assert compiler.compile_and_run(query) == fresh
+            assert compiler.compile_and_run(query) == fresh
+        
+        # 50 righe su 1000 (~600 byte): lette al più 3 zone da 256 byte
+        assert len(compiler.compile_and_run(queries[0])) == 50
+        status = compiler.last_profile.info['zone_map']['eventi.csv']
+        assert status['zones'] - status['skipped'] <= 3
+
+
+def _open_zone_map(path: Path) -> ZoneMap:
+    with CSVScanner(path) as scanner:
+        return ZoneMap.open(path, lambda start: scanner.split_ranges(
+            (scanner.size - (start or 0)) // 256 + 1, 256, start))
+
+
+def _append_events(path: Path, first: int, rows: int):
+    """Righe aggiunte in coda (mtime forzato: il file risulta cambiato)"""
+    with open(path, 'a') as f:
+        f.write("".join(f"{1000 + i},{i % 90},Z{i % 4}\n" for i in range(first, first + rows)))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_zone_map_persisted_between_compilers(monkeypatch):
+    """Test che un nuovo compilatore (nuovo processo) riusi la zone map del file .gzone (opt-in)"""
+    monkeypatch.setattr(llvm_codegen, 'ZONE_BYTES', 256)
+    query = 'RIPIGLIAMMO ts MMIEZ \'A "eventi.csv" arò ts >= 1950'
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "eventi.csv"
+        _write_events(path, 1000)
+        expected = GomorraCompiler(data_dir=tmpdir).compile_and_run(query)
+        assert not zone_map_path(path).exists()  # Senza zone_map_cache niente file accanto al CSV
+        
+        assert GomorraCompiler(data_dir=tmpdir, zone_map_cache=True).compile_and_run(query) == expected
+        assert zone_map_path(path).exists()
+        
+        compiler = GomorraCompiler(data_dir=tmpdir, zone_map_cache=True)
+        assert compiler.compile_and_run(query) == expected
+        status = compiler.last_profile.info['zone_map']['eventi.csv']
+        assert status['zones'] - status['skipped'] <= 3
+
+
+def test_zone_map_append_keeps_prefix_zones(monkeypatch):
+    """Test di un CSV cresciuto in coda: zone e riassunti del prefisso restano validi"""
+    monkeypatch.setattr(llvm_codegen, 'ZONE_BYTES', 256)
+    query = 'RIPIGLIAMMO ts MMIEZ \'A "eventi.csv" arò ts >= 1950 e ts < 2010'
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "eventi.csv"
+        _write_events(path, 1000)
+        GomorraCompiler(data_dir=tmpdir, zone_map_cache=True).compile_and_run(query)
+        before = _open_zone_map(path)
+        old_size = path.stat().st_size
+        
+        _append_events(path, 1000, 200)
+        after = _open_zone_map(path)
+        kept = [zone for zone in before.zones if zone[1] < old_size]
+        assert after.zones[:len(kept)] == kept and len(after) > len(before)
+        assert all(after.has_summary(zone, 'ts') for zone in range(len(kept)))
+        assert not after.has_summary(len(kept), 'ts')
+        
+        # Solo la coda viene letta (e riassunta) dalla query successiva
+        compiler = GomorraCompiler(data_dir=tmpdir, zone_map_cache=True)
+        results = compiler.compile_and_run(query)
+        assert [int(row['ts']) for row in results] == list(range(1950, 2010))
+        status = compiler.last_profile.info['zone_map']['eventi.csv']
+        assert status['zones'] - status['skipped'] <= 4 + len(after) - len(kept)
+        assert all(_open_zone_map(path).has_summary(zone, 'ts') for zone in range(len(after)))
+
+
+def test_zone_map_rewrite_discards_zones(monkeypatch):
+    """Test di un CSV riscritto (non solo in coda): zone e riassunti vengono scartati"""
+    monkeypatch.setattr(llvm_codegen, 'ZONE_BYTES', 256)
+    query = 'RIPIGLIAMMO ts MMIEZ \'A "eventi.csv" arò ts > 1990'
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "eventi.csv"
+        _write_events(path, 1000)
+        GomorraCompiler(data_dir=tmpdir, zone_map_cache=True).compile_and_run(query)
+        
+        path.write_text(path.read_text().replace("1001,", "9999,", 1))
+        _append_events(path, 1000, 10)
+        assert not _open_zone_map(path).columns
+        results = GomorraCompiler(data_dir=tmpdir, zone_map_cache=True).compile_and_run(query)
+        assert sorted(int(row['ts']) for row in results) == list(range(1991, 2010)) + [9999]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])